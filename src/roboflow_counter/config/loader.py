@@ -43,6 +43,9 @@ def _merge_env_over_yaml(cfg: Dict[str, Any], env: Dict[str, str]) -> Dict[str,
         "INFLUX_TOKEN": "metrics.influx",
         "RTSP_USERNAME": "input",
         "RTSP_PASSWORD": "input",
+        "OPCUA_ENDPOINT": "opcua",
+        "OPCUA_USERNAME": "opcua",
+        "OPCUA_PASSWORD": "opcua",
     }
     for env_key, val in env.items():
         if env_key not in mapping or not val:
@@ -54,9 +57,15 @@ def _merge_env_over_yaml(cfg: Dict[str, Any], env: Dict[str, str]) -> Dict[str,
             tgt["token"] = val
         elif env_key in ("RTSP_USERNAME", "RTSP_PASSWORD"):
             tgt[env_key.lower()] = val
+        elif env_key.startswith("OPCUA_"):
+            tgt[env_key[len("OPCUA_"):].lower()] = val
 
     # inject creds into rtsp_url if user+pass provided
-    inp = cfg.get("input", {}) or {}
+    inject_rtsp_credentials(cfg.get("input", {}) or {})
+    return cfg
+
+def inject_rtsp_credentials(inp: Dict[str, Any]) -> Dict[str, Any]:
+    """Put rtsp_username/rtsp_password into inp["rtsp_url"] (in place) unless the url has creds."""
     url = inp.get("rtsp_url")
     user = inp.get("rtsp_username") or inp.get("username")
     pwd  = inp.get("rtsp_password") or inp.get("password")
@@ -65,14 +74,14 @@ def _merge_env_over_yaml(cfg: Dict[str, Any], env: Dict[str, str]) -> Dict[str,
             if url.startswith("rtsp://"):
                 rest = url[len("rtsp://"):]
                 if "@" not in rest:
-                    cfg["input"]["rtsp_url"] = f"rtsp://{user}:{pwd}@{rest}"
+                    inp["rtsp_url"] = f"rtsp://{user}:{pwd}@{rest}"
             elif url.startswith("rtsps://"):
                 rest = url[len("rtsps://"):]
                 if "@" not in rest:
-                    cfg["input"]["rtsp_url"] = f"rtsps://{user}:{pwd}@{rest}"
+                    inp["rtsp_url"] = f"rtsps://{user}:{pwd}@{rest}"
         except Exception:
             pass
-    return cfg
+    return inp
 
 def load_config(cfg_path: str | Path = DEFAULT_CFG_PATH,
                 env_path: str | Path = DEFAULT_ENV_PATH) -> Dict[str, Any]:
@@ -88,7 +97,17 @@ def validate_config(cfg: Dict[str, Any]) -> Tuple[bool, str]:
         return False, "Config root must be a mapping/dict."
     inp = cfg.get("input") or {}
     url = inp.get("rtsp_url")
-    if not url or not isinstance(url, str):
+    streams = cfg.get("streams")
+    if streams is not None:
+        # multi-camera mode: every stream needs its own (or the global) input url
+        if not isinstance(streams, list) or not streams:
+            return False, "streams must be a non-empty list."
+        for i, s in enumerate(streams):
+            if not isinstance(s, dict):
+                return False, f"streams[{i}] must be a mapping."
+            if not ((s.get("input") or {}).get("rtsp_url") or url):
+                return False, f"streams[{i}].input.rtsp_url missing."
+    elif not url or not isinstance(url, str):
         return False, "input.rtsp_url missing (provide in config.yml or CLI)."
     trans = (inp.get("rtsp_transport") or "tcp")
     if trans not in ("tcp", "udp"):
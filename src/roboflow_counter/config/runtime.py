@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Laufzeit-Parameter mit Hot Reload (ohne Kamera-Reconnect / ffmpeg-Neustart)
+- config.yml wird einmal in einen typisierten, validierten RuntimeParams-Snapshot übersetzt
+  (config/schema.py, pydantic, unveränderlich)
+- ParamStore.current ist der aktuelle Snapshot; reload() baut einen neuen und tauscht ihn mit
+  einer einzigen Zuweisung aus – der Frame-Loop liest pro Frame nur dieses Attribut und sieht
+  immer einen vollständigen alten oder neuen Stand, nie eine Mischung
+- Auslöser: SIGHUP (Handler weckt nur den Watch-Thread) oder Änderung der Config-Datei
+  (mtime/Größe/Inode, alle poll_sec geprüft); geladen und validiert wird im Watch-Thread
+- ungültige Config → Warnung, der bisherige Snapshot bleibt aktiv
+
+Zur Laufzeit änderbar: motion.ema_alpha/threshold, highlight.gain, highlight.gauss.ksize/sigma,
+background_darken, region.*. Alles andere (Backend, analysis_scale, ROI, Zählung, URLs ...) erst
+nach einem Neustart.
+
+config.yml:
+  runtime:
+    reload_sec: 2      # Config-Datei alle 2 s auf Änderungen prüfen (0 = nur SIGHUP)
+"""
+
+from __future__ import annotations
+import os
+import signal
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from ..util.logging import setup_logger
+from .schema import RuntimeParams
+
+
+class ParamStore:
+    def __init__(self, params: RuntimeParams, load: Optional[Callable[[], Dict[str, Any]]] = None,
+                 path: Optional[str] = None, poll_sec: float = 2.0, log_level: str = "INFO"):
+        self.current = params
+        self.version = 1
+        self._load = load
+        self.path = Path(path) if path else None
+        self.poll_sec = max(0.0, float(poll_sec))
+        self.log = setup_logger("params", log_level)
+        self._sig = self._stat()
+        self._hup = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Zähler
+        self.reloads = 0
+        self.errors = 0
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path) if self.path is not None else None
+        except OSError:
+            return None
+        return st and (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    # ---------------- Reload ----------------
+
+    def reload(self) -> bool:
+        """Config neu laden und validieren; True, wenn ein neuer Snapshot aktiv ist."""
+        if self._load is None:
+            return False
+        try:
+            new = RuntimeParams.from_cfg(self._load())
+        except Exception as e:  # YAML-/Validierungsfehler: alter Stand bleibt
+            self.errors += 1
+            if hasattr(e, "errors"):  # pydantic.ValidationError → eine Zeile je Feld
+                e = "; ".join(f"{'.'.join(map(str, x['loc']))}: {x['msg']}" for x in e.errors())
+            self.log.warning("reload failed, keeping v%d: %s", self.version, e)
+            return False
+        changed = new.changed(self.current)
+        if not changed:
+            self.log.info("reload: no runtime parameter changed")
+            return False
+        self.current = new  # atomarer Austausch (eine Referenz-Zuweisung)
+        self.version += 1
+        self.reloads += 1
+        self.log.info("reload v%d: %s", self.version,
+                      ", ".join(f"{k}={getattr(new, k)}" for k in changed))
+        return True
+
+    def request_reload(self, signum=None, frame=None):
+        """Signal-Handler: nur den Watch-Thread wecken (kein I/O im unterbrochenen Frame-Loop)."""
+        self._hup = True
+        self._wake.set()
+
+    # ---------------- Lifecycle ----------------
+
+    def install_sighup(self):
+        """SIGHUP → reload (nur im Haupt-Thread möglich, unter Windows ohne Wirkung)."""
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self.request_reload)
+
+    def start(self) -> "ParamStore":
+        if self._load is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="param-reload", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_sec if self.poll_sec > 0 else None)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            sig = self._stat()
+            if self._hup or (self.poll_sec > 0 and sig != self._sig):
+                self._hup = False
+                self._sig = sig
+                self.reload()
+
+    def stats(self) -> dict:
+        return {"version": self.version, "reloads": self.reloads, "errors": self.errors}
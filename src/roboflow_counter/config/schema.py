@@ -1,4 +1,7 @@
-from pydantic import BaseModel, Field
+import os
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 class InputCfg(BaseModel):
     rtsp_url: str = Field(..., description="RTSP(S) Kamera/Stream URL")
@@ -22,3 +25,76 @@ class Config(BaseModel):
     output: OutputCfg
     model: ModelCfg
     secrets: SecretsCfg
+
+
+# ---------------- Laufzeit-Parameter (Hot Reload, siehe config/runtime.py) ----------------
+
+class RegionParams(BaseModel):
+    """`region:` – Region-/Growth-Filter nach MORPH_OPEN (stream/region.py)."""
+    model_config = ConfigDict(frozen=True)
+
+    min_pixels: int = Field(50, ge=0)
+    grow_iters: int = Field(2, ge=0)
+    edge_threshold: int = Field(20, ge=0)
+    gray_delta: int = Field(0, ge=0)
+
+
+class RuntimeParams(BaseModel):
+    """
+    Parameter, die sich ohne Neustart des Streams ändern lassen (unveränderlicher Snapshot).
+    Quelle: motion.ema_alpha/threshold, highlight.gain, highlight.gauss.ksize/sigma,
+    background_darken, region.*
+    """
+    model_config = ConfigDict(frozen=True)
+
+    ema_alpha: float = Field(0.05, gt=0.0, le=1.0)
+    threshold: int = Field(12, ge=0, le=255)
+    gain: float = Field(0.70, ge=0.0)
+    darken: float = Field(0.0, ge=0.0)
+    gauss_ksize: int = Field(7, ge=1, le=31)
+    gauss_sigma: float = Field(0.0, ge=0.0)
+    region: RegionParams = RegionParams()
+
+    @field_validator("darken")
+    @classmethod
+    def _clamp_darken(cls, v: float) -> float:
+        return min(0.95, v)  # wie bisher: stärker abdunkeln als 95 % wird begrenzt
+
+    @field_validator("gauss_sigma", mode="before")
+    @classmethod
+    def _auto_sigma(cls, v: Any) -> Any:
+        return 0.0 if v is None or str(v).strip().lower() == "auto" else v  # 0 = aus ksize berechnet
+
+    @classmethod
+    def from_cfg(cls, cfg: Dict[str, Any]) -> "RuntimeParams":
+        """Aus dem config.yml-Dict (ValidationError bei ungültigen Werten)."""
+        hi = cfg.get("highlight") or {}
+        ga = hi.get("gauss") or {}
+        mo = cfg.get("motion") or {}
+        rg = cfg.get("region") or {}
+        return cls(
+            ema_alpha=mo.get("ema_alpha", 0.05), threshold=mo.get("threshold", 12),
+            gain=hi.get("gain", 0.70), darken=cfg.get("background_darken", 0.0) or 0.0,
+            gauss_ksize=ga.get("ksize", 7), gauss_sigma=ga.get("sigma", "auto"),
+            region=RegionParams(**{k: rg[k] for k in RegionParams.model_fields if k in rg}),
+        )
+
+    @classmethod
+    def from_env(cls) -> "RuntimeParams":
+        """Aus HL_* (Aufruf ohne config.yml, z.B. run_highlight_loop direkt)."""
+        env = os.environ.get
+        return cls(
+            ema_alpha=env("HL_EMA_ALPHA", "0.05"), threshold=int(float(env("HL_THRESH", "12"))),
+            gain=env("HL_GAIN", "0.70"), darken=env("HL_DARKEN", "0.0"),
+            gauss_ksize=env("HL_GAUSS", "7"), gauss_sigma=env("HL_SIGMA", "0"),
+            region=RegionParams(
+                min_pixels=int(float(env("HL_MIN_REGION", "50"))), grow_iters=int(float(env("HL_GROW_ITERS", "2"))),
+                edge_threshold=int(float(env("HL_GROW_EDGE_T", "20"))),
+                gray_delta=int(float(env("HL_GROW_GRAY_DELTA", "0")))),
+        )
+
+    def changed(self, other: Optional["RuntimeParams"]) -> List[str]:
+        """Namen der Felder, die sich gegenüber `other` unterscheiden (None → alle)."""
+        if other is None:
+            return list(type(self).model_fields)
+        return [k for k in type(self).model_fields if getattr(self, k) != getattr(other, k)]
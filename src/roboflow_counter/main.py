@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-import os, sys
+import os, sys, json
 from typing import Optional, Tuple
 import typer
 from rich import print as rprint
 from rich.table import Table
 from .config.loader import load_and_validate
+from .config.runtime import ParamStore
+from .config.schema import RuntimeParams
 from .stream.highlight import run_highlight_loop
 
 app = typer.Typer(help="Roboflow Counter CLI")
@@ -25,6 +27,11 @@ def _apply_env_from_cfg(cfg):
     os.environ["HL_GAIN"]=str(mg)
     ga = (hi.get("gauss") or {}).get("ksize",7)
     os.environ["HL_GAUSS"]=str(ga)
+    sg = (hi.get("gauss") or {}).get("sigma","auto")
+    os.environ["HL_SIGMA"]="0" if str(sg).strip().lower()=="auto" else str(sg)
+    os.environ["HL_BACKEND"]=str(hi.get("backend","auto"))
+    # Motion-Analyse auf verkleinertem Bild (1.0 = volle Auflösung, 0.5 = halbe Kantenlänge)
+    os.environ["HL_SCALE"]=str(hi.get("analysis_scale",1.0))
 
     mo = cfg.get("motion") or {}
     os.environ["HL_EMA_ALPHA"]=str(mo.get("ema_alpha",0.05))
@@ -36,14 +43,88 @@ def _apply_env_from_cfg(cfg):
     os.environ["HL_DARKEN"] = str(bk)
     # ===============================================================
 
-    # region-Settings werden weiterhin nur als Env exportiert, falls später genutzt
+    # region-Settings → Region-/Growth-Filter nach MORPH_OPEN (stream/region.py)
     rg = cfg.get("region") or {}
     os.environ["HL_MIN_REGION"] = str(rg.get("min_pixels",50))
     os.environ["HL_GROW_ITERS"] = str(rg.get("grow_iters",2))
     os.environ["HL_GROW_EDGE_T"] = str(rg.get("edge_threshold",20))
     os.environ["HL_GROW_GRAY_DELTA"] = str(rg.get("gray_delta",0))
 
+    # roi → Motion-Stufen nur im Bounding-Box-Fenster der Polygone (stream/roi.py)
+    ro = cfg.get("roi") or {}
+    os.environ["HL_ROI"] = json.dumps(ro.get("polygons") or [])
+    os.environ["HL_ROI_OUTSIDE"] = str(ro.get("outside","darken"))
+
+    # metrics → Prometheus-Endpunkt /metrics des Highlight-Prozesses (0 = aus)
+    me = cfg.get("metrics") or {}
+    os.environ["HL_METRICS_PORT"] = str(me.get("port",0))
+    os.environ["HL_METRICS_HOST"] = str(me.get("host","0.0.0.0"))
+    # metrics.influx → Line-Protocol-Sink (stream/influx.py); Token aus .env (INFLUX_TOKEN)
+    fx = me.get("influx") or {}
+    os.environ["HL_INFLUX_URL"] = str(fx.get("url","http://localhost:8086")) if fx.get("enabled") else ""
+    os.environ["HL_INFLUX_ORG"] = str(fx.get("org",""))
+    os.environ["HL_INFLUX_BUCKET"] = str(fx.get("bucket",""))
+    os.environ["HL_INFLUX_TOKEN"] = str(fx.get("token") or os.environ.get(str(fx.get("token_env") or "INFLUX_TOKEN"),""))
+    os.environ["HL_INFLUX_INTERVAL"] = str(fx.get("interval_sec",10))
+    os.environ["HL_INFLUX_FLUSH_SEC"] = str(fx.get("flush_sec",5))
+    os.environ["HL_INFLUX_BATCH_KB"] = str(fx.get("batch_kb",64))
+    os.environ["HL_INFLUX_SPOOL_DIR"] = str(fx.get("spool_dir",""))
+    os.environ["HL_INFLUX_SPOOL_MB"] = str(fx.get("spool_mb",64))
+
+    # export → Frames bei Bewegung nach app.data_dir (stream/exporter.py); HL_EXPORT_DIR leer = aus
+    ex = cfg.get("export") or {}
+    ex_dir = (ex.get("dir") or (cfg.get("app") or {}).get("data_dir") or "") if ex.get("enabled") else ""
+    os.environ["HL_EXPORT_DIR"] = str(ex_dir)
+    os.environ["HL_EXPORT_MIN_MOTION"] = str(ex.get("min_motion",0.002))
+    os.environ["HL_EXPORT_MIN_BLOBS"] = str(ex.get("min_blobs",0))
+    os.environ["HL_EXPORT_INTERVAL"] = str(ex.get("interval_sec",5))
+    os.environ["HL_EXPORT_FORMAT"] = str(ex.get("format","jpg"))
+    os.environ["HL_EXPORT_QUALITY"] = str(ex.get("quality",85))
+    os.environ["HL_EXPORT_SOURCE"] = str(ex.get("source","frame"))
+    os.environ["HL_EXPORT_WORKERS"] = str(ex.get("workers",2))
+    os.environ["HL_EXPORT_QUEUE"] = str(ex.get("queue",4))
+
+    # opcua → Live-Werte an die SPS (stream/opcua.py); endpoint/username/password aus .env (OPCUA_*)
+    ua = cfg.get("opcua") or {}
+    os.environ["HL_OPCUA_ENDPOINT"] = str(ua.get("endpoint") or "") if ua.get("enabled") else ""
+    os.environ["HL_OPCUA_USERNAME"] = str(ua.get("username") or "")
+    os.environ["HL_OPCUA_PASSWORD"] = str(ua.get("password") or "")
+    os.environ["HL_OPCUA_NODE_TEMPLATE"] = str(ua.get("node_template","ns=2;s=larvacounter.{stream}.{key}"))
+    os.environ["HL_OPCUA_NODES"] = json.dumps(ua.get("nodes") or {})
+    os.environ["HL_OPCUA_PUBLISH_SEC"] = str(ua.get("publish_sec",1.0))
+    os.environ["HL_OPCUA_BACKOFF_MAX"] = str(ua.get("backoff_max_sec",30))
+
+    # inference → lokaler Roboflow Inference Server (stream/inference.py); Modell aus model.id, Key aus .env
+    nf = cfg.get("inference") or {}
+    os.environ["HL_INFER_URL"] = str(nf.get("url","http://localhost:9001")) if nf.get("enabled") else ""
+    os.environ["HL_INFER_MODEL"] = str(nf.get("model_id") or (cfg.get("model") or {}).get("id") or "")
+    os.environ["HL_INFER_API_KEY"] = str((cfg.get("roboflow") or {}).get("api_key") or "")
+    os.environ["HL_INFER_FPS"] = str(nf.get("fps",2))
+    os.environ["HL_INFER_BATCH"] = str(nf.get("batch_size",4))
+    os.environ["HL_INFER_MAX_DELAY_MS"] = str(nf.get("max_delay_ms",50))
+    os.environ["HL_INFER_INFLIGHT"] = str(nf.get("max_inflight",2))
+    os.environ["HL_INFER_ENCODE_WORKERS"] = str(nf.get("encode_workers",2))
+    os.environ["HL_INFER_QUALITY"] = str(nf.get("jpeg_quality",80))
+    os.environ["HL_INFER_MAX_SIDE"] = str(nf.get("max_side",0))
+    os.environ["HL_INFER_CONFIDENCE"] = str(nf.get("confidence",0.4))
+    # inference.tiles → nur Bewegungskacheln senden (stream/tiles.py)
+    nt = nf.get("tiles") or {}
+    os.environ["HL_INFER_TILES"] = "1" if nt.get("enabled") else ""
+    os.environ["HL_INFER_TILE_PAD"] = str(nt.get("pad",32))
+    os.environ["HL_INFER_TILE_MIN_SIDE"] = str(nt.get("min_side",160))
+    os.environ["HL_INFER_TILE_MIN_AREA"] = str(nt.get("min_area",4))
+    os.environ["HL_INFER_TILE_GAP"] = str(nt.get("merge_gap",16))
+    os.environ["HL_INFER_TILE_MAX"] = str(nt.get("max_tiles",8))
+    os.environ["HL_INFER_TILE_FULL_RATIO"] = str(nt.get("full_ratio",0.6))
+
     rt = cfg.get("runtime") or {}
+    # Capture-Thread: latest (nur frischestes Frame) | queue (FIFO mit depth Plätzen)
+    os.environ["HL_CAPTURE_POLICY"] = str(rt.get("capture_policy","latest"))
+    os.environ["HL_CAPTURE_DEPTH"] = str(rt.get("capture_depth",2))
+    os.environ["HL_CAPTURE_STALE_MS"] = str(rt.get("capture_stale_ms",500))
+    # Writer-Thread: drop_oldest | drop_newest | block, wenn der Encoder hinterherhängt
+    os.environ["HL_WRITER_POLICY"] = str(rt.get("writer_policy","drop_oldest"))
+    os.environ["HL_WRITER_DEPTH"] = str(rt.get("writer_depth",2))
     return float(rt.get("fps",0.0)), int(rt.get("open_timeout_ms",8000))
 
 
@@ -54,9 +135,12 @@ def show_config(cfg_path="config/config.yml",env_file="config/.env"):
     for sec,k,v in [
         ("input","rtsp_url",(cfg.get("input") or {}).get("rtsp_url")),
         ("output","rtsp_url",(cfg.get("output") or {}).get("rtsp_url")),
+        ("highlight","backend",(cfg.get("highlight")or{}).get("backend","auto")),
+        ("highlight","analysis_scale",(cfg.get("highlight")or{}).get("analysis_scale",1.0)),
         ("highlight","gain",(cfg.get("highlight")or{}).get("gain")),
         ("highlight.gauss","ksize",(cfg.get("highlight")or{}).get("gauss",{}).get("ksize")),
         ("motion","ema_alpha",(cfg.get("motion")or{}).get("ema_alpha")),
+        ("roi","polygons",len((cfg.get("roi")or{}).get("polygons") or [])),
         ("region","min_pixels",(cfg.get("region")or{}).get("min_pixels")),
         ("region","grow_iters",(cfg.get("region")or{}).get("grow_iters")),
         ("region","edge_threshold",(cfg.get("region")or{}).get("edge_threshold")),
@@ -72,15 +156,91 @@ def show_config(cfg_path="config/config.yml",env_file="config/.env"):
 @app.command("run-highlight")
 def run_highlight(url:Optional[str]=None,out_url:Optional[str]=None,log_level="INFO",
                   cfg_path="config/config.yml",env_file="config/.env",
-                  fps_target_cli:float=0.0,open_timeout_ms_cli:int=0):
+                  fps_target_cli:float=0.0,open_timeout_ms_cli:int=0,
+                  backend:Optional[str]=None):
 
     ui,uo,cfg = _resolve_urls(cfg_path,env_file,url,out_url)
     fps_cfg,timeout_cfg = _apply_env_from_cfg(cfg)
     fps = fps_target_cli if fps_target_cli>0 else fps_cfg
     timeout = open_timeout_ms_cli if open_timeout_ms_cli>0 else timeout_cfg
 
+    # Laufzeit-Parameter: typisierter Snapshot, Hot Reload per SIGHUP / Änderung der config.yml
+    params = ParamStore(RuntimeParams.from_cfg(cfg),load=lambda: load_and_validate(cfg_path,env_file),
+                        path=cfg_path,poll_sec=(cfg.get("runtime") or {}).get("reload_sec",2),log_level=log_level)
+    params.install_sighup()
+    params.start()
+
     print(f"Motion-Highlight {ui} → {uo}")
-    run_highlight_loop(ui,uo,log=log_level,fps_target=fps,open_timeout_ms=timeout)
+    try:
+        run_highlight_loop(ui,uo,log=log_level,fps_target=fps,open_timeout_ms=timeout,backend=backend,
+                           counting=cfg.get("counting"),params=params)
+    finally:
+        params.close()
+
+
+@app.command("run-all")
+def run_all(log_level="INFO",cfg_path="config/config.yml",env_file="config/.env",
+            pin_cpus:Optional[str]=None):
+    """Alle Streams aus `streams:` starten (ein Prozess pro Kamera, siehe stream/supervisor.py)."""
+    from .stream.supervisor import Supervisor
+    cfg = load_and_validate(cfg_path,env_file)
+    if pin_cpus is not None:
+        cfg.setdefault("supervisor",{})["pin_cpus"] = pin_cpus
+    sup = Supervisor.from_config(cfg,log_level=log_level,cfg_path=cfg_path,env_path=env_file)
+    for s in sup.slots:
+        print(f"Motion-Highlight [{s.name}] {s.spec['cfg']['input']['rtsp_url']} → {s.spec['cfg']['output']['rtsp_url']}")
+    raise typer.Exit(sup.run())
+
+
+@app.command("process-file")
+def process_file(path:str,out:Optional[str]=None,stats:Optional[str]=None,jobs:int=0,
+                 segment_sec:float=0.0,warmup_sec:Optional[float]=None,
+                 threshold:Optional[int]=None,ema_alpha:Optional[float]=None,
+                 backend:Optional[str]=None,log_level="INFO",
+                 cfg_path="config/config.yml",env_file="config/.env"):
+    """Aufgezeichnete Videodatei offline verarbeiten (Segmente parallel, siehe stream/batch.py)."""
+    from .config.loader import load_config
+    from .stream.batch import run_batch
+    cfg = load_config(cfg_path,env_file)
+    mo = cfg.setdefault("motion",{})
+    if threshold is not None: mo["threshold"] = threshold
+    if ema_alpha is not None: mo["ema_alpha"] = ema_alpha
+    _apply_env_from_cfg(cfg)
+    os.environ["HL_METRICS_PORT"] = "0"
+
+    print(f"Motion-Highlight (offline) {path} → {out or '-'}" + (f", stats → {stats}" if stats else ""))
+    res = run_batch(path,out=out,stats=stats,jobs=jobs,segment_sec=segment_sec,warmup_sec=warmup_sec,
+                    backend=backend,counting=cfg.get("counting"),log=log_level)
+    for name,c in res["counts"].items():
+        print(f"[COUNT] {name}: in={c['in']} out={c['out']}")
+
+
+@app.command("cleanup")
+def cleanup(path:Optional[str]=None,max_age_days:Optional[float]=None,max_size_gb:Optional[float]=None,
+            interval_sec:Optional[float]=None,dry_run:bool=False,log_level="INFO",
+            cfg_path="config/config.yml",env_file="config/.env"):
+    """Export-Verzeichnis aufräumen: Altersgrenze + Speicherquote (util/retention.py); --interval-sec > 0 = Dienst."""
+    from .config.loader import load_config
+    from .util.retention import retention_from_cfg
+    cfg = load_config(cfg_path,env_file)
+    rc = cfg.setdefault("retention",{})
+    if max_age_days is not None: rc["max_age_days"] = max_age_days
+    if max_size_gb is not None: rc["max_size_gb"] = max_size_gb
+    ret = retention_from_cfg(cfg,root=path,log_level=log_level)
+    interval = float(interval_sec if interval_sec is not None else rc.get("interval_sec",0) or 0)
+
+    def report(r):
+        print(f"[CLEANUP] {'would remove' if r['dry_run'] else 'removed'} {r['files']} files "
+              f"({r['bytes'] / 1024 ** 2:.1f} MiB, {r['dirs']} dirs), kept {r['kept_files']} files "
+              f"({r['kept_bytes'] / 1024 ** 2:.1f} MiB), errors={r['errors']}, "
+              f"plan {r['plan_ms']:.0f} ms, delete {r['delete_ms']:.0f} ms")
+
+    print(f"Cleanup {ret.root}: max_age={ret.max_age / 86400:g}d, max_size={ret.max_bytes / 1024 ** 3:g}GB"
+          + (f", every {interval:g}s" if interval > 0 else ""))
+    if interval > 0:
+        ret.serve(interval,dry_run=dry_run,on_result=report)
+    else:
+        report(ret.run(dry_run=dry_run))
 
 
 def main(): app()
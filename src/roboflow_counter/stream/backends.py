@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compute-Backends für die Motion-Highlight-Pipeline
+- CudaBackend: OpenCV CUDA (GpuMat), Verhalten wie bisher in highlight.py
+- CpuBackend:  cv2/NumPy auf dem Host, gleiche Stufen, für Rechner ohne GPU
+- Auswahl über HL_BACKEND (auto|cuda|cpu), auto = CUDA falls Device vorhanden
+
+Ablauf je Frame (beide Backends):
+  upload → gray → gauss → motion (absdiff/EMA/threshold) → morph → [region] → composite → download
+
+Analyse-Auflösung (HL_SCALE / highlight.analysis_scale, 0 < s <= 1, gerundet auf 1/n):
+  gray → [resize INTER_AREA um Faktor n] → gauss/motion/morph/region klein → Maske nur fürs
+  Composite zurück auf w x h (INTER_LINEAR + Threshold). Gauss-Kernel und Region-Größen werden
+  mitskaliert; mask() liefert die Maske in Analyse-Auflösung (w//n x h//n).
+  Ganzzahlige Faktoren, weil INTER_AREA sonst den allgemeinen (~10x langsameren) Pfad nimmt;
+  auf der CPU wird dafür auf ein Vielfaches von n zugeschnitten (Rest am Rand bleibt ohne Maske).
+
+ROI (stream/roi.py): alle Motion-Stufen laufen nur im Fenster = Bounding Box der ROI-Polygone
+(Slices/Views, keine Kopien), Masken-Pixel außerhalb der Polygone fallen nach dem Threshold weg.
+Das Composite arbeitet ebenfalls nur im Fenster; außerhalb wird abgedunkelt oder durchgereicht.
+
+Stufen-Timing: mit Backend.metrics (stream/metrics.py) wird jede Stufe einzeln gemessen
+(upload, gray, gauss, ema, threshold, morph, region, composite, download).
+
+Puffer: alle Device-/Host-Puffer werden einmal pro Auflösung angelegt und über
+dst=/In-place-Operationen wiederverwendet. `Backend.allocs` zählt jede Allokation
+(auch versteckte Reallokationen durch cv2), im Steady-State bleibt der Wert konstant.
+"""
+
+from __future__ import annotations
+import os
+import time
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+
+
+BACKENDS = ("auto", "cuda", "cpu")
+
+
+# ---------------- Utilities ----------------
+
+def cuda_available() -> bool:
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except Exception:
+        return False
+
+
+def gauss_params(scale: float = 1.0, ksize: int | None = None, sigma: float | None = None) -> tuple[int, float]:
+    """Kernelgröße (ungerade, 3..31) und Sigma (None → HL_GAUSS / HL_SIGMA), auf `scale` umgerechnet."""
+    k = int(os.environ.get("HL_GAUSS", "7")) if ksize is None else int(ksize)
+    k = max(3, min(31, k))
+    k = k if (k % 2) else k + 1
+    sigma = float(os.environ.get("HL_SIGMA", "0")) if sigma is None else float(sigma)
+    if scale < 1.0:
+        # gleiche Glättung bezogen aufs Eingangsbild: Kernel und Sigma mitskalieren
+        k = max(3, int(round(k * scale)))
+        k = k if (k % 2) else k + 1
+        sigma *= scale
+    if sigma <= 0:
+        sigma = max(0.1, (k - 1) / 6.0)
+    return k, sigma
+
+
+def analysis_scale(scale: float | None = None) -> float:
+    """Analyse-Skalierung aus HL_SCALE (Default 1.0 = volle Auflösung), gerundet auf 1/n (n = 1..20)."""
+    if scale is None:
+        scale = float(os.environ.get("HL_SCALE", "1.0"))
+    scale = max(0.05, min(1.0, float(scale)))
+    return 1.0 / round(1.0 / scale)
+
+
+def set_cuda_defaults():
+    os.environ.setdefault("CUDA_LAUNCH_BLOCKING", "0")
+
+
+# --------------- CUDA helpers ----------------
+
+def bgr_to_gray_cuda(d_bgr):
+    """Robuster BGR->GRAY ohne cv2.cuda.cvtColor (dein Build zickt dort)."""
+    b, g, r = cv2.cuda.split(d_bgr)
+    tmp = cv2.cuda.addWeighted(b, 0.114, g, 0.587, 0.0)
+    gray = cv2.cuda.addWeighted(tmp, 1.0, r, 0.299, 0.0)
+    return gray  # 8UC1
+
+
+def gray_to_bgr_safe(d_gray, dst=None):
+    """1ch->3ch: versuche CUDA-merge, sonst CPU-merge + Upload."""
+    if d_gray.empty():
+        raise RuntimeError("gray_to_bgr_safe: empty input")
+
+    try:
+        if dst is not None:
+            cv2.cuda.merge([d_gray, d_gray, d_gray], dst)
+            return dst
+        merged = cv2.cuda.merge([d_gray, d_gray, d_gray])
+        if hasattr(merged, "download"):
+            return merged
+    except Exception:
+        pass
+
+    cpu = d_gray.download()
+    cpu3 = cv2.merge([cpu, cpu, cpu])
+    out = dst if dst is not None else cv2.cuda_GpuMat()
+    out.upload(cpu3)
+    return out
+
+
+def resize_like(src, ref):
+    if src.size() == ref.size():
+        return src
+    w, h = ref.size()
+    out = cv2.cuda_GpuMat()
+    cv2.cuda.resize(src, (w, h), dst=out)
+    return out
+
+
+def make_gauss(scale: float = 1.0, ksize: int | None = None, sigma: float | None = None):
+    k, sigma = gauss_params(scale, ksize, sigma)
+    f = cv2.cuda.createGaussianFilter(cv2.CV_8UC1, cv2.CV_8UC1, (k, k), sigma)
+    print(f"[INFO] Gaussian k={k} sigma={sigma}")
+    return f
+
+
+# ---------------- Backends ----------------
+
+class Backend(ABC):
+    """
+    Gemeinsame Schnittstelle. Ein Backend hält den Zustand eines Streams
+    (aktuelles Bild, Blur, EMA-Hintergrund, Maske) für eine Auflösung w x h.
+    Alle Stufen sind abstrakt: ein Backend, dem eine fehlt, scheitert schon beim Anlegen (TypeError).
+    """
+
+    name = "base"
+    default_encoder = "libx264"
+
+    def __init__(self, w: int, h: int, scale: float = 1.0, roi=None):
+        self.w = w
+        self.h = h
+        self.scale = analysis_scale(scale)
+        self.roi = roi if roi is not None and roi.enabled else None
+        self.roi_pass = self.roi is not None and self.roi.outside == "pass"
+        self._window()
+        self.allocs = 0  # Anzahl Puffer-Allokationen (Device + Host)
+        self.region_filter = None
+        self.metrics = None  # optional stream.metrics.Metrics → Stufen-Timer
+
+    # --- Puffer ---
+
+    def _host(self, shape, dtype=np.uint8) -> np.ndarray:
+        self.allocs += 1
+        return np.empty(shape, dtype)
+
+    def _reuse(self, out, buf):
+        """cv2 gibt bei passendem dst= dasselbe Objekt zurück; alles andere ist eine Allokation."""
+        if out is not buf:
+            self.allocs += 1
+        return out
+
+    @property
+    def factor(self) -> int:
+        """Ganzzahliger Verkleinerungsfaktor n (scale = 1/n)."""
+        return int(round(1.0 / self.scale))
+
+    def _window(self):
+        """Analysefenster: ROI-Bounding-Box (sonst ganzes Bild), auf ein Vielfaches von n zugeschnitten."""
+        n = self.factor
+        x, y, bw, bh = self.roi.rect(self.w, self.h) if self.roi is not None else (0, 0, self.w, self.h)
+        self.aw, self.ah = bw // n, bh // n
+        if self.aw < 1 or self.ah < 1:
+            raise ValueError(f"analysis window {bw}x{bh} too small for scale 1/{n}")
+        self.x0, self.y0 = x, y
+        self.cw, self.ch = self.aw * n, self.ah * n  # Fenstergröße in Eingangspixeln
+        self._crop = (slice(y, y + self.ch), slice(x, x + self.cw))
+
+    @property
+    def scaled(self) -> bool:
+        return self.factor > 1
+
+    @property
+    def windowed(self) -> bool:
+        """Analyse nicht auf dem vollen Bild (ROI oder Zuschnitt auf Vielfaches von n)."""
+        return (self.cw, self.ch) != (self.w, self.h)
+
+    def _roi_mask(self):
+        """ROI-Maske in Analyse-Auflösung (Fensterkoordinaten); None, wenn das Fenster voll abgedeckt ist."""
+        if self.roi is None:
+            return None
+        m = self.roi.mask((self.aw, self.ah), (self.x0, self.y0), self.scale)
+        return None if cv2.countNonZero(m) == m.size else m
+
+    @abstractmethod
+    def _allocate(self):
+        """Alle Puffer für (self.w, self.h) bzw. Analyse-Auflösung (self.aw, self.ah) anlegen."""
+        raise NotImplementedError
+
+    def _ensure_size(self, frame: np.ndarray) -> bool:
+        """Neue Auflösung → Puffer neu anlegen. True, wenn neu allokiert wurde."""
+        h, w = frame.shape[:2]
+        if (w, h) == (self.w, self.h):
+            return False
+        print(f"[INFO] Backend {self.name}: Auflösung {self.w}x{self.h} → {w}x{h}, Puffer neu")
+        self.w, self.h = w, h
+        self._window()
+        self._allocate()
+        return True
+
+    # --- Stufen ---
+
+    @abstractmethod
+    def reset(self, frame: np.ndarray):
+        """EMA-Hintergrund mit dem ersten Frame initialisieren."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def upload(self, frame: np.ndarray):
+        raise NotImplementedError
+
+    @abstractmethod
+    def gray(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def gauss(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_ema(self, alpha: float):
+        """diff = absdiff(blur, ema), danach EMA-Update (8-bit, in-place)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def threshold(self, thr: int):
+        """diff → Binärmaske (0/255), ROI-Polygone angewendet."""
+        raise NotImplementedError
+
+    def motion(self, alpha: float, thr: int):
+        self.update_ema(alpha)
+        self.threshold(thr)
+
+    @abstractmethod
+    def morph(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_gauss(self, ksize: int, sigma: float = 0.0) -> bool:
+        """Gauss-Filter für neue Parameter (Eingangspixel) neu aufbauen; False, wenn sich nichts ändert."""
+        raise NotImplementedError
+
+    def set_region_filter(self, rf):
+        """Region-/Growth-Stufe (stream/region.py) nach morph aktivieren; None = aus."""
+        if rf is not None:
+            if self.scaled:
+                rf = rf.scaled(self.scale)
+            rf._alloc = self._host  # Puffer laufen über den Allokationszähler
+            if not rf.enabled:
+                rf = None
+        self.region_filter = rf
+
+    @abstractmethod
+    def region(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def mask(self) -> np.ndarray:
+        """
+        Bereinigte Bewegungsmaske (uint8 0/255, ah x aw) auf dem Host, z.B. für die Zählstufe.
+        Koordinaten: (x - x0) * scale, (y - y0) * scale bezogen aufs Eingangsbild.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def composite(self, gain: float, darken: float, out: np.ndarray | None = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def download(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Ausgabebild als zusammenhängendes BGR-uint8-Array (h, w, 3), in `out` falls angegeben.
+        Ohne `out` gehört der Puffer dem Backend und wird beim nächsten Frame überschrieben.
+        """
+        raise NotImplementedError
+
+    def host_buffer(self) -> np.ndarray:
+        """Host-Puffer (h, w, 3) für download(out=...), z.B. für den Pool der Writer-Stufe."""
+        return self._host((self.h, self.w, 3))
+
+    def analyze(self, frame: np.ndarray, alpha: float, thr: int):
+        """Motion-Pfad: upload → gray (+ Downscale) → gauss → motion → morph (Maske liegt danach im Backend)."""
+        if self._ensure_size(frame):
+            self.reset(frame)
+        m = self.metrics
+        if m is None:
+            self.upload(frame)
+            self.gray()
+            self.gauss()
+            self.motion(alpha, thr)
+            self.morph()
+            if self.region_filter is not None:
+                self.region()
+            return
+        t = time.perf_counter()
+        self.upload(frame)
+        t = m.lap("upload", t)
+        self.gray()
+        t = m.lap("gray", t)
+        self.gauss()
+        t = m.lap("gauss", t)
+        self.update_ema(alpha)
+        t = m.lap("ema", t)
+        self.threshold(thr)
+        t = m.lap("threshold", t)
+        self.morph()
+        t = m.lap("morph", t)
+        if self.region_filter is not None:
+            self.region()
+            m.lap("region", t)
+
+    def render(self, gain: float, darken: float, out: np.ndarray | None = None) -> np.ndarray:
+        m = self.metrics
+        if m is None:
+            self.composite(gain, darken, out)
+            return self.download(out)
+        t = time.perf_counter()
+        self.composite(gain, darken, out)
+        t = m.lap("composite", t)
+        res = self.download(out)
+        m.lap("download", t)
+        return res
+
+    def process(self, frame: np.ndarray, alpha: float, thr: int, gain: float, darken: float,
+                out: np.ndarray | None = None) -> np.ndarray:
+        self.analyze(frame, alpha, thr)
+        return self.render(gain, darken, out)
+
+
+class CudaBackend(Backend):
+    name = "cuda"
+    default_encoder = "h264_nvenc"
+
+    def __init__(self, w: int, h: int, scale: float = 1.0, roi=None):
+        super().__init__(w, h, scale, roi)
+        set_cuda_defaults()
+        if not cuda_available():
+            raise RuntimeError("CUDA GPU not available")
+        cv2.cuda.setDevice(0)
+        self.stream = cv2.cuda.Stream()
+        self.ksize, self.sigma = gauss_params(self.scale)
+        self._gauss = make_gauss(self.scale)
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        self._morph = cv2.cuda.createMorphologyFilter(cv2.MORPH_OPEN, cv2.CV_8UC1, kernel)
+        self._allocate()
+
+    def _gpu(self, typ, size=None):
+        """GpuMat (h, w) anlegen; size=(w, h) für Fenster-/Analysepuffer."""
+        self.allocs += 1
+        w, h = size or (self.w, self.h)
+        m = cv2.cuda_GpuMat()
+        m.create(h, w, typ)
+        return m
+
+    def _allocate(self):
+        c1, c3 = cv2.CV_8UC1, cv2.CV_8UC3
+        win, small = (self.cw, self.ch), (self.aw, self.ah)
+        rect = (self.x0, self.y0, self.cw, self.ch)
+        self.gpu_bgr = self._gpu(c3)
+        # Fenster als ROI-Header auf den Vollbild-Puffern (keine Kopie)
+        self.gpu_bgr_win = cv2.cuda_GpuMat(self.gpu_bgr, rect) if self.windowed else self.gpu_bgr
+        self.planes = [self._gpu(c1, win), self._gpu(c1, win), self._gpu(c1, win)]
+        self.gpu_gray = self._gpu(c1, win)
+        # Analyse-Auflösung (bei scale 1 identisch mit gpu_gray / d_mask_clean)
+        self.gpu_small = self._gpu(c1, small) if self.scaled else self.gpu_gray
+        self.gpu_blur = self._gpu(c1, small)
+        self.d_ema = self._gpu(c1, small)
+        self.d_diff = self._gpu(c1, small)
+        self.gpu_mask = self._gpu(c1, small)
+        self.d_mask_clean = self._gpu(c1, small)
+        roi = self._roi_mask()
+        self.d_roi = None
+        if roi is not None:
+            self.d_roi = self._gpu(c1, small)
+            self.d_roi.upload(roi)
+        if self.scaled or self.windowed:
+            self.d_mask_full = self._gpu(c1)
+            self.d_mask_full.setTo((0, 0, 0, 0))
+            self.d_mask_win = cv2.cuda_GpuMat(self.d_mask_full, rect) if self.windowed else self.d_mask_full
+        else:
+            self.d_mask_full = self.d_mask_win = self.d_mask_clean
+        # outside: pass → Bereich außerhalb der Polygone (Vollbild) wird nicht abgedunkelt
+        self.d_inside = self.d_outside3 = None
+        if self.roi_pass:
+            inside = self.roi.mask((self.w, self.h))
+            self.d_inside = self._gpu(c1)
+            self.d_inside.upload(inside)
+            self.d_outside3 = self._gpu(c3)
+            self.d_outside3.upload(cv2.merge([255 - inside] * 3))
+        self.inv_mask = self._gpu(c1)
+        self.gpu_mask3 = self._gpu(c3)
+        self.inv_mask3 = self._gpu(c3)
+        self.highlighted = self._gpu(c3)
+        self.bg_dark = self._gpu(c3)
+        self.gpu_out = self._gpu(c3)
+        self.host_out = self.host_buffer()
+        self.host_mask = None  # nur mit Region-/Zählstufe
+        self.host_gray = None
+
+    def reset(self, frame):
+        self._ensure_size(frame)
+        self.upload(frame)
+        self.gray()
+        self.gauss()
+        self.gpu_blur.copyTo(self.d_ema)
+
+    def upload(self, frame):
+        self.gpu_bgr.upload(frame)
+
+    def gray(self):
+        # Robuster BGR->GRAY ohne cv2.cuda.cvtColor, wie bgr_to_gray_cuda
+        b, g, r = self.planes
+        cv2.cuda.split(self.gpu_bgr_win, self.planes)
+        cv2.cuda.addWeighted(b, 0.114, g, 0.587, 0.0, dst=self.gpu_gray)
+        cv2.cuda.addWeighted(self.gpu_gray, 1.0, r, 0.299, 0.0, dst=self.gpu_gray)
+        if self.scaled:
+            cv2.cuda.resize(self.gpu_gray, (self.aw, self.ah), dst=self.gpu_small,
+                            interpolation=cv2.INTER_AREA)
+
+    def set_gauss(self, ksize, sigma=0.0):
+        k, sg = gauss_params(self.scale, ksize, sigma)
+        if (k, sg) == (self.ksize, self.sigma):
+            return False
+        self._gauss = make_gauss(self.scale, ksize, sigma)
+        self.ksize, self.sigma = k, sg
+        return True
+
+    def gauss(self):
+        self._gauss.apply(self.gpu_small, self.gpu_blur)
+
+    def update_ema(self, alpha):
+        cv2.cuda.absdiff(self.gpu_blur, self.d_ema, dst=self.d_diff)
+        cv2.cuda.addWeighted(self.d_ema, 1 - alpha, self.gpu_blur, alpha, 0, dst=self.d_ema)
+
+    def threshold(self, thr):
+        cv2.cuda.threshold(self.d_diff, thr, 255, cv2.THRESH_BINARY, dst=self.gpu_mask)
+        if self.d_roi is not None:
+            cv2.cuda.bitwise_and(self.gpu_mask, self.d_roi, dst=self.gpu_mask)
+
+    def morph(self):
+        self._morph.apply(self.gpu_mask, self.d_mask_clean)
+
+    def mask(self):
+        if self.host_mask is None:
+            self.host_mask = self._host((self.ah, self.aw))
+        self.d_mask_clean.download(self.host_mask)
+        return self.host_mask
+
+    def region(self):
+        # Connected Components gibt es nur auf dem Host: Maske + Graubild holen, filtern, zurück
+        if self.host_gray is None:
+            self.host_gray = self._host((self.ah, self.aw))
+        self.mask()
+        self.gpu_small.download(self.host_gray)
+        self.region_filter.apply(self.host_mask, self.host_gray)
+        self.d_mask_clean.upload(self.host_mask)
+
+    def upscale_mask(self):
+        """Maske auf Ausgabe-Auflösung (nur fürs Composite); glatte Kanten über LINEAR + Threshold."""
+        if self.scaled:
+            cv2.cuda.resize(self.d_mask_clean, (self.cw, self.ch), dst=self.d_mask_win,
+                            interpolation=cv2.INTER_LINEAR)
+            cv2.cuda.threshold(self.d_mask_win, 127, 255, cv2.THRESH_BINARY, dst=self.d_mask_win)
+        elif self.windowed:
+            self.d_mask_clean.copyTo(self.d_mask_win)
+        return self.d_mask_full
+
+    def composite(self, gain, darken, out=None):
+        gpu_bgr = self.gpu_bgr
+        d_mask = self.upscale_mask()
+        # 3-Kanal Maske (0/255) für die bewegten Bereiche
+        gpu_mask3 = gray_to_bgr_safe(d_mask, self.gpu_mask3)
+
+        # 1) Bewegte Bereiche highlighten (altes Verhalten)
+        cv2.cuda.addWeighted(gpu_bgr, 1.0, gpu_mask3, gain, 0.0, dst=self.highlighted)
+
+        # 2) Statische Hintergrund-Abdunklung nur dort, wo KEINE Bewegung ist
+        if darken > 0.0:
+            cv2.cuda.bitwise_not(d_mask, dst=self.inv_mask)   # 255 für Hintergrund
+            if self.d_inside is not None:
+                cv2.cuda.bitwise_and(self.inv_mask, self.d_inside, dst=self.inv_mask)
+            inv_mask3 = gray_to_bgr_safe(self.inv_mask, self.inv_mask3)
+
+            # Hintergrund-Version: Original dunkler skaliert
+            cv2.cuda.addWeighted(gpu_bgr, (1.0 - darken), gpu_bgr, 0.0, 0.0, dst=self.bg_dark)
+
+            # Ausmaskieren und zusammensetzen
+            cv2.cuda.bitwise_and(self.bg_dark,     inv_mask3, dst=self.bg_dark)      # nur Hintergrund
+            cv2.cuda.bitwise_and(self.highlighted, gpu_mask3, dst=self.highlighted)  # nur Bewegung
+            cv2.cuda.add(self.bg_dark, self.highlighted, dst=self.gpu_out)
+            if self.d_outside3 is not None:
+                # außerhalb der ROI: Original durchreichen
+                cv2.cuda.bitwise_and(gpu_bgr, self.d_outside3, dst=self.bg_dark)
+                cv2.cuda.add(self.gpu_out, self.bg_dark, dst=self.gpu_out)
+        else:
+            self.highlighted.copyTo(self.gpu_out)
+
+    def download(self, out=None):
+        out = self.host_out if out is None else out
+        self.gpu_out.download(out)
+        return out
+
+
+class CpuBackend(Backend):
+    """
+    Host-Variante mit cv2/NumPy, gleiche Semantik wie CudaBackend:
+    Graustufen mit festen BT.601-Gewichten, 8-bit EMA, Binär-Threshold,
+    3x3 MORPH_OPEN und additive Hervorhebung (gain * 255) auf der Maske.
+    """
+
+    name = "cpu"
+
+    def __init__(self, w: int, h: int, scale: float = 1.0, roi=None):
+        super().__init__(w, h, scale, roi)
+        self.ksize, self.sigma = gauss_params(self.scale)
+        print(f"[INFO] Gaussian k={self.ksize} sigma={self.sigma}")
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        self.bgr = None
+        self._allocate()
+
+    def _allocate(self):
+        h, w = self.h, self.w
+        ah, aw = self.ah, self.aw
+        ch, cw = self.ch, self.cw
+        sc = self.scaled
+        # Fenster (ROI-Box / Vielfaches von n) wird über Views auf das Eingangsbild gelesen
+        self.gray_full = self._host((ch, cw)) if sc else None
+        self.gray_img = self._host((ah, aw))
+        self.blur = self._host((ah, aw))
+        self.ema = self._host((ah, aw))
+        self.diff = self._host((ah, aw))
+        self.raw_mask = self._host((ah, aw))
+        self.mask_clean = self._host((ah, aw))
+        self.mask_up = self._host((ch, cw)) if sc else None  # Maske in Fenstergröße fürs Composite
+        self.roi_mask = self._roi_mask()
+        # outside: pass → Fensterpixel außerhalb der Polygone nach dem Abdunkeln zurückkopieren
+        self.roi_keep = None
+        if self.roi_pass:
+            inside = self.roi.mask((cw, ch), (self.x0, self.y0))
+            if cv2.countNonZero(inside) < inside.size:
+                self.roi_keep = cv2.bitwise_not(inside)
+        self.out = self._host((h, w, 3))
+
+    def reset(self, frame):
+        self._ensure_size(frame)
+        self.upload(frame)
+        self.gray()
+        self.gauss()
+        np.copyto(self.ema, self.blur)
+
+    def upload(self, frame):
+        # kein Upload nötig: Frame wird nur gelesen, Ausgabe landet in self.out
+        self.bgr = frame
+
+    def gray(self):
+        win = self.bgr[self._crop]
+        if self.gray_full is None:
+            self.gray_img = self._reuse(cv2.cvtColor(win, cv2.COLOR_BGR2GRAY, dst=self.gray_img), self.gray_img)
+            return
+        self.gray_full = self._reuse(cv2.cvtColor(win, cv2.COLOR_BGR2GRAY, dst=self.gray_full), self.gray_full)
+        self.gray_img = self._reuse(cv2.resize(self.gray_full, (self.aw, self.ah), dst=self.gray_img,
+                                               interpolation=cv2.INTER_AREA), self.gray_img)
+
+    def set_gauss(self, ksize, sigma=0.0):
+        k, sg = gauss_params(self.scale, ksize, sigma)
+        if (k, sg) == (self.ksize, self.sigma):
+            return False
+        self.ksize, self.sigma = k, sg
+        print(f"[INFO] Gaussian k={self.ksize} sigma={self.sigma}")
+        return True
+
+    def gauss(self):
+        k = self.ksize
+        self.blur = self._reuse(cv2.GaussianBlur(self.gray_img, (k, k), self.sigma, dst=self.blur), self.blur)
+
+    def update_ema(self, alpha):
+        self.diff = self._reuse(cv2.absdiff(self.blur, self.ema, dst=self.diff), self.diff)
+        self.ema = self._reuse(cv2.addWeighted(self.ema, 1 - alpha, self.blur, alpha, 0, dst=self.ema), self.ema)
+
+    def threshold(self, thr):
+        _, m = cv2.threshold(self.diff, thr, 255, cv2.THRESH_BINARY, dst=self.raw_mask)
+        self.raw_mask = self._reuse(m, self.raw_mask)
+        if self.roi_mask is not None:
+            cv2.bitwise_and(self.raw_mask, self.roi_mask, dst=self.raw_mask)
+
+    def morph(self):
+        self.mask_clean = self._reuse(
+            cv2.morphologyEx(self.raw_mask, cv2.MORPH_OPEN, self.kernel, dst=self.mask_clean), self.mask_clean)
+
+    def region(self):
+        self.region_filter.apply(self.mask_clean, self.gray_img)
+
+    def mask(self):
+        return self.mask_clean
+
+    def upscale_mask(self) -> np.ndarray:
+        """Maske in Fenstergröße (ch x cw, nur fürs Composite); glatte Kanten über LINEAR + Threshold."""
+        if self.mask_up is None:
+            return self.mask_clean
+        m = self.mask_up
+        self._reuse(cv2.resize(self.mask_clean, (self.cw, self.ch), dst=m, interpolation=cv2.INTER_LINEAR), m)
+        self._reuse(cv2.threshold(m, 127, 255, cv2.THRESH_BINARY, dst=m)[1], m)
+        return m
+
+    def composite(self, gain, darken, out=None):
+        # direkt in den Zielpuffer rendern (z.B. Writer-Pool), sonst in self.out
+        bgr = self.bgr
+        dst = self.out if out is None else out
+        crop = self._crop
+        if darken > 0.0 and self.roi_pass:
+            # nur die ROI abdunkeln, Rest unverändert
+            np.copyto(dst, bgr)
+            v = dst[crop]
+            self._reuse(cv2.convertScaleAbs(bgr[crop], dst=v, alpha=(1.0 - darken)), v)
+            if self.roi_keep is not None:
+                self._reuse(cv2.copyTo(bgr[crop], self.roi_keep, v), v)
+        elif darken > 0.0:
+            self._reuse(cv2.convertScaleAbs(bgr, dst=dst, alpha=(1.0 - darken)), dst)
+        else:
+            np.copyto(dst, bgr)
+        # Bewegung: Original + gain*255 (sättigend), wie addWeighted(bgr, 1, mask3, gain); nur im Fenster
+        add = 255.0 * gain
+        v = dst[crop]
+        self._reuse(cv2.add(bgr[crop], (add, add, add, 0.0), dst=v, mask=self.upscale_mask()), v)
+        self._last = dst
+
+    def download(self, out=None):
+        # wie CudaBackend: `out` wird gefüllt; nach composite(out) ist es schon das Ergebnis (keine Kopie)
+        if out is None or out is self._last:
+            return self._last
+        np.copyto(out, self._last)
+        return out
+
+
+def create_backend(name: str | None, w: int, h: int, scale: float | None = None, roi=None) -> Backend:
+    """
+    Backend nach Name (auto|cuda|cpu) erzeugen; None → HL_BACKEND, scale None → HL_SCALE.
+    roi: optionale stream.roi.Roi (Motion-Stufen nur im ROI-Fenster).
+    """
+    name = (name or os.environ.get("HL_BACKEND", "auto")).lower().strip()
+    if name not in BACKENDS:
+        raise ValueError(f"unknown backend '{name}' (expected one of {', '.join(BACKENDS)})")
+    if name == "auto":
+        name = "cuda" if cuda_available() else "cpu"
+    scale = analysis_scale(scale)
+    if name == "cuda":
+        return CudaBackend(w, h, scale, roi)
+    return CpuBackend(w, h, scale, roi)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline-Batch: aufgezeichnete Videodateien so schnell wie möglich neu verarbeiten
+(z.B. um motion.threshold / ema_alpha nachzujustieren oder neu zu zählen)
+- gleiche Pipeline wie run_highlight_loop (Backend, ROI, Region-Filter, Zählstufe),
+  aber ohne RTSP: kein -re, kein Reconnect, Ende der Datei = Ende des Segments
+- lange Dateien werden in Segmente geteilt und in einem Prozess-Pool ("spawn") verarbeitet
+- jedes Segment startet `warmup` Frames früher: EMA-Hintergrund und Tracker laufen dort ein,
+  ausgegeben und gezählt wird erst ab dem eigentlichen Segmentbeginn
+  (Default: 3 / ema_alpha Frames ≈ 95 % Konvergenz des EMA)
+- Ausgabe: Video (Segmente mit ffmpeg, danach verlustfrei per concat zusammengefügt)
+  und/oder Statistik pro Frame als CSV (Bewegungspixel, Blobs, Tracks, Zählereignisse)
+
+Zeitbasis der Zählung ist die Videozeit (Frame / fps), nicht die Uhrzeit.
+"""
+
+from __future__ import annotations
+import csv
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+
+from .backends import create_backend
+from .region import region_from_env
+from .roi import roi_from_env
+from .writer import FfmpegWriter
+from ..tracker.blobs import extract_blobs
+from ..tracker.counting import CountingEngine
+from ..util.logging import setup_logger
+
+# Segment mindestens so viele Warm-up-Längen lang, sonst lohnt die Aufteilung nicht
+MIN_SEGMENT_WARMUPS = 4
+STATS_COLUMNS = ["frame", "time_s", "motion_px", "motion_frac", "blobs", "tracks"]
+
+
+def probe(path: str) -> Dict[str, Any]:
+    """Frames, fps und Größe einer Videodatei (frames = 0, falls der Container es nicht weiß)."""
+    cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG)
+    if not cap.isOpened():
+        raise RuntimeError(f"cannot open input {path}")
+    try:
+        return {
+            "frames": max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)),
+            "fps": float(cap.get(cv2.CAP_PROP_FPS) or 0.0),
+            "w": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "h": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        }
+    finally:
+        cap.release()
+
+
+def warmup_frames(alpha: float, fps: float, warmup_sec: Optional[float] = None) -> int:
+    """Warm-up in Frames: explizit (Sekunden) oder 3 / alpha (EMA hat dann ~95 % des Sprungs erreicht)."""
+    if warmup_sec is not None:
+        return max(0, int(round(warmup_sec * fps)))
+    return int(math.ceil(3.0 / max(1e-4, alpha)))
+
+
+def plan_segments(n: int, parts: int, warmup: int) -> List[Tuple[int, int, Optional[int]]]:
+    """
+    [(warm_start, start, end)] für n Frames in `parts` Segmenten; end None = bis Dateiende.
+    Segmente kürzer als MIN_SEGMENT_WARMUPS * warmup werden zusammengelegt.
+    """
+    if n <= 0 or parts <= 1:
+        return [(0, 0, None)]
+    parts = max(1, min(parts, n // max(1, MIN_SEGMENT_WARMUPS * warmup)))
+    bounds = [round(i * n / parts) for i in range(parts + 1)]
+    segs = [(max(0, s - warmup), s, e) for s, e in zip(bounds[:-1], bounds[1:])]
+    w0, s0, _ = segs[-1]
+    segs[-1] = (w0, s0, None)  # Frame-Anzahl aus dem Container ist nicht immer exakt
+    return segs
+
+
+def _ffmpeg_file_cmd(w: int, h: int, fps: float, path: str, loglevel: str, encoder: str) -> list[str]:
+    """Rohframes → Datei, ohne -re (so schnell wie der Encoder kann)."""
+    base = [
+        "ffmpeg", "-y", "-loglevel", loglevel,
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{w}x{h}", "-r", f"{max(1.0, fps):.3f}",
+        "-i", "pipe:0",
+        "-vf", "format=yuv420p",
+    ]
+    if encoder == "h264_nvenc":
+        base += ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "23", "-bf", "0"]
+    else:
+        base += ["-c:v", "libx264", "-preset", "veryfast", "-crf", "20"]
+    return base + [path]
+
+
+def _concat(parts: List[str], out: str, loglevel: str):
+    """Segmentdateien ohne Neukodierung aneinanderhängen (ffmpeg concat demuxer)."""
+    lst = Path(out).with_name(Path(out).name + ".concat.txt")
+    lst.write_text("".join(f"file '{Path(p).resolve()}'\n" for p in parts))
+    try:
+        subprocess.run(["ffmpeg", "-y", "-loglevel", loglevel, "-f", "concat", "-safe", "0",
+                        "-i", str(lst), "-c", "copy", out], check=True, stdin=subprocess.DEVNULL)
+    finally:
+        lst.unlink(missing_ok=True)
+
+
+# ---------------- Worker ----------------
+
+def _init_worker(threads: int):
+    cv2.setNumThreads(max(1, threads))
+
+
+def process_segment(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ein Segment verarbeiten (läuft im Pool-Prozess; Einstellungen kommen über HL_* aus der Umgebung).
+    job: index, path, warm, start, end, fps, backend, counting, out (Segmentdatei oder None), stats (bool)
+    """
+    warm, start, end = job["warm"], job["start"], job["end"]
+    fps = job["fps"] or 25.0
+    log = job.get("log", "INFO")
+    cap = cv2.VideoCapture(job["path"], cv2.CAP_FFMPEG)
+    if not cap.isOpened():
+        raise RuntimeError(f"cannot open input {job['path']}")
+    if warm > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, float(warm))
+    ok, frame = cap.read()
+    if not ok or frame is None:
+        cap.release()
+        return {"index": job["index"], "start": start, "frames": 0, "warm_frames": 0,
+                "seconds": 0.0, "rows": [], "names": [], "counts": {}, "out": None}
+    h, w = frame.shape[:2]
+
+    be = create_backend(job["backend"], w, h, roi=roi_from_env())
+    be.set_region_filter(region_from_env())
+    counting = job.get("counting") or {}
+    counter = CountingEngine(counting, scale=be.scale, offset=(be.x0, be.y0)) if counting.get("enabled") else None
+    names = [n for n, _ in counter.lines] + [n for n, _ in counter.zones] if counter is not None else []
+    alpha = float(os.environ.get("HL_EMA_ALPHA", "0.05"))
+    thr = int(float(os.environ.get("HL_THRESH", "12")))
+    gain = float(os.environ.get("HL_GAIN", "0.70"))
+    darken = max(0.0, min(0.95, float(os.environ.get("HL_DARKEN", "0.0"))))
+    px_scale = 1.0 / (be.scale * be.scale)
+    area = float(be.aw * be.ah)
+    be.reset(frame)
+
+    writer = None
+    if job.get("out"):
+        encoder = os.environ.get("HL_ENCODER") or be.default_encoder
+        writer = FfmpegWriter(_ffmpeg_file_cmd(w, h, fps, job["out"], ("info" if log == "DEBUG" else "warning"),
+                                               encoder), w, h, policy="block", depth=4, alloc=be.host_buffer,
+                              log_level=log)
+        writer.start()
+
+    def totals():
+        return {n: (counter.counter.total[n]["in"], counter.counter.total[n]["out"]) for n in names}
+
+    rows: list = []
+    base = prev = {n: (0, 0) for n in names}
+    i, frames = warm, 0
+    t0 = time.perf_counter()
+    try:
+        while end is None or i < end:
+            if i > warm:
+                ok, frame = cap.read(frame)
+                if not ok or frame is None:
+                    break
+            live = i >= start
+            if i == start and counter is not None:
+                # Ereignisse im Warm-up gehören zum vorherigen Segment
+                base = prev = totals()
+            be.analyze(frame, alpha, thr)
+            if counter is not None or (live and job.get("stats")):
+                mask = be.mask()
+            if counter is not None:
+                counter.update(mask, now=i / fps)
+            if live:
+                if writer is not None:
+                    writer.submit(be.render(gain, darken, out=writer.acquire()))
+                if job.get("stats"):
+                    px = cv2.countNonZero(mask)
+                    if counter is not None:
+                        blobs = counter.blobs
+                    else:
+                        blobs = len(extract_blobs(mask)[1]) if px else 0
+                    row = [i, round(i / fps, 3), int(round(px * px_scale)), round(px / area, 6), blobs,
+                           counter.tracks if counter is not None else 0]
+                    if names:
+                        cur = totals()
+                        for n in names:
+                            row += [cur[n][0] - prev[n][0], cur[n][1] - prev[n][1]]
+                        prev = cur
+                    rows.append(row)
+                frames += 1
+            i += 1
+    finally:
+        cap.release()
+        if writer is not None:
+            writer.close(timeout=30.0, finish=True)
+    cur = totals() if frames else base
+    counts = {n: {"in": cur[n][0] - base[n][0], "out": cur[n][1] - base[n][1]} for n in names}
+    return {"index": job["index"], "start": start, "frames": frames, "warm_frames": min(start, i) - warm,
+            "seconds": time.perf_counter() - t0, "rows": rows, "names": names, "counts": counts,
+            "out": job.get("out") if writer is not None and frames else None}
+
+
+# ---------------- Steuerung ----------------
+
+def run_batch(path: str, out: Optional[str] = None, stats: Optional[str] = None, jobs: int = 0,
+              segment_sec: float = 0.0, warmup_sec: Optional[float] = None, backend: Optional[str] = None,
+              counting: Optional[Dict[str, Any]] = None, log: str = "INFO") -> Dict[str, Any]:
+    """
+    Datei `path` verarbeiten → Video `out` und/oder CSV `stats`.
+    jobs: Pool-Größe (0 = alle erlaubten CPUs); segment_sec: Segmentlänge (0 = eine pro Job).
+    Einstellungen (Backend, Gauss, Motion, ROI, Region ...) kommen wie im Live-Betrieb aus HL_*.
+    """
+    lg = setup_logger("batch", log)
+    if not out and not stats:
+        raise ValueError("nothing to do: need an output video and/or a stats file")
+    info = probe(path)
+    fps = info["fps"] or 25.0
+    ncpu = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    jobs = int(jobs) if jobs and jobs > 0 else ncpu
+    warm = warmup_frames(float(os.environ.get("HL_EMA_ALPHA", "0.05")), fps, warmup_sec)
+    n = info["frames"]
+    if segment_sec and segment_sec > 0 and n:
+        parts = int(math.ceil(n / max(1.0, segment_sec * fps)))
+    else:
+        parts = jobs
+    segs = plan_segments(n, parts, warm)
+    jobs = max(1, min(jobs, len(segs)))
+    lg.info("%s: %dx%d @ %.2f fps, %d frames (%.0f s) → %d segment(s), warm-up %d frames, %d job(s)",
+            path, info["w"], info["h"], fps, n, n / fps, len(segs), warm, jobs)
+
+    tmp = Path(tempfile.mkdtemp(prefix=".batch-", dir=str(Path(out).resolve().parent))) if out else None
+    work = [{"index": k, "path": path, "warm": w0, "start": s, "end": e, "fps": fps, "backend": backend,
+             "counting": counting, "stats": bool(stats), "log": log,
+             "out": str(tmp / f"seg{k:04d}.mkv") if tmp is not None else None}
+            for k, (w0, s, e) in enumerate(segs)]
+
+    t0 = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    try:
+        if jobs == 1:
+            _init_worker(ncpu)
+            for job in work:
+                results.append(process_segment(job))
+                _log_segment(lg, results[-1], len(work))
+        else:
+            ctx = mp.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx, initializer=_init_worker,
+                                     initargs=(max(1, ncpu // jobs),)) as pool:
+                futs = [pool.submit(process_segment, job) for job in work]
+                try:
+                    for f in as_completed(futs):
+                        results.append(f.result())
+                        _log_segment(lg, results[-1], len(work))
+                except BaseException:
+                    for f in futs:
+                        f.cancel()
+                    raise
+        results.sort(key=lambda r: r["index"])
+
+        if out:
+            parts_out = [r["out"] for r in results if r["out"]]
+            if not parts_out:
+                raise RuntimeError("no frames decoded")
+            if len(parts_out) == 1 and Path(out).suffix.lower() == ".mkv":
+                shutil.move(parts_out[0], out)
+            else:
+                _concat(parts_out, out, "info" if log == "DEBUG" else "warning")
+    finally:
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    names = next((r["names"] for r in results if r.get("names")), [])
+    if stats:
+        with open(stats, "w", newline="") as f:
+            wr = csv.writer(f)
+            wr.writerow(STATS_COLUMNS + [f"{n}_{d}" for n in names for d in ("in", "out")])
+            for r in results:
+                wr.writerows(r["rows"])
+
+    wall = time.perf_counter() - t0
+    frames = sum(r["frames"] for r in results)
+    counts = {n: {"in": sum(r["counts"][n]["in"] for r in results if n in r["counts"]),
+                  "out": sum(r["counts"][n]["out"] for r in results if n in r["counts"])} for n in names}
+    summary = {
+        "frames": frames, "warm_frames": sum(r["warm_frames"] for r in results), "segments": len(results),
+        "jobs": jobs, "seconds": round(wall, 2), "fps": round(frames / wall, 1) if wall > 0 else 0.0,
+        "realtime": round(frames / fps / wall, 2) if wall > 0 else 0.0, "counts": counts,
+    }
+    lg.info("done: %d frames in %.1f s (%.1f fps, %.1fx realtime)", frames, wall, summary["fps"], summary["realtime"])
+    return summary
+
+
+def _log_segment(lg, r: Dict[str, Any], total: int):
+    fps = r["frames"] / r["seconds"] if r["seconds"] > 0 else 0.0
+    lg.info("segment %d/%d: frames %d..%d (+%d warm-up) in %.1f s (%.1f fps)",
+            r["index"] + 1, total, r["start"], r["start"] + r["frames"] - 1, r["warm_frames"], r["seconds"], fps)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Capture-Stufe: cap.read() in eigenem Thread statt im Verarbeitungs-Loop
+- begrenzter Ringpuffer mit Drop-Policy:
+    latest = nur das neueste Frame wird gehalten (Default, minimale Latenz)
+    queue  = FIFO mit `depth` Plätzen, bei vollem Puffer fliegt das älteste raus
+- Reconnect mit Backoff (1s..10s) bei Lesefehlern, ohne Busy-Spin im Consumer
+- Zähler: decoded, dropped, stale, reconnects; optional Stufen-Timer "capture" (self.metrics)
+
+Frame-Puffer werden recycelt: ein von read() geliefertes Frame bleibt gültig
+bis zum nächsten read()-Aufruf, danach schreibt der Decoder wieder hinein.
+"""
+
+from __future__ import annotations
+import threading
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+import numpy as np
+
+from ..util.logging import setup_logger
+
+POLICIES = ("latest", "queue")
+
+
+class FrameGrabber:
+    def __init__(self, url: str, open_timeout_ms: int = 8000, policy: str = "latest",
+                 depth: int = 2, stale_ms: float = 500.0, log_level: str = "INFO"):
+        policy = (policy or "latest").lower().strip()
+        if policy not in POLICIES:
+            raise ValueError(f"unknown capture policy '{policy}' (expected one of {', '.join(POLICIES)})")
+        self.url = url
+        self.open_timeout_ms = open_timeout_ms
+        self.policy = policy
+        self.depth = 1 if policy == "latest" else max(1, int(depth))
+        self.stale_s = max(0.0, float(stale_ms)) / 1000.0
+        self.log = setup_logger("capture", log_level)
+
+        # Zähler
+        self.decoded = 0
+        self.dropped = 0
+        self.stale = 0
+        self.reconnects = 0
+
+        self.fps = 0.0
+        self.metrics = None  # optional stream.metrics.Metrics (Zeit je cap.read)
+        self._cap = None
+        self._buf: deque = deque()          # (seq, t_decode, frame)
+        self._free: list[np.ndarray] = []   # recycelte Frame-Puffer
+        self._lent: Optional[np.ndarray] = None
+        self._shape: tuple = ()             # Form der zuletzt dekodierten Frames
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------------- Lifecycle ----------------
+
+    def _open(self):
+        import cv2
+        cap = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
+        if self.open_timeout_ms > 0:
+            try:
+                cap.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, float(self.open_timeout_ms))
+            except Exception:
+                pass
+        if cap.isOpened():
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        return cap
+
+    def start(self) -> "FrameGrabber":
+        """Öffnet die Quelle (synchron, Fehler sofort) und startet den Lese-Thread."""
+        self._cap = self._open()
+        if not self._cap.isOpened():
+            self._cap.release()
+            self._cap = None
+            raise RuntimeError(f"cannot open input {self.url}")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Lese-Thread beenden; die Quelle gibt der Thread selbst frei (nie während eines read())."""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            if self._thread.is_alive():
+                # hängt noch in cap.read()/open → release() kommt beim Verlassen von _run
+                self.log.warning("capture thread still busy, source is released when it returns")
+                return
+            self._thread = None
+        elif self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------------- Producer ----------------
+
+    def _reconnect(self, backoff: float) -> float:
+        self._cap.release()
+        if self._stop.wait(backoff):
+            return backoff
+        self._cap = self._open()
+        self.reconnects += 1
+        return min(backoff * 2, 10.0)
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            if self._cap is not None:
+                self._cap.release()
+                self._cap = None
+
+    def _loop(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            if not self._cap.isOpened():
+                self.log.warning("not opened, retry in %.1fs …", backoff)
+                backoff = self._reconnect(backoff)
+                continue
+
+            with self._cond:
+                slot = self._free.pop() if self._free else None
+            t0 = time.perf_counter()
+            ok, frame = self._cap.read(slot) if slot is not None else self._cap.read()
+            if not ok or frame is None or frame.size == 0:
+                if slot is not None:
+                    with self._cond:
+                        self._free.append(slot)
+                self.log.error("read failed (network jitter/timeout?). Reconnecting in %.1fs …", backoff)
+                backoff = self._reconnect(backoff)
+                continue
+            backoff = 1.0
+            if self.metrics is not None:
+                self.metrics.lap("capture", t0)
+
+            with self._cond:
+                if frame.shape != self._shape:  # Auflösungswechsel: recycelte Puffer passen nicht mehr
+                    self._shape = frame.shape
+                    self._free.clear()
+                self.decoded += 1
+                self._seq += 1
+                if len(self._buf) >= self.depth:
+                    _, _, old = self._buf.popleft()
+                    self._recycle(old)
+                    self.dropped += 1
+                self._buf.append((self._seq, time.monotonic(), frame))
+                self._cond.notify()
+
+    def _recycle(self, frame: np.ndarray):
+        # nur Puffer der aktuellen Auflösung behalten (Auflösungswechsel → alte verwerfen)
+        if frame.shape == self._shape and len(self._free) < self.depth + 1:
+            self._free.append(frame)
+
+    # ---------------- Consumer ----------------
+
+    def read(self, timeout: float = 1.0) -> Tuple[Optional[int], Optional[np.ndarray]]:
+        """
+        Nächstes Frame (latest: das frischeste) als (seq, frame), sonst (None, None) nach timeout.
+        Das vorher gelieferte Frame geht dabei zurück an den Decoder.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._lent is not None:
+                self._recycle(self._lent)
+                self._lent = None
+            while not self._buf:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    return None, None
+                self._cond.wait(remaining)
+            seq, t_dec, frame = self._buf.popleft()
+            self._lent = frame
+        if self.stale_s > 0 and time.monotonic() - t_dec > self.stale_s:
+            self.stale += 1
+        return seq, frame
+
+    def stats(self) -> dict:
+        return {
+            "decoded": self.decoded,
+            "dropped": self.dropped,
+            "stale": self.stale,
+            "reconnects": self.reconnects,
+            "queued": len(self._buf),
+        }
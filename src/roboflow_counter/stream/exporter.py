@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export-Stufe: Frames bei Bewegung als JPEG/WebP nach app.data_dir (Quelle der Galerie, web/gallery_server.py)
+- Auslöser: Bewegungsanteil der Maske >= min_motion und/oder Blob-Anzahl >= min_blobs
+- Ratenbegrenzung pro Slot (Stream): höchstens ein Bild je interval_sec
+- Kodieren + Schreiben in einem kleinen Thread-Pool; die Pipeline kopiert nur das Frame
+  (Capture-/Writer-Puffer werden wiederverwendet). Sind bereits `queue` Aufträge offen,
+  wird das Bild verworfen statt den Frame-Loop zu bremsen.
+- Ablage datumspartitioniert, damit Verzeichnislisten klein bleiben:
+    <dir>/<slot>/YYYY-MM-DD/HH/<slot>_YYYYmmdd-HHMMSS-mmm.jpg
+  geschrieben wird zuerst als .part, dann os.replace (Galerie sieht nie halbe Dateien)
+- Zähler: saved, dropped (Pool voll), errors, Kodier-/Schreibzeit (EMA in ms)
+
+config.yml:
+  export:
+    enabled: true
+    dir: ""              # leer = app.data_dir
+    min_motion: 0.002    # Anteil bewegter Pixel im Analysefenster (0 = Kriterium aus)
+    min_blobs: 0         # Blobs (zusammenhängende Bewegungsflächen) im Frame (0 = Kriterium aus)
+    interval_sec: 5
+    format: jpg          # jpg | webp
+    quality: 85
+    source: frame        # frame = Eingangsbild, highlight = Ausgabebild mit Overlay
+"""
+
+from __future__ import annotations
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from ..util.logging import setup_logger
+
+FORMATS = {"jpg": (".jpg", cv2.IMWRITE_JPEG_QUALITY), "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY)}
+SOURCES = ("frame", "highlight")
+
+
+class FrameExporter:
+    def __init__(self, root: str, slot: str = "main", min_motion: float = 0.002, min_blobs: int = 0,
+                 interval_sec: float = 5.0, fmt: str = "jpg", quality: int = 85, source: str = "frame",
+                 workers: int = 2, queue: int = 4, log_level: str = "INFO"):
+        fmt = (fmt or "jpg").lower().strip().lstrip(".")
+        fmt = "jpg" if fmt == "jpeg" else fmt
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown export format '{fmt}' (expected one of {', '.join(FORMATS)})")
+        source = (source or "frame").lower().strip()
+        if source not in SOURCES:
+            raise ValueError(f"unknown export source '{source}' (expected one of {', '.join(SOURCES)})")
+        self.root = Path(root)
+        self.slot = str(slot or "main")
+        self.min_motion = max(0.0, float(min_motion))
+        self.min_blobs = max(0, int(min_blobs))
+        self.interval = max(0.0, float(interval_sec))
+        self.ext, param = FORMATS[fmt]
+        self.params = [param, max(1, min(100, int(quality)))]
+        self.source = source
+        self.max_pending = max(1, int(queue))
+        self.log = setup_logger("exporter", log_level)
+
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix=f"export-{self.slot}")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._t_last: Optional[float] = None
+
+        # Zähler
+        self.saved = 0
+        self.dropped = 0
+        self.errors = 0
+        self.save_ms_ema: Optional[float] = None
+        self.metrics = None  # optional stream.metrics.Metrics
+
+    @property
+    def enabled(self) -> bool:
+        return self.min_motion > 0 or self.min_blobs > 0
+
+    # ---------------- Pipeline-Seite ----------------
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """Ratenbegrenzung: True, wenn seit dem letzten Export interval_sec vergangen sind (billig, vor trigger())."""
+        now = time.monotonic() if now is None else now
+        return self._t_last is None or now - self._t_last >= self.interval
+
+    def trigger(self, mask: np.ndarray, blobs: Optional[int] = None) -> bool:
+        """
+        Auslösebedingung auf der Bewegungsmaske (uint8 0/255).
+        blobs: bereits bekannte Blob-Anzahl (Zählstufe); sonst wird sie hier nur bei min_blobs > 0 bestimmt.
+        """
+        if not self.enabled:
+            return False
+        moving = cv2.countNonZero(mask)
+        if self.min_motion > 0 and moving >= self.min_motion * mask.size:
+            return True
+        if self.min_blobs > 0 and moving:
+            if blobs is None:
+                blobs = cv2.connectedComponents(mask, connectivity=8, ltype=cv2.CV_32S)[0] - 1
+            return blobs >= self.min_blobs
+        return False
+
+    def submit(self, img: np.ndarray, now: Optional[float] = None, t_wall: Optional[float] = None) -> bool:
+        """Kopie von img an den Pool geben. False = verworfen (Pool voll)."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending += 1
+        self._t_last = time.monotonic() if now is None else now
+        self._pool.submit(self._save, img.copy(), time.time() if t_wall is None else t_wall)
+        return True
+
+    def maybe_export(self, mask: np.ndarray, img: np.ndarray, blobs: Optional[int] = None) -> bool:
+        now = time.monotonic()
+        if not self.due(now) or not self.trigger(mask, blobs):
+            return False
+        return self.submit(img, now)
+
+    # ---------------- Pool-Seite ----------------
+
+    def path_for(self, t_wall: float) -> Path:
+        lt = time.localtime(t_wall)
+        ms = int((t_wall % 1.0) * 1000)
+        name = f"{self.slot}_{time.strftime('%Y%m%d-%H%M%S', lt)}-{ms:03d}{self.ext}"
+        return self.root / self.slot / time.strftime("%Y-%m-%d", lt) / time.strftime("%H", lt) / name
+
+    def _save(self, img: np.ndarray, t_wall: float):
+        t0 = time.perf_counter()
+        path = self.path_for(t_wall)
+        tmp = path.with_name(path.name + ".part")
+        try:
+            ok, buf = cv2.imencode(self.ext, img, self.params)
+            if not ok:
+                raise RuntimeError(f"imencode {self.ext} failed")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(buf.data)
+            os.replace(tmp, path)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self._pending -= 1
+            self.log.warning("export %s failed: %s", path, e)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return
+        ms = (time.perf_counter() - t0) * 1000.0
+        if self.metrics is not None:
+            self.metrics.observe("export", ms / 1000.0)
+        with self._lock:
+            self.saved += 1
+            self._pending -= 1
+            self.save_ms_ema = ms if self.save_ms_ema is None else (0.9 * self.save_ms_ema + 0.1 * ms)
+
+    # ---------------- Lifecycle ----------------
+
+    def close(self, wait: bool = True):
+        """Offene Aufträge noch schreiben (wait=True) und den Pool beenden."""
+        self._pool.shutdown(wait=wait)
+
+    def stats(self) -> dict:
+        return {
+            "saved": self.saved,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "pending": self._pending,
+            "save_ms": round(self.save_ms_ema or 0.0, 2),
+        }
+
+
+def exporter_from_env(log_level: str = "INFO") -> Optional[FrameExporter]:
+    """FrameExporter aus HL_EXPORT_* (HL_EXPORT_DIR leer = aus); Slot-Name aus HL_STREAM."""
+    root = os.environ.get("HL_EXPORT_DIR", "").strip()
+    if not root:
+        return None
+    ex = FrameExporter(
+        root, slot=os.environ.get("HL_STREAM", "main"),
+        min_motion=float(os.environ.get("HL_EXPORT_MIN_MOTION", "0.002")),
+        min_blobs=int(float(os.environ.get("HL_EXPORT_MIN_BLOBS", "0"))),
+        interval_sec=float(os.environ.get("HL_EXPORT_INTERVAL", "5")),
+        fmt=os.environ.get("HL_EXPORT_FORMAT", "jpg"),
+        quality=int(float(os.environ.get("HL_EXPORT_QUALITY", "85"))),
+        source=os.environ.get("HL_EXPORT_SOURCE", "frame"),
+        workers=int(float(os.environ.get("HL_EXPORT_WORKERS", "2"))),
+        queue=int(float(os.environ.get("HL_EXPORT_QUEUE", "4"))),
+        log_level=log_level,
+    )
+    return ex if ex.enabled else None
@@ -5,7 +5,18 @@ GPU Motion-Highlight (OpenCV CUDA) – stabile Gauss/EMA-Pipeline
 - Graustufen: CUDA-Fallback ohne cv2.cuda.cvtColor (dein Build buggt dort)
 - Gauss: k ∈ {3..31}, sigma auto, kein borderType
 - Motion: GPU-EMA (8-bit), keine cudabgsegm-Abhängigkeit
-- Encoder: h264_nvenc (Default) oder libx264 via HL_ENCODER
+- Backend: HL_BACKEND=auto|cuda|cpu (siehe stream/backends.py)
+- Analyse-Auflösung: HL_SCALE (0 < s <= 1), Motion-Pfad auf verkleinertem Graubild
+- ROI: HL_ROI / HL_ROI_OUTSIDE (stream/roi.py), Motion-Pfad nur im ROI-Fenster
+- Export: HL_EXPORT_DIR → Frames bei Bewegung als JPEG/WebP (stream/exporter.py, Thread-Pool)
+- Metriken: HL_METRICS_PORT > 0 → Stufen-Timer + Zähler unter http://host:port/metrics (stream/metrics.py)
+- OPC UA: HL_OPCUA_ENDPOINT → Live-Zählwerte/Bewegung an die SPS (stream/opcua.py, eigener Thread, asyncua)
+- Inferenz: HL_INFER_URL → Frames (fps-begrenzt) an den lokalen Roboflow Inference Server (stream/inference.py),
+  mit HL_INFER_TILES nur Kacheln um die Bewegung, Frames ohne Bewegung werden übersprungen (stream/tiles.py)
+- InfluxDB: HL_INFLUX_URL → Zählwerte + FPS/Drops/Reconnects als Line Protocol (stream/influx.py, Flush-Thread)
+- Encoder: h264_nvenc (Default bei CUDA) oder libx264 via HL_ENCODER
+- Parameter (Motion, Gain, Gauss, Region): RuntimeParams-Snapshot aus config/runtime.py, pro Frame nur
+  eine Referenz gelesen; Hot Reload per SIGHUP/Dateiänderung ohne Reconnect (ohne Store: einmal aus HL_*)
 """
 
 from __future__ import annotations
@@ -16,6 +27,24 @@ import argparse
 import cv2
 import numpy as np
 
+from .capture import FrameGrabber
+from .writer import FfmpegWriter
+from .region import RegionFilter
+from ..config.runtime import ParamStore
+from ..config.schema import RuntimeParams
+from .roi import roi_from_env
+from .metrics import metrics_from_env
+from .exporter import exporter_from_env
+from .influx import influx_from_env
+from .opcua import live_values, opcua_from_env
+from .inference import inference_from_env
+from .tiles import tiles_from_env
+from ..tracker.counting import CountingEngine
+from .backends import (  # noqa: F401  (Re-Export der CUDA-Helfer)
+    bgr_to_gray_cuda, create_backend, gray_to_bgr_safe, make_gauss, resize_like,
+    set_cuda_defaults,
+)
+
 
 # ---------------- Utilities ----------------
 
@@ -29,16 +58,13 @@ def dbg_mat(name, m):
         return f"{name}: ?"
 
 
-def set_cuda_defaults():
-    os.environ.setdefault("CUDA_LAUNCH_BLOCKING", "0")
-
-
-def _ffmpeg_cmd(w: int, h: int, fps: float, url: str, loglevel: str) -> list[str]:
+def _ffmpeg_cmd(w: int, h: int, fps: float, url: str, loglevel: str,
+                encoder: str | None = None) -> list[str]:
     """Baue FFmpeg-Command; NVENC (Default) oder libx264 via HL_ENCODER."""
     fps = max(1.0, fps)
     gop = max(1, int(round(fps * 2)))  # ~2s Keyframe-Intervall
 
-    encoder = os.environ.get("HL_ENCODER", "h264_nvenc").lower().strip()
+    encoder = (encoder or os.environ.get("HL_ENCODER", "h264_nvenc")).lower().strip()
     base = [
         "ffmpeg", "-loglevel", loglevel, "-re",
         "-f", "rawvideo",
@@ -81,200 +107,244 @@ def _ffmpeg_cmd(w: int, h: int, fps: float, url: str, loglevel: str) -> list[str
     return base
 
 
-def start_ffmpeg_writer(w: int, h: int, fps: float, url: str, loglevel: str = "warning") -> subprocess.Popen:
-    cmd = _ffmpeg_cmd(w, h, fps, url, loglevel)
+def start_ffmpeg_writer(w: int, h: int, fps: float, url: str, loglevel: str = "warning",
+                        encoder: str | None = None) -> subprocess.Popen:
+    cmd = _ffmpeg_cmd(w, h, fps, url, loglevel, encoder)
     print("[FFMPEG]", " ".join(cmd))
-    return subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-
-# --------------- CUDA helpers ----------------
-
-def bgr_to_gray_cuda(d_bgr):
-    """Robuster BGR->GRAY ohne cv2.cuda.cvtColor (dein Build zickt dort)."""
-    b, g, r = cv2.cuda.split(d_bgr)
-    tmp = cv2.cuda.addWeighted(b, 0.114, g, 0.587, 0.0)
-    gray = cv2.cuda.addWeighted(tmp, 1.0, r, 0.299, 0.0)
-    return gray  # 8UC1
-
-
-def gray_to_bgr_safe(d_gray):
-    """1ch->3ch: versuche CUDA-merge, sonst CPU-merge + Upload."""
-    if d_gray.empty():
-        raise RuntimeError("gray_to_bgr_safe: empty input")
-
-    try:
-        merged = cv2.cuda.merge([d_gray, d_gray, d_gray])
-        if hasattr(merged, "download"):
-            return merged
-    except Exception:
-        pass
-
-    cpu = d_gray.download()
-    cpu3 = cv2.merge([cpu, cpu, cpu])
-    out = cv2.cuda_GpuMat()
-    out.upload(cpu3)
-    return out
-
-
-def resize_like(src, ref):
-    if src.size() == ref.size():
-        return src
-    w, h = ref.size()
-    out = cv2.cuda_GpuMat()
-    cv2.cuda.resize(src, (w, h), dst=out)
-    return out
+    # stdout/stderr nicht als ungelesene PIPE öffnen (kann ffmpeg blockieren), siehe writer.py
+    return subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
 
 
-def make_gauss():
-    k = int(os.environ.get("HL_GAUSS", "7"))
-    k = max(3, min(31, k))
-    k = k if (k % 2) else k + 1
-    sigma = float(os.environ.get("HL_SIGMA", "0"))
-    if sigma <= 0:
-        sigma = max(0.1, (k - 1) / 6.0)
-    f = cv2.cuda.createGaussianFilter(cv2.CV_8UC1, cv2.CV_8UC1, (k, k), sigma)
-    print(f"[INFO] Gaussian k={k} sigma={sigma}")
-    return f
+def _apply_params(be, p, prev=None):
+    """Snapshot aufs Backend anwenden; Gauss-/Region-Filter nur bei geänderten Parametern neu aufbauen."""
+    if prev is None or (p.gauss_ksize, p.gauss_sigma) != (prev.gauss_ksize, prev.gauss_sigma):
+        be.set_gauss(p.gauss_ksize, p.gauss_sigma)
+    if prev is None or p.region != prev.region:
+        be.set_region_filter(RegionFilter(**p.region.model_dump()))
 
 
 # ---------------- Main ----------------
 
-def run_highlight_loop(url_in, url_out, log="INFO", fps_target=0.0, open_timeout_ms=8000):
-
-    set_cuda_defaults()
-
-    if cv2.cuda.getCudaEnabledDeviceCount() <= 0:
-        raise RuntimeError("CUDA GPU not available")
-
-    cv2.cuda.setDevice(0)
-    stream = cv2.cuda.Stream()
-
-    cap = cv2.VideoCapture(url_in, cv2.CAP_FFMPEG)
-    if open_timeout_ms > 0:
-        cap.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, float(open_timeout_ms))
-
-    if not cap.isOpened():
-        raise RuntimeError(f"cannot open input {url_in}")
+def run_highlight_loop(url_in, url_out, log="INFO", fps_target=0.0, open_timeout_ms=8000,
+                       backend=None, counting=None, on_counts=None, on_stats=None, stats_interval=2.0,
+                       on_detections=None, params=None):
+    """
+    counting:  optional `counting:`-Block aus config.yml (tracker/counting.py), aktiv mit enabled: true
+    on_counts: Callback(dict) für jedes abgeschlossene Zählintervall (Default: Ausgabe auf stdout)
+    on_stats:  Callback(dict) alle stats_interval Sekunden mit FPS und Capture-/Writer-Zählern
+    on_detections: Callback(frame_nr, Detections) je Ergebnis des Inference Servers (HL_INFER_URL)
+    params:    config.runtime.ParamStore (Hot Reload, Start/Stop beim Aufrufer); None = einmal aus HL_*
+    """
+    store = params if params is not None else ParamStore(RuntimeParams.from_env())
+
+    # Export-Stufe (Frames bei Bewegung → app.data_dir), optional; Pool-Threads starten erst beim ersten Bild
+    exporter = exporter_from_env(log)
+    # Influx-Sink (Zählwerte + Pipeline-Zustand), optional; Flush-Thread startet nach dem ersten Frame
+    influx = influx_from_env(log)
+    # OPC-UA-Publisher (SPS), optional; Session-Thread startet nach dem ersten Frame
+    opcua = opcua_from_env(log)
+    # Inferenz-Client (Roboflow Inference Server), optional; Ergebnisse kommen asynchron über poll()
+    infer = inference_from_env(log)
+
+    # Stufen-Timer/Zähler + /metrics (optional, HL_METRICS_PORT)
+    try:
+        metrics, metrics_srv = metrics_from_env(log)
+    except OSError as e:
+        print(f"[WARN] metrics endpoint disabled: {e}")
+        metrics, metrics_srv = None, None
+
+    # Capture läuft in eigenem Thread (Ringpuffer, Reconnect), siehe stream/capture.py
+    grabber = FrameGrabber(
+        url_in, open_timeout_ms=open_timeout_ms,
+        policy=os.environ.get("HL_CAPTURE_POLICY", "latest"),
+        depth=int(os.environ.get("HL_CAPTURE_DEPTH", "2")),
+        stale_ms=float(os.environ.get("HL_CAPTURE_STALE_MS", "500")),
+        log_level=log,
+    )
+    grabber.metrics = metrics
+    grabber.start()
 
     # ersten gültigen Frame holen
-    frame0 = None
-    for _ in range(60):
-        ok, f = cap.read()
-        if ok and f is not None and f.size > 0:
-            frame0 = f
-            break
-        time.sleep(0.05)
+    _, frame0 = grabber.read(timeout=max(3.0, open_timeout_ms / 1000.0))
     if frame0 is None:
+        grabber.stop()
+        if metrics_srv is not None:
+            metrics_srv.stop()
         raise RuntimeError("no first frame")
 
     h, w = frame0.shape[:2]
-    fps_in = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    fps_in = grabber.fps
     fps = fps_target if fps_target > 0 else (fps_in if fps_in > 0 else 8.0)
     print(f"[INFO] Input {w}x{h} @ {fps:.2f}")
 
-    gauss = make_gauss()
-    alpha = float(os.environ.get("HL_EMA_ALPHA", "0.05"))  # 0..1
-    thr = int(float(os.environ.get("HL_THRESH", "12")))    # 0..255
-
-    # ===== NEW: Wert für statische Hintergrundabdunklung (0..1) =====
-    darken = float(os.environ.get("HL_DARKEN", "0.0"))
-    darken = max(0.0, min(0.95, darken))  # clamp
-    # ================================================================
+    try:
+        be = create_backend(backend, w, h, roi=roi_from_env())
+    except Exception:
+        grabber.stop()
+        if metrics_srv is not None:
+            metrics_srv.stop()
+        raise
+    be.metrics = metrics
+    print(f"[INFO] Backend: {be.name}" + (f", Analyse {be.aw}x{be.ah} (scale {be.scale:g})" if be.scaled else ""))
+    if be.roi is not None:
+        print(f"[INFO] ROI: {len(be.roi.polygons)} polygon(s), Fenster {be.cw}x{be.ch}+{be.x0}+{be.y0} "
+              f"({100.0 * be.cw * be.ch / (w * h):.0f}% des Bildes), außerhalb: {be.roi.outside}")
+    encoder = os.environ.get("HL_ENCODER") or be.default_encoder
+
+    # Motion (ema_alpha, threshold), Gain, Hintergrundabdunklung, Gauss und Region-/Growth-Filter
+    # kommen aus dem aktuellen Snapshot; ein neuer Snapshot (Reload) wird vor dem nächsten Frame übernommen
+    p = store.current
+    _apply_params(be, p)
+
+    # Zählstufe (Blobs → Tracker → Linien/Zonen), optional
+    counter = CountingEngine(counting, scale=be.scale, offset=(be.x0, be.y0)) if (counting or {}).get("enabled") else None
+    if counter is not None:
+        print(f"[INFO] Counting: {len(counter.lines)} line(s), {len(counter.zones)} zone(s), "
+              f"interval={counter.counter.interval:.0f}s")
+
+    if exporter is not None:
+        exporter.metrics = metrics
+        print(f"[INFO] Export: {exporter.root / exporter.slot} ({exporter.ext[1:]}, source={exporter.source}, "
+              f"min_motion={exporter.min_motion:g}, min_blobs={exporter.min_blobs}, interval={exporter.interval:g}s)")
+
+    if influx is not None:
+        influx.start()
+        print(f"[INFO] Influx: {influx.endpoint} every {influx.interval:g}s, flush {influx.flush_sec:g}s"
+              + (f", spool {influx.spool}" if influx.spool is not None else ""))
+
+    if opcua is not None:
+        try:
+            opcua.start()
+        except ImportError as e:
+            print(f"[WARN] OPC UA disabled: {e} (pip install asyncua)")
+            opcua = None
+        else:
+            print(f"[INFO] OPC UA: {opcua.endpoint}, nodes {opcua.node_id('{key}')}, every {opcua.publish_sec:g}s")
+
+    gate = None
+    if infer is not None:
+        infer.start()
+        gate = tiles_from_env(w, h, scale=be.scale, offset=(be.x0, be.y0))
+        print(f"[INFO] Inference: {infer.endpoint} model={infer.model_id or '-'}, "
+              f"batch {infer.batch_size}/{infer.max_delay * 1000:.0f}ms, inflight {infer.max_inflight}"
+              + (f", tiles pad={gate.pad} min={gate.min_side} max={gate.max_tiles}" if gate is not None else ""))
 
     # Init
-    gpu_bgr = cv2.cuda_GpuMat()
-    gpu_bgr.upload(frame0)
-    gpu_gray = bgr_to_gray_cuda(gpu_bgr)
-
-    gpu_blur = cv2.cuda_GpuMat()
-    gpu_blur.create(h, w, cv2.CV_8UC1)
-    gauss.apply(gpu_gray, gpu_blur)
-
-    d_ema = cv2.cuda_GpuMat()
-    d_ema.create(h, w, cv2.CV_8UC1)
-    gpu_blur.copyTo(d_ema)
-
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-    morph = cv2.cuda.createMorphologyFilter(cv2.MORPH_OPEN, cv2.CV_8UC1, kernel)
-
-    pipe = None
+    be.reset(frame0)
+
+    # Writer-Stufe: eigener Thread + Pufferpool, die Pipeline rendert direkt in den Pool
+    writer = FfmpegWriter(
+        _ffmpeg_cmd(w, h, fps, url_out, ("info" if log == "DEBUG" else "warning"), encoder), w, h,
+        policy=os.environ.get("HL_WRITER_POLICY", "drop_oldest"),
+        depth=int(os.environ.get("HL_WRITER_DEPTH", "2")),
+        alloc=be.host_buffer, log_level=log,
+    )
+    writer.metrics = metrics
+    if metrics is not None:
+        def _collect():
+            cs, ws = grabber.stats(), writer.stats()
+            return [
+                ("hl_capture_frames_total", "counter", {"result": "decoded"}, cs["decoded"]),
+                ("hl_capture_frames_total", "counter", {"result": "dropped"}, cs["dropped"]),
+                ("hl_capture_frames_total", "counter", {"result": "stale"}, cs["stale"]),
+                ("hl_capture_reconnects_total", "counter", {}, cs["reconnects"]),
+                ("hl_writer_frames_total", "counter", {"result": "written"}, ws["written"]),
+                ("hl_writer_frames_total", "counter", {"result": "dropped"}, ws["dropped"]),
+                ("hl_writer_pipe_errors_total", "counter", {}, ws["pipe_errors"]),
+                ("hl_capture_queued", "gauge", {}, cs["queued"]),
+                ("hl_writer_queued", "gauge", {}, ws["queued"]),
+                ("hl_backend_allocs", "gauge", {}, be.allocs),
+            ] + ([] if exporter is None else [
+                ("hl_export_frames_total", "counter", {"result": k}, exporter.stats()[k])
+                for k in ("saved", "dropped", "errors")
+            ]) + ([] if infer is None else [
+                ("hl_inference_frames_total", "counter", {"result": k}, infer.stats()[k])
+                for k in ("done", "dropped", "errors")
+            ]) + ([] if gate is None else [
+                ("hl_inference_frames_skipped_total", "counter", {}, gate.skipped),
+                ("hl_inference_pixels_total", "counter", {"kind": "sent"}, gate.px_sent),
+                ("hl_inference_pixels_total", "counter", {"kind": "checked"}, gate.px_total),
+                ("hl_inference_sent_ratio", "gauge", {}, gate.sent_ratio),
+            ])
+        metrics.add_collector(_collect)
     t_prev = time.time()
+    t_stats = t_prev
+    frames = 0
     ema = None
 
     try:
+        writer.start()
+        print(f"[INFO] Output -> {url_out}")
         while True:
-            ok, frame = cap.read()
-            if not ok or frame is None or frame.size == 0:
-                time.sleep(0.002)
+            # blockiert ohne Busy-Spin, liefert immer das frischeste Frame
+            _, frame = grabber.read(timeout=1.0)
+            if frame is None:
                 continue
 
-            # Upload + Gray + Gauss
-            gpu_bgr.upload(frame)
-            gpu_gray = bgr_to_gray_cuda(gpu_bgr)
-            gauss.apply(gpu_gray, gpu_blur)
-
-            # EMA motion
-            d_diff = cv2.cuda.absdiff(gpu_blur, d_ema)
-            tmp1 = cv2.cuda.addWeighted(d_ema, 1 - alpha, d_ema, 0, 0)
-            tmp2 = cv2.cuda.addWeighted(gpu_blur, alpha, gpu_blur, 0, 0)
-            d_ema = cv2.cuda.add(tmp1, tmp2)
-
-            gpu_mask = cv2.cuda_GpuMat()
-            gpu_mask.create(h, w, cv2.CV_8UC1)
-            cv2.cuda.threshold(d_diff, thr, 255, cv2.THRESH_BINARY, dst=gpu_mask)
-
-            d_mask_clean = cv2.cuda_GpuMat()
-            d_mask_clean.create(h, w, cv2.CV_8UC1)
-            morph.apply(gpu_mask, d_mask_clean)
-
-            # 3-Kanal Maske (0/255) für die bewegten Bereiche
-            gpu_mask3 = gray_to_bgr_safe(d_mask_clean)
-            if gpu_mask3.size() != gpu_bgr.size():
-                gpu_mask3 = resize_like(gpu_mask3, gpu_bgr)
-
-            # 1) Bewegte Bereiche highlighten (altes Verhalten)
-            gain = float(os.environ.get("HL_GAIN", "0.70"))
-            highlighted = cv2.cuda.addWeighted(gpu_bgr, 1.0, gpu_mask3, gain, 0.0)
-
-            # 2) Statische Hintergrund-Abdunklung nur dort, wo KEINE Bewegung ist
-            if darken > 0.0:
-                inv_mask = cv2.cuda.bitwise_not(d_mask_clean)   # 255 für Hintergrund
-                inv_mask3 = gray_to_bgr_safe(inv_mask)
-
-                # Hintergrund-Version: Original dunkler skaliert
-                bg_dark = cv2.cuda.addWeighted(gpu_bgr, (1.0 - darken), gpu_bgr, 0.0, 0.0)
-
-                # Ausmaskieren und zusammensetzen
-                bg_part = cv2.cuda.bitwise_and(bg_dark,     inv_mask3)  # nur Hintergrund
-                fg_part = cv2.cuda.bitwise_and(highlighted, gpu_mask3)  # nur Bewegung
-                gpu_out = cv2.cuda.add(bg_part, fg_part)
-            else:
-                gpu_out = highlighted
-
-            # FFmpeg starten wenn nötig
-            if pipe is None:
-                pipe = start_ffmpeg_writer(w, h, fps, url_out, loglevel=("info" if log == "DEBUG" else "warning"))
-                print(f"[INFO] Output -> {url_out}")
-
-            # --- Frame aus GPU holen + sicher in die Pipe schreiben ---
-            tmp = gpu_out.download()
-
-            # Sanity-Check Form/Dtype
-            if tmp.dtype != np.uint8 or tmp.ndim != 3 or tmp.shape[2] != 3:
-                raise RuntimeError(f"bad frame shape/dtype: {tmp.shape} {tmp.dtype}")
-
-            # Garantiert contiguous (verhindert grüne/versetzte Zeilen)
-            out_cpu = np.ascontiguousarray(tmp)
-
-            # Optional Größenprüfung (bgr24)
-            expected = w * h * 3
-            if out_cpu.nbytes != expected:
-                raise RuntimeError(f"bad byte size: {out_cpu.nbytes} != {expected}")
-
-            try:
-                pipe.stdin.write(out_cpu.tobytes())
-            except (BrokenPipeError, AttributeError):
-                raise RuntimeError("ffmpeg pipe closed")
+            # neuer Parameter-Snapshot? (eine Referenz pro Frame, Filter nur bei Änderung neu)
+            if store.current is not p:
+                p_new = store.current
+                _apply_params(be, p_new, p)
+                print(f"[INFO] Parameter v{store.version}: {', '.join(p_new.changed(p))}")
+                p = p_new
+
+            # Upload → Gray → Gauss → EMA-Motion → Morph → Region
+            be.analyze(frame, p.ema_alpha, p.threshold)
+
+            # Export nur prüfen, wenn das Intervall abgelaufen ist (Maske/Blobs kosten sonst nichts)
+            export = exporter is not None and exporter.due()
+            infer_due = infer is not None and infer.due()
+            mask = be.mask() if counter is not None or export or (infer_due and gate is not None) else None
+
+            if counter is not None:
+                t_c = time.perf_counter()
+                res = counter.update(mask)
+                if metrics is not None:
+                    metrics.lap("counting", t_c)
+                if res is not None:
+                    if influx is not None:
+                        influx.write_counts(res)
+                    if on_counts is not None:
+                        on_counts(res)
+                    else:
+                        print(f"[COUNT] {res['counts']} tracks={counter.tracks}")
+
+            # OPC UA: Werte bei jeder vorhandenen Maske ablegen (Publisher fasst zusammen),
+            # sonst die Maske nur einmal je Publish-Intervall holen
+            if opcua is not None and (mask is not None or opcua.due()):
+                if mask is None:
+                    mask = be.mask()
+                opcua.update(live_values(counter, mask, ema or 0.0))
+
+            # Auslöser prüfen; Kodieren/Schreiben läuft im Pool des Exporters (nur Kopie des Frames hier)
+            if export and not exporter.trigger(mask, counter.blobs if counter is not None else None):
+                export = False
+            if export and exporter.source == "frame":
+                exporter.submit(frame)
+                export = False
+
+            # Inferenz: Frame bzw. Bewegungskacheln abgeben (kopiert + kodiert im Pool), fertige Ergebnisse einsammeln
+            if infer is not None:
+                if infer_due and gate is None:
+                    infer.submit(frames, frame)
+                elif infer_due:
+                    tiles = gate.plan(mask)
+                    if tiles:
+                        infer.submit(frames, frame, tiles)
+                for fid, det in infer.poll():
+                    if on_detections is not None:
+                        on_detections(fid, det)
+                    elif log == "DEBUG":
+                        print(f"[DEBUG] frame {fid}: {len(det)} detection(s), {det.latency_ms:.0f} ms")
+
+            # Composite → Download direkt in einen freien Writer-Puffer
+            # (None = Encoder hängt hinterher und Policy drop_newest → Frame verwerfen)
+            buf = writer.acquire()
+            if buf is not None:
+                out = be.render(p.gain, p.darken, out=buf)
+                if export:
+                    exporter.submit(out)  # Kopie vor submit, der Puffer gehört danach dem Writer
+                writer.submit(out)
 
             # FPS
             t = time.time()
@@ -283,26 +353,49 @@ def run_highlight_loop(url_in, url_out, log="INFO", fps_target=0.0, open_timeout
             if dt > 0:
                 inst = 1.0 / dt
                 ema = inst if ema is None else (0.9 * ema + 0.1 * inst)
+            frames += 1
+            if metrics is not None:
+                metrics.inc("hl_frames_total")
+                metrics.set("hl_fps", ema or 0.0)
+            send_stats = on_stats is not None and t - t_stats >= stats_interval
+            send_influx = influx is not None and influx.due()
+            if send_stats or send_influx:
+                st = {"fps": round(ema or 0.0, 2), "frames": frames, "backend": be.name,
+                      "capture": grabber.stats(), "writer": writer.stats(), "params": store.stats()}
+                if exporter is not None:
+                    st["export"] = exporter.stats()
+                if opcua is not None:
+                    st["opcua"] = opcua.stats()
+                if infer is not None:
+                    st["inference"] = infer.stats()
+                    if gate is not None:
+                        st["inference"].update(gate.stats())
+                if send_influx:
+                    influx.write_stats(st)
+                if send_stats:
+                    t_stats = t
+                    on_stats(st)
             if log == "DEBUG" and ema:
-                print(f"[DEBUG] FPS ~ {ema:.2f}")
+                cs, ws = grabber.stats(), writer.stats()
+                print(f"[DEBUG] FPS ~ {ema:.2f} ({be.name}, allocs={be.allocs}) "
+                      f"cap: decoded={cs['decoded']} dropped={cs['dropped']} stale={cs['stale']} "
+                      f"out: written={ws['written']} dropped={ws['dropped']} write={ws['write_ms']}ms")
 
     except KeyboardInterrupt:
         print("[INFO] stop")
     finally:
-        if pipe:
-            try:
-                pipe.stdin.flush()
-            except Exception:
-                pass
-            try:
-                pipe.stdin.close()
-            except Exception:
-                pass
-            try:
-                pipe.terminate()
-            except Exception:
-                pass
-        cap.release()
+        writer.close()
+        grabber.stop()
+        if exporter is not None:
+            exporter.close()
+        if influx is not None:
+            influx.close()
+        if opcua is not None:
+            opcua.close()
+        if infer is not None:
+            infer.close()
+        if metrics_srv is not None:
+            metrics_srv.stop()
 
 
 # ------------- direct mode fallback --------------
@@ -312,10 +405,11 @@ def _cli():
     p.add_argument("--in", dest="i")
     p.add_argument("--out", dest="o")
     p.add_argument("--fps", type=float, default=0.0)
+    p.add_argument("--backend", choices=("auto", "cuda", "cpu"), default=None)
     args = p.parse_args()
     if not args.i or not args.o:
         raise ValueError("need --in and --out")
-    run_highlight_loop(args.i, args.o, fps_target=args.fps)
+    run_highlight_loop(args.i, args.o, fps_target=args.fps, backend=args.backend)
 
 
 if __name__ == "__main__":
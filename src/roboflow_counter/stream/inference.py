@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inferenz-Stufe: Client für einen lokalen Roboflow Inference Server (POST /infer/object_detection)
+- submit(frame_id, frame) kehrt sofort zurück: JPEG-Kodierung (+ optional Verkleinern) läuft im Worker-Pool
+- Micro-Batching: bis batch_size Bilder oder max_delay_ms nach dem ersten Bild → ein Request mit
+  einer Bildliste (der Server liefert eine Antwort je Bild, in derselben Reihenfolge)
+- höchstens max_inflight Requests gleichzeitig, jeder Sender-Thread hält eine eigene dauerhafte
+  HTTP/1.1-Verbindung (Keep-Alive-Pool, Reconnect nur nach Fehlern)
+- Ergebnisse asynchron: poll() liefert [(frame_id, Detections)] in Abschlussreihenfolge, optional Callback
+- Gegendruck: sind max_pending Bilder unterwegs (Kodierung, Batch, Request), wird submit() verworfen
+- Kacheln (stream/tiles.py): submit(frame_id, frame, tiles) schickt nur die Ausschnitte; die Boxen werden
+  um den Kachel-Ursprung verschoben und je Frame zu einem Ergebnis zusammengefasst
+- Zähler: submitted, dropped, images, batches, done, errors (Frames ohne Ergebnis, auch bei nur einer
+  fehlgeschlagenen Kachel); Latenz Request und Ende-zu-Ende (submit → Ergebnis)
+
+config.yml (API-Key aus .env: ROBOFLOW_API_KEY):
+  inference:
+    enabled: true
+    url: "http://localhost:9001"
+    fps: 2                 # höchstens so viele Frames pro Sekunde an den Server
+    batch_size: 4
+    max_delay_ms: 50
+    max_inflight: 2
+    confidence: 0.4
+    max_side: 1280         # längere Kante vor dem Senden verkleinern (0 = Originalgröße)
+"""
+
+from __future__ import annotations
+import base64
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+from ..util.logging import setup_logger
+
+
+class Detections:
+    """Ergebnis je Frame: boxes (N, 4) x, y, w, h (links oben, Eingangspixel), scores (N,), classes [str]."""
+
+    __slots__ = ("boxes", "scores", "classes", "latency_ms")
+
+    def __init__(self, boxes: np.ndarray, scores: np.ndarray, classes: List[str], latency_ms: float = 0.0):
+        self.boxes = boxes
+        self.scores = scores
+        self.classes = classes
+        self.latency_ms = latency_ms
+
+    def __len__(self):
+        return len(self.scores)
+
+    @classmethod
+    def from_response(cls, r: Dict[str, Any], scale: float = 1.0, latency_ms: float = 0.0,
+                      origin: Tuple[int, int] = (0, 0)) -> "Detections":
+        preds = r.get("predictions") or []
+        n = len(preds)
+        boxes = np.empty((n, 4), np.float32)
+        scores = np.empty(n, np.float32)
+        classes = []
+        for i, p in enumerate(preds):
+            w, h = float(p["width"]), float(p["height"])
+            boxes[i] = (float(p["x"]) - w / 2, float(p["y"]) - h / 2, w, h)  # Server: Mittelpunkt
+            scores[i] = float(p.get("confidence", 0.0))
+            classes.append(str(p.get("class", "")))
+        if scale != 1.0:
+            boxes /= scale
+        if origin != (0, 0):
+            boxes[:, :2] += origin  # Kachel → Vollbild
+        return cls(boxes, scores, classes, latency_ms)
+
+    @classmethod
+    def concat(cls, parts: List["Detections"], latency_ms: float = 0.0) -> "Detections":
+        if len(parts) == 1:
+            parts[0].latency_ms = latency_ms
+            return parts[0]
+        return cls(np.concatenate([p.boxes for p in parts]) if parts else np.empty((0, 4), np.float32),
+                   np.concatenate([p.scores for p in parts]) if parts else np.empty(0, np.float32),
+                   [c for p in parts for c in p.classes], latency_ms)
+
+
+class _Frame:
+    """Ein eingereichtes Frame; mit Kacheln besteht es aus mehreren Bildern."""
+
+    __slots__ = ("fid", "t_sub", "left", "parts", "failed")
+
+    def __init__(self, fid: Any, t_sub: float, n: int):
+        self.fid = fid
+        self.t_sub = t_sub
+        self.left = n
+        self.parts: List[Detections] = []
+        self.failed = False
+
+
+class InferenceClient:
+    def __init__(self, url: str = "http://localhost:9001", model_id: str = "", api_key: str = "",
+                 batch_size: int = 4, max_delay_ms: float = 50.0, max_inflight: int = 2, max_pending: int = 0,
+                 encode_workers: int = 2, jpeg_quality: int = 80, max_side: int = 0, confidence: float = 0.4,
+                 fps: float = 0.0, timeout: float = 10.0, on_result: Optional[Callable[[Any, Detections], None]] = None,
+                 log_level: str = "INFO"):
+        u = urlsplit(url if "://" in url else f"http://{url}")
+        self._host = u.hostname or "localhost"
+        self._port = u.port or (443 if u.scheme == "https" else 9001)
+        self._https = u.scheme == "https"
+        self._path = u.path.rstrip("/") + "/infer/object_detection"
+        self.endpoint = f"{u.scheme or 'http'}://{self._host}:{self._port}"  # für Logs/Status
+        self.model_id = model_id
+        self.api_key = api_key
+        self.batch_size = max(1, int(batch_size))
+        self.max_delay = max(0.0, float(max_delay_ms)) / 1000.0
+        self.max_inflight = max(1, int(max_inflight))
+        # Default: so viele Bilder, wie alle Requests plus ein weiterer Batch fassen
+        self.max_pending = int(max_pending) if max_pending and max_pending > 0 \
+            else self.batch_size * (self.max_inflight + 1)
+        self.quality = max(1, min(100, int(jpeg_quality)))
+        self.max_side = max(0, int(max_side))
+        self.confidence = float(confidence)
+        self.interval = 1.0 / float(fps) if fps and fps > 0 else 0.0
+        self._t_due = 0.0
+        self.timeout = float(timeout)
+        self.on_result = on_result
+        self.log = setup_logger("inference", log_level)
+
+        self._encode = ThreadPoolExecutor(max_workers=max(1, int(encode_workers)), thread_name_prefix="infer-enc")
+        self._send = ThreadPoolExecutor(max_workers=self.max_inflight, thread_name_prefix="infer-req")
+        self._slots = threading.BoundedSemaphore(self.max_inflight)
+        self._local = threading.local()      # je Sender-Thread eine HTTPConnection
+        self._conns: list = []
+        self._q: "queue.Queue" = queue.Queue()  # (_Frame, Ursprung, Future[(b64, scale)]) | None
+        self._results: deque = deque()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closing = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Zähler / Latenzen (letzte 1000)
+        self.submitted = 0
+        self.dropped = 0
+        self.images = 0
+        self.batches = 0
+        self.done = 0
+        self.errors = 0
+        self._lat_req: deque = deque(maxlen=1000)
+        self._lat_e2e: deque = deque(maxlen=1000)
+        self._t0 = time.monotonic()
+
+    # ---------------- Lifecycle ----------------
+
+    def start(self) -> "InferenceClient":
+        self._thread = threading.Thread(target=self._batcher, name="infer-batch", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, timeout: float = 5.0):
+        """Offene Frames noch verarbeiten (max. timeout), dann Pools und Verbindungen schließen."""
+        self._closing = True
+        self._q.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._send.shutdown(wait=True)
+        self._encode.shutdown(wait=False)
+        for c in self._conns:
+            c.close()
+
+    # ---------------- Pipeline-Seite ----------------
+
+    def submit(self, frame_id: Any, frame: np.ndarray, tiles: Optional[List[Tuple[int, int, int, int]]] = None) -> bool:
+        """Frame (oder nur die Kacheln x, y, w, h daraus) einreihen, nie blockierend.
+        False = verworfen (zu viele Bilder unterwegs)."""
+        n = len(tiles) if tiles else 1
+        with self._lock:
+            if self._closing or (self._pending and self._pending + n > self.max_pending):
+                self.dropped += 1
+                return False
+            self._pending += n
+            self.submitted += 1
+        frm = _Frame(frame_id, time.perf_counter(), n)
+        # kopieren: Capture-/Writer-Puffer werden wiederverwendet (bei Kacheln nur die Ausschnitte)
+        for x, y, w, h in (tiles or [(0, 0, frame.shape[1], frame.shape[0])]):
+            fut = self._encode.submit(self._encode_frame, frame[y:y + h, x:x + w].copy())
+            self._q.put((frm, (x, y), fut))
+        return True
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """Ratenbegrenzung für die Pipeline (fps, 0 = jedes Frame)."""
+        now = time.monotonic() if now is None else now
+        if now - self._t_due < self.interval:
+            return False
+        self._t_due = now
+        return True
+
+    def poll(self) -> List[Tuple[Any, Detections]]:
+        """Alle bisher fertigen Ergebnisse (frame_id, Detections) abholen."""
+        out = []
+        while self._results:
+            out.append(self._results.popleft())
+        return out
+
+    # ---------------- Worker ----------------
+
+    def _encode_frame(self, frame: np.ndarray) -> Tuple[str, float]:
+        scale = 1.0
+        h, w = frame.shape[:2]
+        if self.max_side and max(w, h) > self.max_side:
+            scale = self.max_side / float(max(w, h))
+            frame = cv2.resize(frame, (max(1, int(round(w * scale))), max(1, int(round(h * scale)))),
+                               interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise RuntimeError("imencode failed")
+        return base64.b64encode(buf.data).decode("ascii"), scale
+
+    def _batcher(self):
+        """Frames zu Batches sammeln (Größe oder Deadline ab dem ersten Frame) und an die Sender geben."""
+        stop = False
+        while not stop:
+            item = self._q.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.perf_counter() + self.max_delay
+            while len(batch) < self.batch_size:
+                left = deadline - time.perf_counter()
+                try:
+                    item = self._q.get(timeout=max(0.0, left)) if left > 0 else self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._slots.acquire()  # höchstens max_inflight Requests unterwegs
+            self._send.submit(self._request, batch)
+
+    def _conn(self) -> http.client.HTTPConnection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            c = self._local.conn = cls(self._host, self._port, timeout=self.timeout)
+            with self._lock:
+                self._conns.append(c)
+        return c
+
+    def _post(self, body: bytes) -> Any:
+        for attempt in (0, 1):  # einmal neu verbinden, falls der Server die Keep-Alive-Verbindung geschlossen hat
+            c = self._conn()
+            try:
+                c.request("POST", self._path, body=body, headers={"Content-Type": "application/json"})
+                r = c.getresponse()
+                data = r.read()
+                if r.will_close:
+                    c.close()
+                if r.status != 200:
+                    raise RuntimeError(f"HTTP {r.status}: {data[:200].decode('utf-8', 'replace')}")
+                return json.loads(data)
+            except (OSError, http.client.HTTPException):
+                c.close()
+                if attempt:
+                    raise
+
+    def _request(self, batch):
+        try:
+            images = []
+            for frm, origin, fut in batch:
+                try:
+                    images.append((frm, origin) + fut.result())
+                except Exception as e:
+                    self._fail([frm], f"encode {frm.fid}: {e}")
+            if not images:
+                return
+            body = json.dumps({
+                "model_id": self.model_id, "api_key": self.api_key, "confidence": self.confidence,
+                "image": [{"type": "base64", "value": b64} for _, _, b64, _ in images],
+            }).encode("ascii")
+            t0 = time.perf_counter()
+            try:
+                resp = self._post(body)
+            except Exception as e:
+                self._fail([im[0] for im in images], str(e))
+                return
+            t1 = time.perf_counter()
+            if isinstance(resp, dict):
+                resp = [resp]
+            if len(resp) != len(images):
+                self._fail([im[0] for im in images], f"{len(resp)} responses for {len(images)} images")
+                return
+            self._lat_req.append((t1 - t0) * 1000.0)
+            with self._lock:
+                self.batches += 1
+                self.images += len(images)
+            for (frm, origin, _, scale), r in zip(images, resp):
+                self._part(frm, Detections.from_response(r, scale, origin=origin))
+        finally:
+            self._slots.release()
+
+    def _part(self, frm: _Frame, det: Optional[Detections]):
+        """Ein Bild eines Frames fertig (det None = Fehler); nach dem letzten das Ergebnis ausliefern.
+        Ist eine Kachel fehlgeschlagen, wird das ganze Frame verworfen (ein Teilergebnis sähe aus wie
+        ein vollständiges Frame mit weniger Larven) und einmal unter errors gezählt."""
+        with self._lock:
+            self._pending -= 1
+            frm.left -= 1
+            if det is not None:
+                frm.parts.append(det)
+            elif not frm.failed:
+                frm.failed = True
+                self.errors += 1
+            if frm.left > 0 or frm.failed:
+                return
+            self.done += 1
+        det = Detections.concat(frm.parts, (time.perf_counter() - frm.t_sub) * 1000.0)
+        self._lat_e2e.append(det.latency_ms)
+        self._results.append((frm.fid, det))
+        if self.on_result is not None:
+            try:
+                self.on_result(frm.fid, det)
+            except Exception as e:
+                self.log.warning("on_result: %s", e)
+
+    def _fail(self, frames: List[_Frame], msg: str):
+        for frm in frames:
+            self._part(frm, None)
+        self.log.warning("%d image(s) failed: %s", len(frames), msg)
+
+    def stats(self) -> dict:
+        req = np.asarray(self._lat_req) if self._lat_req else np.zeros(1)
+        e2e = np.asarray(self._lat_e2e) if self._lat_e2e else np.zeros(1)
+        dt = max(1e-6, time.monotonic() - self._t0)
+        return {
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "images": self.images,
+            "batches": self.batches,
+            "done": self.done,
+            "errors": self.errors,
+            "pending": self._pending,
+            "fps": round(self.done / dt, 2),
+            "req_ms_p50": round(float(np.percentile(req, 50)), 1),
+            "e2e_ms_p50": round(float(np.percentile(e2e, 50)), 1),
+            "e2e_ms_p99": round(float(np.percentile(e2e, 99)), 1),
+        }
+
+
+def inference_from_env(log_level: str = "INFO") -> Optional[InferenceClient]:
+    """InferenceClient aus HL_INFER_* (HL_INFER_URL leer = aus)."""
+    url = os.environ.get("HL_INFER_URL", "").strip()
+    if not url:
+        return None
+    return InferenceClient(
+        url, model_id=os.environ.get("HL_INFER_MODEL", ""),
+        api_key=os.environ.get("HL_INFER_API_KEY") or os.environ.get("ROBOFLOW_API_KEY", ""),
+        batch_size=int(float(os.environ.get("HL_INFER_BATCH", "4"))),
+        max_delay_ms=float(os.environ.get("HL_INFER_MAX_DELAY_MS", "50")),
+        max_inflight=int(float(os.environ.get("HL_INFER_INFLIGHT", "2"))),
+        encode_workers=int(float(os.environ.get("HL_INFER_ENCODE_WORKERS", "2"))),
+        jpeg_quality=int(float(os.environ.get("HL_INFER_QUALITY", "80"))),
+        max_side=int(float(os.environ.get("HL_INFER_MAX_SIDE", "0"))),
+        confidence=float(os.environ.get("HL_INFER_CONFIDENCE", "0.4")),
+        fps=float(os.environ.get("HL_INFER_FPS", "2")),
+        log_level=log_level,
+    )
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+InfluxDB-Sink (Line Protocol, API v2 /api/v2/write) für Zählwerte und Pipeline-Zustand
+- Pipeline-Seite: point()/write_counts()/write_stats() kodieren nur eine Zeile in einen vorab allokierten Puffer
+  (bytearray fester Größe, zwei Puffer im Wechsel) – kein Netzwerk, kein Warten im Frame-Loop
+- Flush-Thread: sendet einen Batch, wenn ein Puffer voll ist (batch_kb) oder flush_sec vergangen sind,
+  über eine wiederverwendete HTTP/1.1-Verbindung (Keep-Alive, Reconnect nur nach Fehlern)
+- Influx nicht erreichbar: Batches landen als Dateien im Spool-Verzeichnis (max. spool_mb, älteste
+  fliegen zuerst raus) und werden nach dem nächsten erfolgreichen Write in Reihenfolge nachgeliefert
+- Ist der Flush-Thread so weit hinten, dass beide Puffer voll sind, werden neue Punkte verworfen (dropped)
+
+config.yml (Token aus .env: INFLUX_TOKEN → metrics.influx.token):
+  metrics:
+    influx:
+      enabled: true
+      url: "http://localhost:8086"
+      org: "default"
+      bucket: "larvacounter"
+      interval_sec: 10     # Abstand der Zustandspunkte (FPS, Drops, Reconnects)
+      flush_sec: 5
+      batch_kb: 64
+      spool_dir: "/var/lib/larvacounter/influx-spool"
+      spool_mb: 64
+"""
+
+from __future__ import annotations
+import http.client
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode, urlsplit
+
+from ..util.logging import setup_logger
+
+
+def _esc_key(s: str) -> str:
+    """Measurement, Tag-Keys/-Werte, Field-Keys: Komma, Gleichheitszeichen, Leerzeichen escapen."""
+    return str(s).replace("\\", "\\\\").replace(",", "\\,").replace("=", "\\=").replace(" ", "\\ ")
+
+
+def _field(v: Any) -> str:
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, int):
+        return f"{v}i"
+    if isinstance(v, float):
+        return repr(v)
+    return '"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def encode_line(measurement: str, fields: Dict[str, Any], tags: Optional[Dict[str, str]] = None,
+                ts_ms: Optional[int] = None) -> bytes:
+    """Eine Line-Protocol-Zeile (Präzision ms), Tags sortiert (von Influx empfohlen)."""
+    head = _esc_key(measurement)
+    if tags:
+        head += "".join(f",{_esc_key(k)}={_esc_key(v)}" for k, v in sorted(tags.items()) if v != "")
+    body = ",".join(f"{_esc_key(k)}={_field(v)}" for k, v in fields.items() if v is not None)
+    ts = int(time.time() * 1000) if ts_ms is None else int(ts_ms)
+    return f"{head} {body} {ts}\n".encode("utf-8")
+
+
+class InfluxSink:
+    def __init__(self, url: str, org: str = "", bucket: str = "", token: str = "",
+                 tags: Optional[Dict[str, str]] = None, interval_sec: float = 10.0, flush_sec: float = 5.0,
+                 batch_kb: int = 64, spool_dir: str = "", spool_mb: float = 64.0, timeout: float = 5.0,
+                 log_level: str = "INFO"):
+        u = urlsplit(url if "://" in url else f"http://{url}")
+        self._https = u.scheme == "https"
+        self._host = u.hostname or "localhost"
+        self._port = u.port or (443 if self._https else 8086)
+        self.endpoint = f"{u.scheme or 'http'}://{self._host}:{self._port}"  # für Logs/Status
+        base = u.path.rstrip("/")
+        self._path = f"{base}/api/v2/write?" + urlencode({"org": org, "bucket": bucket, "precision": "ms"})
+        self._headers = {"Content-Type": "text/plain; charset=utf-8"}
+        if token:
+            self._headers["Authorization"] = f"Token {token}"
+        self.tags = {k: str(v) for k, v in (tags or {}).items()}
+        self.interval = max(0.5, float(interval_sec))
+        self.flush_sec = max(0.1, float(flush_sec))
+        self.timeout = float(timeout)
+        self.spool = Path(spool_dir) if spool_dir else None
+        self.spool_max = int(float(spool_mb) * 1024 * 1024)
+        self.log = setup_logger("influx", log_level)
+
+        # Doppelpuffer: Pipeline schreibt in _buf, Flush-Thread sendet _full
+        cap = max(4, int(batch_kb)) * 1024
+        self._buf = bytearray(cap)
+        self._spare = bytearray(cap)
+        self._n = 0
+        self._full: Optional[bytearray] = None
+        self._full_n = 0
+        self._cond = threading.Condition()
+        self._closing = False
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._thread: Optional[threading.Thread] = None
+        self._t_report = 0.0
+
+        # Zähler
+        self.points = 0
+        self.sent = 0        # Batches
+        self.dropped = 0     # Punkte (beide Puffer voll)
+        self.errors = 0      # fehlgeschlagene Writes
+        self.spooled = 0     # Batches auf Platte
+        self.spool_dropped = 0
+
+    # ---------------- Lifecycle ----------------
+
+    def start(self) -> "InfluxSink":
+        if self.spool is not None:
+            self.spool.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="influx-flush", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, timeout: float = 5.0):
+        """Restliche Punkte noch senden (bzw. spoolen), dann Verbindung schließen."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        if self._conn is not None:
+            self._conn.close()
+
+    # ---------------- Pipeline-Seite ----------------
+
+    def point(self, measurement: str, fields: Dict[str, Any], tags: Optional[Dict[str, str]] = None,
+              ts_ms: Optional[int] = None) -> bool:
+        """Punkt puffern (nie blockierend). False = verworfen."""
+        line = encode_line(measurement, fields, {**self.tags, **(tags or {})}, ts_ms)
+        n = len(line)
+        with self._cond:
+            if self._n + n > len(self._buf):
+                if self._full is not None or n > len(self._buf):
+                    self.dropped += 1
+                    return False
+                self._swap()
+            self._buf[self._n:self._n + n] = line
+            self._n += n
+            self.points += 1
+        return True
+
+    def _swap(self):
+        """Vollen Puffer an den Flush-Thread übergeben (unter _cond)."""
+        self._full, self._full_n = self._buf, self._n
+        self._buf, self._spare, self._n = self._spare, None, 0
+        self._cond.notify_all()
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """True, wenn interval_sec seit dem letzten Zustandspunkt vergangen sind."""
+        now = time.monotonic() if now is None else now
+        if now - self._t_report < self.interval:
+            return False
+        self._t_report = now
+        return True
+
+    def write_counts(self, res: Dict[str, Any]):
+        """Abgeschlossenes Zählintervall (tracker/counting.py) → ein Punkt je Linie/Zone."""
+        ts = int(res.get("end", time.time()) * 1000)
+        span = float(res.get("end", 0.0)) - float(res.get("start", 0.0))
+        for name, c in (res.get("counts") or {}).items():
+            self.point("hl_counts", {"in": int(c["in"]), "out": int(c["out"]), "interval_s": span},
+                       {"name": name}, ts)
+
+    def write_stats(self, st: Dict[str, Any]):
+        """Zustand der Pipeline (on_stats-Dict aus stream/highlight.py): FPS, Capture/Writer/Export/Inferenz-Zähler."""
+        f = {"fps": float(st.get("fps", 0.0)), "frames": int(st.get("frames", 0))}
+        for sec in ("capture", "writer", "export", "inference"):
+            for k, v in (st.get(sec) or {}).items():
+                if isinstance(v, (int, float)) and not isinstance(v, bool):
+                    f[f"{sec}_{k}"] = v
+        self.point("hl_pipeline", f, {"backend": str(st.get("backend", ""))})
+
+    # ---------------- Flush-Thread ----------------
+
+    def _run(self):
+        last = time.monotonic()
+        while True:
+            with self._cond:
+                while self._full is None and not self._closing:
+                    left = self.flush_sec - (time.monotonic() - last)
+                    if left <= 0:
+                        break
+                    self._cond.wait(left)
+                if self._full is None and self._n:
+                    self._swap()
+                closing = self._closing
+                full, n = self._full, self._full_n
+            last = time.monotonic()
+            if full is not None:
+                data = bytes(memoryview(full)[:n])
+                with self._cond:  # Puffer zurück, Pipeline kann wieder tauschen
+                    self._spare, self._full = full, None
+                self._deliver(data)
+            if closing:
+                with self._cond:
+                    rest = bytes(memoryview(self._buf)[:self._n])
+                    self._n = 0
+                if rest:
+                    self._deliver(rest)
+                return
+
+    def _deliver(self, data: bytes):
+        if self._post(data):
+            self.sent += 1
+            self._drain_spool()
+        else:
+            self._spool_write(data)
+
+    def _post(self, data: bytes) -> bool:
+        for attempt in (0, 1):  # einmal neu verbinden, falls die Keep-Alive-Verbindung weg ist
+            try:
+                if self._conn is None:
+                    cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+                    self._conn = cls(self._host, self._port, timeout=self.timeout)
+                self._conn.request("POST", self._path, body=data, headers=self._headers)
+                r = self._conn.getresponse()
+                body = r.read()
+                if r.will_close:
+                    self._conn.close()
+                    self._conn = None
+                if 200 <= r.status < 300:
+                    return True
+                self.errors += 1
+                self.log.warning("write failed: HTTP %d %s", r.status, body[:200].decode("utf-8", "replace"))
+                # 4xx (außer 429) = Daten/Token falsch, Wiederholen hilft nicht → Batch als erledigt verwerfen
+                return 400 <= r.status < 500 and r.status != 429
+            except (OSError, http.client.HTTPException) as e:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+                if attempt:
+                    self.errors += 1
+                    self.log.warning("write failed: %s", e)
+        return False
+
+    # ---------------- Spool (Platte) ----------------
+
+    def _spool_files(self):
+        return sorted(self.spool.glob("*.lp")) if self.spool is not None else []
+
+    def _spool_write(self, data: bytes):
+        if self.spool is None:
+            self.spool_dropped += 1
+            return
+        files = self._spool_files()
+        total = sum(p.stat().st_size for p in files) + len(data)
+        while files and total > self.spool_max:  # Quote: älteste Batches zuerst verwerfen
+            p = files.pop(0)
+            total -= p.stat().st_size
+            p.unlink(missing_ok=True)
+            self.spool_dropped += 1
+        if total > self.spool_max:
+            self.spool_dropped += 1
+            return
+        p = self.spool / f"{time.time_ns():020d}.lp"
+        try:
+            tmp = p.with_suffix(".part")
+            tmp.write_bytes(data)
+            os.replace(tmp, p)
+            self.spooled += 1
+        except OSError as e:
+            self.spool_dropped += 1
+            self.log.warning("spool write failed: %s", e)
+
+    def _drain_spool(self):
+        for p in self._spool_files():
+            try:
+                data = p.read_bytes()
+            except OSError:
+                continue
+            if not self._post(data):
+                return
+            p.unlink(missing_ok=True)
+            self.sent += 1
+
+    def stats(self) -> dict:
+        return {
+            "points": self.points,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "spooled": self.spooled,
+            "spool_dropped": self.spool_dropped,
+            "spool_files": len(self._spool_files()),
+        }
+
+
+def influx_from_env(log_level: str = "INFO") -> Optional[InfluxSink]:
+    """InfluxSink aus HL_INFLUX_* (HL_INFLUX_URL leer = aus); Tag stream aus HL_STREAM."""
+    url = os.environ.get("HL_INFLUX_URL", "").strip()
+    if not url:
+        return None
+    return InfluxSink(
+        url, org=os.environ.get("HL_INFLUX_ORG", ""), bucket=os.environ.get("HL_INFLUX_BUCKET", ""),
+        token=os.environ.get("HL_INFLUX_TOKEN") or os.environ.get("INFLUX_TOKEN", ""),
+        tags={"stream": os.environ.get("HL_STREAM", "main")},
+        interval_sec=float(os.environ.get("HL_INFLUX_INTERVAL", "10")),
+        flush_sec=float(os.environ.get("HL_INFLUX_FLUSH_SEC", "5")),
+        batch_kb=int(float(os.environ.get("HL_INFLUX_BATCH_KB", "64"))),
+        spool_dir=os.environ.get("HL_INFLUX_SPOOL_DIR", ""),
+        spool_mb=float(os.environ.get("HL_INFLUX_SPOOL_MB", "64")),
+        log_level=log_level,
+    )
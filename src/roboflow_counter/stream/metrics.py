@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Laufzeit-Metriken der Highlight-Pipeline im Prometheus-Textformat
+- Stufen-Timer: perf_counter-Differenzen → Histogramm mit festen Buckets je Stufe
+  (capture, upload, gray, gauss, ema, threshold, morph, region, composite, download, write)
+- Zähler/Gauges: Frames, FPS, Capture-/Writer-Drops, Reconnects, Pipe-Fehler
+  (Capture/Writer-Zähler werden erst beim Abruf über Collector-Callbacks gelesen)
+- kleiner HTTP-Server (Thread) mit GET /metrics; Port über HL_METRICS_PORT (0 = aus)
+
+Kosten pro Messung: ein perf_counter() + bisect in einer Tupel-Liste + ein unbelasteter Lock (~0.3 µs).
+Histogramme werden aus mehreren Threads beschrieben (Frame-Loop, Writer-Thread, Export-Pool), daher
+hält jedes Histogramm einen eigenen Lock; render() liest unter demselben Lock einen konsistenten Stand.
+Zähler/Gauges (inc/set) und render() teilen sich den Lock von Metrics.
+"""
+
+from __future__ import annotations
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from ..util.logging import setup_logger
+
+# Bucket-Grenzen in Sekunden (0.25 ms … 1 s), +Inf implizit
+BUCKETS = (0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 1.0)
+
+Sample = Tuple[str, str, Dict[str, str], float]  # (name, type, labels, value)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count", "lock")
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, v: float):
+        i = bisect_left(self.bounds, v)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += v
+            self.count += 1
+
+    def snapshot(self) -> Tuple[list, float, int]:
+        with self.lock:
+            return list(self.counts), self.sum, self.count
+
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+
+class Metrics:
+    def __init__(self, labels: Optional[Dict[str, str]] = None, buckets=BUCKETS):
+        self.labels = dict(labels or {})
+        self.buckets = tuple(buckets)
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.gauges: Dict[Tuple[str, Tuple], float] = {}
+        self._collectors: list[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()  # Anlegen neuer Stufen, Zähler/Gauges (render() liest im HTTP-Thread)
+
+    # ---------------- Pipeline-Seite ----------------
+
+    def observe(self, stage: str, seconds: float):
+        h = self.stages.get(stage)
+        if h is None:
+            with self._lock:
+                h = self.stages.get(stage)
+                if h is None:
+                    h = self.stages[stage] = Histogram(self.buckets)
+        h.observe(seconds)
+
+    def lap(self, stage: str, t0: float) -> float:
+        """Zeit seit t0 für `stage` verbuchen; liefert den neuen Startzeitpunkt (Verkettung)."""
+        t = time.perf_counter()
+        self.observe(stage, t - t0)
+        return t
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.gauges[key] = float(value)
+
+    def add_collector(self, fn: Callable[[], Iterable[Sample]]):
+        """fn() → [(name, "counter"|"gauge", labels, value)], wird bei jedem Abruf aufgerufen."""
+        self._collectors.append(fn)
+
+    # ---------------- Export ----------------
+
+    def render(self) -> str:
+        base = self.labels
+        out: list[str] = []
+        typed: set = set()
+
+        def emit(name, typ, labels, value):
+            if name not in typed:
+                out.append(f"# TYPE {name} {typ}")
+                typed.add(name)
+            out.append(f"{name}{_fmt_labels({**base, **labels})} {value:.10g}")
+
+        with self._lock:  # Schnappschuss; formatiert wird ohne Lock
+            counters, gauges = list(self.counters.items()), list(self.gauges.items())
+            stages = list(self.stages.items())
+        for (name, lab), v in sorted(counters):
+            emit(name, "counter", dict(lab), v)
+        for (name, lab), v in sorted(gauges):
+            emit(name, "gauge", dict(lab), v)
+        for fn in self._collectors:
+            try:
+                for name, typ, labels, v in fn():
+                    emit(name, typ, labels, v)
+            except Exception as e:  # Collector darf den Abruf nicht kaputt machen
+                out.append(f"# collector error: {e}")
+
+        name = "hl_stage_seconds"
+        out.append(f"# TYPE {name} histogram")
+        for stage, h in stages:
+            counts, total, n = h.snapshot()
+            lab = {**base, "stage": stage}
+            cum = 0
+            for bound, c in zip(h.bounds, counts):
+                cum += c
+                out.append(f"{name}_bucket{_fmt_labels({**lab, 'le': f'{bound:g}'})} {cum}")
+            out.append(f"{name}_bucket{_fmt_labels({**lab, 'le': '+Inf'})} {n}")
+            out.append(f"{name}_sum{_fmt_labels(lab)} {total:.9g}")
+            out.append(f"{name}_count{_fmt_labels(lab)} {n}")
+        return "\n".join(out) + "\n"
+
+
+class MetricsServer:
+    """GET /metrics in einem Daemon-Thread (ThreadingHTTPServer)."""
+
+    def __init__(self, metrics: Metrics, port: int, host: str = "0.0.0.0", log_level: str = "INFO"):
+        self.metrics = metrics
+        self.log = setup_logger("metrics", log_level)
+        m = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = m.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):  # kein Zugriffslog auf stderr
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, int(port)), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MetricsServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        self.log.info("serving /metrics on port %d", self.port)
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def metrics_from_env(log_level: str = "INFO") -> Tuple[Optional[Metrics], Optional[MetricsServer]]:
+    """Metrics + laufender Server aus HL_METRICS_PORT / HL_METRICS_HOST / HL_STREAM; Port 0 → (None, None)."""
+    port = int(os.environ.get("HL_METRICS_PORT", "0") or 0)
+    if port <= 0:
+        return None, None
+    stream = os.environ.get("HL_STREAM", "")
+    m = Metrics({"stream": stream} if stream else None)
+    srv = MetricsServer(m, port, os.environ.get("HL_METRICS_HOST", "0.0.0.0"), log_level).start()
+    return m, srv
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OPC-UA-Publisher: Live-Zählwerte + Bewegungsaktivität je Kamera an die SPS
+- Pipeline-Seite: update(dict) legt nur die neuesten Werte ab (Lock + dict.update), beliebig oft pro Frame;
+  alles dazwischen wird zusammengefasst (coalesced) – der Frame-Thread wartet nie auf das Netzwerk
+- eigener Thread mit asyncio-Loop und asyncua-Client: eine dauerhafte Session, alle publish_sec ein
+  Write mit allen geänderten Knoten in einem WriteRequest (Client.write_values)
+- Datentyp je Knoten wird einmal beim Verbinden gelesen (Int32/Float/… wie in der SPS angelegt)
+- Fehler einzelner Knoten bleiben beim Key: nicht auflösbare Knoten werden (einmal geloggt) für die Session
+  ausgelassen, abgelehnte Writes (StatusCode je Knoten) beim nächsten Wert erneut versucht
+- Verbindungsfehler: Session verwerfen, Neuverbindung nach 1 s, 2 s, 4 s … bis backoff_max_sec;
+  danach werden alle aktuellen Werte einmal komplett geschrieben
+
+Knoten: node_template mit {stream} und {key}, einzelne Keys über nodes: überschreibbar.
+Keys: Motion (Anteil bewegter Pixel 0..1), Blobs, Fps, <Linie/Zone>.In, <Linie/Zone>.Out (Summen seit Start)
+
+config.yml (Endpoint/Zugang aus .env: OPCUA_ENDPOINT, OPCUA_USERNAME, OPCUA_PASSWORD):
+  opcua:
+    enabled: true
+    node_template: "ns=2;s=larvacounter.{stream}.{key}"
+    nodes: {}              # z.B. {"auslauf.In": "ns=3;i=1007"}
+    publish_sec: 1.0
+    backoff_max_sec: 30
+
+Benötigt das Paket `asyncua` (pip install asyncua), wird erst beim Start importiert.
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from ..util.logging import setup_logger
+
+_UNSET = object()
+
+
+class OpcuaPublisher:
+    def __init__(self, endpoint: str, stream: str = "main", node_template: str = "ns=2;s=larvacounter.{stream}.{key}",
+                 nodes: Optional[Dict[str, str]] = None, username: str = "", password: str = "",
+                 publish_sec: float = 1.0, backoff_max_sec: float = 30.0, timeout_sec: float = 4.0,
+                 log_level: str = "INFO"):
+        self.endpoint = endpoint
+        self.stream = str(stream or "main")
+        self.node_template = node_template
+        self.nodes = dict(nodes or {})
+        self.username = username
+        self.password = password
+        self.publish_sec = max(0.05, float(publish_sec))
+        self.backoff_max = max(1.0, float(backoff_max_sec))
+        self.timeout = max(0.5, float(timeout_sec))
+        self.log = setup_logger("opcua", log_level)
+
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Any] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._t_due = 0.0
+
+        # Zähler
+        self.updates = 0      # update()-Aufrufe der Pipeline
+        self.writes = 0       # WriteRequests (je Batch einer)
+        self.values = 0       # geschriebene Knotenwerte
+        self.rejected = 0     # vom Server abgelehnte Einzelwerte (StatusCode je Knoten)
+        self.errors = 0
+        self.reconnects = 0
+        self.connected = False
+        self._warned: set = set()
+
+    def node_id(self, key: str) -> str:
+        return self.nodes.get(key) or self.node_template.format(stream=self.stream, key=key)
+
+    # ---------------- Pipeline-Seite ----------------
+
+    def update(self, values: Dict[str, Any]):
+        """Neueste Werte ablegen (nie blockierend); geschrieben wird im Publish-Intervall."""
+        with self._lock:
+            self._latest.update(values)
+            self.updates += 1
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """True einmal je publish_sec – für Werte, die nur zum Publizieren berechnet werden (Maske holen)."""
+        now = time.monotonic() if now is None else now
+        if now - self._t_due < self.publish_sec:
+            return False
+        self._t_due = now
+        return True
+
+    # ---------------- Lifecycle ----------------
+
+    def start(self) -> "OpcuaPublisher":
+        import asyncua  # noqa: F401  (früh scheitern, wenn das Paket fehlt)
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), name="opcua-publisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, timeout: float = 5.0):
+        """Letzten Stand noch schreiben (falls verbunden), Session schließen."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    # ---------------- Publisher-Thread ----------------
+
+    async def _main(self):
+        delay = 1.0
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            try:
+                await self._session()
+            except Exception as e:  # Verbindung/Session/Write – alles führt zur Neuverbindung
+                self.errors += 1
+                self.log.warning("%s: %s", self.endpoint, e)
+            self.connected = False
+            if self._stop.is_set():
+                return
+            if time.monotonic() - t0 > 2 * self.backoff_max:
+                delay = 1.0  # lange stabil gelaufen → Backoff von vorn
+            self.log.info("reconnect in %.0fs", delay)
+            if self._stop.wait(delay):
+                return
+            delay = min(self.backoff_max, delay * 2)
+            self.reconnects += 1
+
+    async def _session(self):
+        from asyncua import Client, ua
+
+        client = Client(url=self.endpoint, timeout=self.timeout)
+        if self.username:
+            client.set_user(self.username)
+            client.set_password(self.password)
+        async with client:
+            self.connected = True
+            self.log.info("connected to %s", self.endpoint)
+            resolved: Dict[str, tuple] = {}   # key → (Node, VariantType)
+            written: Dict[str, Any] = {}      # zuletzt geschriebener Wert je Key (nach Reconnect leer → alles)
+            bad: set = set()                  # Keys ohne auflösbaren Knoten (nach Reconnect neu versucht)
+            while True:
+                stop = self._stop.is_set()
+                with self._lock:
+                    snap = dict(self._latest)
+                keys = [k for k, v in snap.items() if k not in bad and written.get(k, _UNSET) != v]
+                for k in keys:
+                    if k not in resolved:
+                        try:
+                            node = client.get_node(self.node_id(k))
+                            resolved[k] = (node, await node.read_data_type_as_variant_type())
+                        except (ua.UaError, ValueError) as e:  # Knoten fehlt/ungültige NodeId: nur dieser Key
+                            bad.add(k)
+                            self._warn_once(k, f"{k}: node {self.node_id(k)} not usable, skipped: {e}")
+                keys = [k for k in keys if k not in bad]
+                if keys:
+                    nodes = [resolved[k][0] for k in keys]
+                    dvs = [ua.DataValue(ua.Variant(_cast(snap[k], resolved[k][1]), resolved[k][1])) for k in keys]
+                    results = await client.write_values(nodes, dvs, raise_on_partial_error=False)
+                    self.writes += 1
+                    for k, res in zip(keys, results):
+                        if res.is_good():
+                            self.values += 1
+                            written[k] = snap[k]
+                        else:  # z.B. BadUserAccessDenied/BadTypeMismatch: beim nächsten Wert erneut versuchen
+                            self.rejected += 1
+                            self._warn_once(k, f"{k}: write rejected by server: {res.name}")
+                if stop:
+                    return
+                await asyncio.sleep(self.publish_sec)
+                if hasattr(client, "check_connection"):
+                    await client.check_connection()  # Session-Watchdog hat die Verbindung verloren → raise
+
+    def _warn_once(self, key: str, msg: str):
+        """Fehler eines einzelnen Keys nur einmal loggen (sonst jede publish_sec eine Zeile)."""
+        if key not in self._warned:
+            self._warned.add(key)
+            self.log.warning(msg)
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "updates": self.updates,
+            "writes": self.writes,
+            "values": self.values,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "reconnects": self.reconnects,
+        }
+
+
+def _cast(v: Any, vtype) -> Any:
+    """Python-Wert passend zum Knotentyp (Zähler als int, Analogwerte als float, Bool)."""
+    name = getattr(vtype, "name", "")
+    if name == "Boolean":
+        return bool(v)
+    if "Int" in name or name == "Byte":
+        return int(round(v)) if isinstance(v, float) else int(v)
+    if name in ("Float", "Double"):
+        return float(v)
+    return v
+
+
+def live_values(counter=None, mask=None, fps: float = 0.0) -> Dict[str, Any]:
+    """Werte für die SPS aus Zählstufe (Summen je Linie/Zone, Blobs), Bewegungsmaske und FPS."""
+    import cv2
+    out: Dict[str, Any] = {"Fps": round(float(fps), 2)}
+    if mask is not None:
+        out["Motion"] = cv2.countNonZero(mask) / float(mask.size)
+    if counter is not None:
+        out["Blobs"] = int(counter.blobs)
+        for name, c in counter.counter.total.items():
+            out[f"{name}.In"] = int(c["in"])
+            out[f"{name}.Out"] = int(c["out"])
+    return out
+
+
+def opcua_from_env(log_level: str = "INFO") -> Optional[OpcuaPublisher]:
+    """OpcuaPublisher aus HL_OPCUA_* (HL_OPCUA_ENDPOINT leer = aus); Stream-Name aus HL_STREAM."""
+    endpoint = os.environ.get("HL_OPCUA_ENDPOINT", "").strip()
+    if not endpoint:
+        return None
+    return OpcuaPublisher(
+        endpoint, stream=os.environ.get("HL_STREAM", "main"),
+        node_template=os.environ.get("HL_OPCUA_NODE_TEMPLATE", "ns=2;s=larvacounter.{stream}.{key}"),
+        nodes=json.loads(os.environ.get("HL_OPCUA_NODES") or "{}"),
+        username=os.environ.get("HL_OPCUA_USERNAME", ""),
+        password=os.environ.get("HL_OPCUA_PASSWORD", ""),
+        publish_sec=float(os.environ.get("HL_OPCUA_PUBLISH_SEC", "1.0")),
+        backoff_max_sec=float(os.environ.get("HL_OPCUA_BACKOFF_MAX", "30")),
+        log_level=log_level,
+    )
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Region- & Growth-Filter für die Bewegungsmaske (nach MORPH_OPEN)
+- min_pixels:     Connected Components (8er-Nachbarschaft), Cluster < min_pixels fliegen raus
+                  (Einzelpixel-Rauschen, kleine Reflexe)
+- grow_iters:     Maske wächst pro Iteration um 1 px (3x3-Dilatation) in den Larvenkörper ...
+- edge_threshold: ... aber nur über Pixel mit Sobel-Betrag |gx|+|gy| < edge_threshold,
+                  d.h. das Wachstum stoppt an Kanten (höher = wächst weiter, niedriger = stoppt früher)
+- gray_delta:     optional: nur Pixel, deren Grauwert höchstens gray_delta vom
+                  Mittelwert des angrenzenden Clusters abweicht (0 = aus)
+
+Alles über Label-Bilder (16 bit), Dilatation und NumPy-Indexing auf den Masken-Pixeln
+(cv2.findNonZero) – keine Python-Schleifen pro Pixel, nur über grow_iters.
+Mehr als 65535 Cluster (Rauschbild) werden in 32 bit gelabelt und nach min_pixels auf 16 bit
+umnummeriert; bleiben es zu viele, wächst die Maske in diesem Frame ohne gray_delta (nur Kanten).
+Kosten der Filterstufen skalieren mit der Anzahl Masken-Pixel, nicht mit der Bildgröße.
+Puffer werden pro Auflösung einmal angelegt.
+"""
+
+from __future__ import annotations
+import os
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+
+class RegionFilter:
+    def __init__(self, min_pixels: int = 50, grow_iters: int = 2, edge_threshold: int = 20,
+                 gray_delta: int = 0, alloc: Optional[Callable] = None):
+        self.min_pixels = max(0, int(min_pixels))
+        self.grow_iters = max(0, int(grow_iters))
+        self.edge_threshold = max(0, int(edge_threshold))
+        self.gray_delta = max(0, int(gray_delta))
+        self._alloc = alloc or (lambda shape, dtype=np.uint8: np.empty(shape, dtype))
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        self._shape = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.min_pixels > 1 or self.grow_iters > 0
+
+    def scaled(self, scale: float) -> "RegionFilter":
+        """Gleicher Filter für eine um `scale` verkleinerte Maske (Flächen ~ scale², Wachstum ~ scale)."""
+        return RegionFilter(
+            min_pixels=int(round(self.min_pixels * scale * scale)),
+            grow_iters=max(1, int(round(self.grow_iters * scale))) if self.grow_iters else 0,
+            edge_threshold=self.edge_threshold, gray_delta=self.gray_delta, alloc=self._alloc)
+
+    def _allocate(self, shape):
+        a = self._alloc
+        self._shape = shape
+        self.labels = self._labels16 = a(shape, np.uint16)
+        self.labd = a(shape, np.uint16)
+        self.grown = a(shape)
+        self.ring = a(shape)
+        self.edge_ok = a(shape)
+        self.gx = a(shape, np.int16)
+        self.gy = a(shape, np.int16)
+        self.ax = a(shape)
+        self.ay = a(shape)
+
+    # ---------------- Stufen ----------------
+
+    def _components(self, mask: np.ndarray):
+        try:
+            n, labels, stats, _ = cv2.connectedComponentsWithStats(
+                mask, labels=self.labels, connectivity=8, ltype=cv2.CV_16U)
+        except cv2.error:
+            # mehr als 65535 Cluster passen nicht in 16 bit → 32 bit (selten, nur Rauschbilder)
+            n, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8, ltype=cv2.CV_32S)
+        self.labels = labels
+        return n, stats
+
+    def _compact(self, keep: np.ndarray) -> int:
+        """32-bit-Labels (nach _components-Fallback) auf die verbleibenden Cluster 1..k im 16-bit-Puffer
+        umnummerieren; liefert die neue Label-Anzahl, 0 wenn es auch danach zu viele sind."""
+        labels, self.labels = self.labels, self._labels16
+        k = int(np.count_nonzero(keep))
+        if k >= 65535:
+            return 0
+        lut = np.zeros(len(keep), np.uint16)
+        lut[keep] = np.arange(1, k + 1, dtype=np.uint16)
+        np.take(lut, labels, out=self.labels)
+        return k + 1
+
+    def _min_area(self, mask: np.ndarray, n: int, keep: np.ndarray):
+        """Cluster mit keep[label] == False aus Maske und Label-Bild entfernen (nur Masken-Pixel anfassen)."""
+        pts = cv2.findNonZero(mask).reshape(-1, 2)  # (x, y)
+        xs, ys = pts[:, 0], pts[:, 1]
+        drop = ~keep[self.labels[ys, xs]]
+        mask[ys[drop], xs[drop]] = 0
+        self.labels[ys[drop], xs[drop]] = 0
+
+    def _edges(self, gray: np.ndarray, sl):
+        gx, gy, ax, ay = self.gx[sl], self.gy[sl], self.ax[sl], self.ay[sl]
+        cv2.Sobel(gray, cv2.CV_16S, 1, 0, dst=gx, ksize=3)
+        cv2.Sobel(gray, cv2.CV_16S, 0, 1, dst=gy, ksize=3)
+        cv2.convertScaleAbs(gx, dst=ax)
+        cv2.convertScaleAbs(gy, dst=ay)
+        cv2.add(ax, ay, dst=ax)  # |gx|+|gy|, sättigend
+        # 255 = Wachstum erlaubt (Betrag < edge_threshold)
+        cv2.threshold(ax, self.edge_threshold - 1, 255, cv2.THRESH_BINARY_INV, dst=self.edge_ok[sl])
+
+    def _grow(self, mask: np.ndarray, gray: np.ndarray, n: int, sl):
+        """Wachstum auf dem Ausschnitt `sl` (alle Puffer als Views, keine Kopien); n = 0: ohne gray_delta."""
+        mask, gray = mask[sl], gray[sl]
+        labels, labd = self.labels[sl], self.labd[sl]
+        grown, ring, edge_ok = self.grown[sl], self.ring[sl], self.edge_ok[sl]
+        self._edges(gray, sl)
+        means = None
+        if self.gray_delta > 0 and n > 0:
+            # mittlerer Grauwert je Cluster, nur über die Masken-Pixel
+            pts = cv2.findNonZero(mask).reshape(-1, 2)
+            xs, ys = pts[:, 0], pts[:, 1]
+            lab = labels[ys, xs]
+            cnt = np.bincount(lab, minlength=n)
+            tot = np.bincount(lab, weights=gray[ys, xs], minlength=n)
+            means = (tot / np.maximum(cnt, 1)).astype(np.float32)
+        for _ in range(self.grow_iters):
+            cv2.dilate(mask, self._kernel, dst=grown)
+            # Ring = neu erreichbare Pixel, die die Kantenbedingung erfüllen
+            cv2.bitwise_xor(grown, mask, dst=ring)
+            cv2.bitwise_and(ring, edge_ok, dst=ring)
+            if means is None:
+                if not cv2.countNonZero(ring):
+                    break
+                cv2.bitwise_or(mask, ring, dst=mask)
+                continue
+            pts = cv2.findNonZero(ring)
+            if pts is None:
+                break
+            pts = pts.reshape(-1, 2)
+            rx, ry = pts[:, 0], pts[:, 1]
+            # Label des angrenzenden Clusters = Maximum im 3x3-Nachbarn
+            cv2.dilate(labels, self._kernel, dst=labd)
+            nb = labd[ry, rx]
+            ok = np.abs(gray[ry, rx].astype(np.float32) - means[nb]) <= self.gray_delta
+            if not ok.any():
+                break
+            ry, rx = ry[ok], rx[ok]
+            labels[ry, rx] = nb[ok]
+            mask[ry, rx] = 255
+
+    def apply(self, mask: np.ndarray, gray: np.ndarray) -> np.ndarray:
+        """Filtert `mask` (uint8 0/255) in-place; `gray` ist das ungefilterte Graubild."""
+        if not self.enabled or not cv2.countNonZero(mask):
+            return mask
+        if self._shape != mask.shape:
+            self._allocate(mask.shape)
+        n, stats = self._components(mask)
+        keep = stats[:, cv2.CC_STAT_AREA] >= self.min_pixels
+        keep[0] = False
+        if not keep.any():
+            mask[:] = 0
+            return mask
+        if not keep[1:].all():
+            self._min_area(mask, n, keep)
+        if self.labels is not self._labels16:
+            # cv2.dilate kann keine 32-bit-Labels → umnummerieren (nur nach dem Überlauf-Fallback)
+            n = self._compact(keep)
+        if self.grow_iters > 0:
+            # nur im Bounding-Box-Verbund der verbleibenden Cluster (+ Wachstumsrand) arbeiten
+            st = stats[keep]
+            pad = self.grow_iters + 1
+            x0 = max(0, int(st[:, cv2.CC_STAT_LEFT].min()) - pad)
+            y0 = max(0, int(st[:, cv2.CC_STAT_TOP].min()) - pad)
+            x1 = min(mask.shape[1], int((st[:, cv2.CC_STAT_LEFT] + st[:, cv2.CC_STAT_WIDTH]).max()) + pad)
+            y1 = min(mask.shape[0], int((st[:, cv2.CC_STAT_TOP] + st[:, cv2.CC_STAT_HEIGHT]).max()) + pad)
+            self._grow(mask, gray, n, (slice(y0, y1), slice(x0, x1)))
+        return mask
+
+
+def region_from_env(alloc: Optional[Callable] = None) -> RegionFilter:
+    """RegionFilter aus HL_MIN_REGION / HL_GROW_ITERS / HL_GROW_EDGE_T / HL_GROW_GRAY_DELTA."""
+    return RegionFilter(
+        min_pixels=int(float(os.environ.get("HL_MIN_REGION", "50"))),
+        grow_iters=int(float(os.environ.get("HL_GROW_ITERS", "2"))),
+        edge_threshold=int(float(os.environ.get("HL_GROW_EDGE_T", "20"))),
+        gray_delta=int(float(os.environ.get("HL_GROW_GRAY_DELTA", "0"))),
+        alloc=alloc,
+    )
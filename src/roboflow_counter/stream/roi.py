@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Statische ROI (Region of Interest) für die Motion-Pipeline
+- ein oder mehrere Polygone in Eingangspixeln, einmal pro Auflösung vorberechnet:
+  enges Bounding-Box-Fenster + Polygon-Maske innerhalb dieses Fensters
+- die Motion-Stufen (gray/gauss/EMA/threshold/morph/region) laufen nur im Fenster,
+  Masken-Pixel außerhalb der Polygone werden nach dem Threshold verworfen
+- außerhalb der ROI:  darken = wie Hintergrund behandeln (background_darken wirkt),
+                      pass   = Original unverändert durchreichen
+
+config.yml:
+  roi:
+    outside: darken
+    polygons:
+      - [[200, 100], [1700, 100], [1700, 900], [200, 900]]
+"""
+
+from __future__ import annotations
+import json
+import math
+import os
+from typing import List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+OUTSIDE = ("darken", "pass")
+
+
+class Roi:
+    def __init__(self, polygons: Optional[Sequence] = None, outside: str = "darken"):
+        outside = (outside or "darken").lower().strip()
+        if outside not in OUTSIDE:
+            raise ValueError(f"unknown roi outside mode '{outside}' (expected one of {', '.join(OUTSIDE)})")
+        self.outside = outside
+        self.polygons: List[np.ndarray] = []
+        for p in polygons or []:
+            a = np.asarray(p, np.float32).reshape(-1, 2)
+            if len(a) < 3:
+                raise ValueError("roi: polygon needs at least 3 points")
+            self.polygons.append(a)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.polygons)
+
+    def rect(self, w: int, h: int) -> tuple[int, int, int, int]:
+        """Bounding Box (x, y, bw, bh) aller Polygone, auf das Bild begrenzt; ohne Polygone das ganze Bild."""
+        if not self.enabled:
+            return 0, 0, w, h
+        pts = np.concatenate(self.polygons)
+        x0 = max(0, int(math.floor(float(pts[:, 0].min()))))
+        y0 = max(0, int(math.floor(float(pts[:, 1].min()))))
+        x1 = min(w, int(math.ceil(float(pts[:, 0].max()))) + 1)
+        y1 = min(h, int(math.ceil(float(pts[:, 1].max()))) + 1)
+        if x1 <= x0 or y1 <= y0:
+            raise ValueError(f"roi: polygons outside the {w}x{h} frame")
+        return x0, y0, x1 - x0, y1 - y0
+
+    def mask(self, size: tuple[int, int], origin: tuple[int, int] = (0, 0), scale: float = 1.0) -> np.ndarray:
+        """Polygon-Maske (uint8 0/255) der Größe size=(w, h); Punkte werden um origin verschoben und skaliert."""
+        m = np.zeros((size[1], size[0]), np.uint8)
+        off = np.asarray(origin, np.float32)
+        polys = [np.round((p - off) * scale).astype(np.int32) for p in self.polygons]
+        cv2.fillPoly(m, polys, 255)
+        return m
+
+
+def roi_from_env() -> Roi:
+    """Roi aus HL_ROI (JSON-Liste von Polygonen) und HL_ROI_OUTSIDE (darken|pass)."""
+    raw = os.environ.get("HL_ROI", "").strip()
+    polygons = json.loads(raw) if raw else []
+    return Roi(polygons, os.environ.get("HL_ROI_OUTSIDE", "darken"))
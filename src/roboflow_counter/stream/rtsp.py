@@ -16,6 +16,13 @@ try:
 except Exception:
     pass
 
+def _wait_shutdown(seconds: float) -> bool:
+    """Sleep up to `seconds`, return early (True) once SIGINT/SIGTERM was received."""
+    end = time.time() + seconds
+    while not _SHUTDOWN and time.time() < end:
+        time.sleep(min(0.2, max(0.0, end - time.time())))
+    return _SHUTDOWN
+
 def _set_transport_env(transport: str):
     if transport:
         try:
@@ -27,35 +34,42 @@ def run_rtsp_loop(url: str,
                   fps_target: Optional[float] = None,
                   open_timeout_ms: int = 5000,
                   transport: str = "tcp",
-                  log_level: str = "INFO") -> int:
+                  log_level: str = "INFO",
+                  policy: str = "latest",
+                  depth: int = 2) -> int:
     """
     RTSP reader with health logging:
-    - Open/read with reconnect backoff (1s..10s)
+    - Capture on its own thread (stream.capture.FrameGrabber), reconnect backoff (1s..10s),
+      also while the first open fails (camera not up yet)
     - Smoothed FPS (EMA)
-    - Drop-rate and reconnect counters
+    - Decoded/dropped/stale and reconnect counters
     - Graceful shutdown on SIGINT/SIGTERM
-    Returns exit code (0=ok).
+    Returns exit code (0=ok, also on shutdown before the first open succeeded).
     """
     log = setup_logger("rtsp", log_level)
 
     try:
-        import cv2  # type: ignore
+        import cv2  # type: ignore  # noqa: F401
     except Exception as e:
         print(f"[rtsp] OpenCV not available: {e}")
         return 2
+    from .capture import FrameGrabber
 
     _set_transport_env(transport)
 
-    def open_cap():
-        cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+    # first open: keep retrying with backoff (1s..10s) until the camera is up or shutdown is requested
+    grabber = None
+    backoff = 1.0
+    while grabber is None:
         try:
-            cap.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, float(open_timeout_ms))
-        except Exception:
-            pass
-        return cap
+            grabber = FrameGrabber(url, open_timeout_ms=open_timeout_ms, policy=policy,
+                                   depth=depth, log_level=log_level).start()
+        except RuntimeError as e:
+            log.error("%s, retry in %.1fs …", e, backoff)
+            if _wait_shutdown(backoff):
+                return 0
+            backoff = min(backoff * 2, 10.0)
 
-    cap = open_cap()
-    backoff = 1.0
     last_log = time.time()
     frames = 0
     start = time.time()
@@ -77,34 +91,24 @@ def run_rtsp_loop(url: str,
             elapsed = now - start
             inst = frames / elapsed if elapsed > 0 else 0.0
             ema_fps = inst if ema_fps is None else (alpha * inst + (1 - alpha) * ema_fps)
-            log.info("frames=%d, fps~%.2f (ema=%.2f, target=%s)",
-                     frames, inst, (ema_fps or 0.0), (fps_target if fps_target else "∞"))
+            st = grabber.stats()
+            log.info("frames=%d, fps~%.2f (ema=%.2f, target=%s) decoded=%d dropped=%d stale=%d reconnects=%d",
+                     frames, inst, (ema_fps or 0.0), (fps_target if fps_target else "∞"),
+                     st["decoded"], st["dropped"], st["stale"], st["reconnects"])
             return True
         return False
 
-    while True:
-        if not cap.isOpened():
-            log.warning("not opened, retry in %.1fs …", backoff)
-            time.sleep(backoff)
-            cap.release()
-            cap = open_cap()
-            backoff = min(backoff * 2, 10)
-            continue
-
-        t0 = time.time()
-        ok, _ = cap.read()
-        if not ok:
-            # Try to detect reason: we can't access low-level ffmpeg here, so inform generic
-            log.error("read failed (network jitter/timeout?). Reconnecting in %.1fs …", backoff)
-            cap.release()
-            time.sleep(backoff)
-            cap = open_cap()
-            backoff = min(backoff * 2, 10)
-            continue
+    try:
+        while not _SHUTDOWN:
+            t0 = time.time()
+            _, frame = grabber.read(timeout=1.0)
+            if frame is None:
+                continue
 
-        frames += 1
-        backoff = 1.0
-        throttle(fps_target, t0)
-        if log_rate():
-            last_log = time.time()
-    # unreachable; Ctrl+C handled by caller
+            frames += 1
+            throttle(fps_target, t0)
+            if log_rate():
+                last_log = time.time()
+    finally:
+        grabber.stop()
+    return 0
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-Kamera-Supervisor: eine Highlight-Pipeline pro Stream, jede in eigenem Prozess
+- Streams aus config.yml `streams:` (Liste); jeder Eintrag überschreibt die globalen
+  Abschnitte (input/output/highlight/motion/region/counting/runtime ...) per Deep-Merge
+- Prozesse per "spawn" (kein geerbter CUDA-/OpenCV-Thread-Zustand aus dem Elternprozess)
+- optional CPU-Pinning (os.sched_setaffinity): `cpus: [2, 3]` je Stream oder
+  supervisor.pin_cpus: auto (Worker i → i-ter erlaubter Kern, reihum)
+- abgestürzte Worker werden mit Backoff (1 s, 2 s, 4 s ... backoff_max_sec) neu gestartet;
+  läuft ein Worker länger als stable_sec, beginnt der Backoff wieder bei 1 s
+- Worker melden FPS/Drop-Zähler über eine Queue, der Supervisor loggt sie gesammelt
+- SIGHUP an den Supervisor wird an alle Worker weitergereicht; jeder Worker lädt seine Laufzeit-
+  Parameter (config/runtime.py) neu, inkl. Stream-Überschreibungen – ohne Neustart der Prozesse
+
+config.yml:
+  supervisor:
+    pin_cpus: auto            # auto | none
+    backoff_max_sec: 30
+    stable_sec: 60
+    stats_interval_sec: 10
+  streams:
+    - name: sieb1
+      input:  { rtsp_url: "rtsps://..." }
+      output: { rtsp_url: "rtsp://127.0.0.1:8554/sieb1" }
+      cpus: [2]               # optional, überschreibt pin_cpus
+      motion: { threshold: 40 }
+"""
+
+from __future__ import annotations
+import copy
+import multiprocessing as mp
+import os
+import queue
+import signal
+import time
+from typing import Any, Dict, List, Optional
+
+from ..config.loader import inject_rtsp_credentials, load_config
+from ..util.logging import setup_logger
+
+# Schlüssel eines Stream-Eintrags, die nicht in die Pipeline-Config gemergt werden
+_STREAM_KEYS = ("name", "cpus")
+
+
+def _deep_merge(base: Dict[str, Any], over: Dict[str, Any]) -> Dict[str, Any]:
+    for k, v in over.items():
+        if isinstance(v, dict) and isinstance(base.get(k), dict):
+            _deep_merge(base[k], v)
+        else:
+            base[k] = copy.deepcopy(v)
+    return base
+
+
+def _parse_cpus(v) -> Optional[List[int]]:
+    if v is None or v is False:
+        return None
+    if isinstance(v, int):
+        return [v]
+    return [int(c) for c in v]
+
+
+def build_streams(cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """`streams:` → Liste von {name, cfg, cpus}; ohne `streams:` ein einzelner Stream aus input/output."""
+    base = {k: v for k, v in cfg.items() if k not in ("streams", "supervisor")}
+    entries = cfg.get("streams") or [{"name": "main"}]
+    sv = cfg.get("supervisor") or {}
+    pin = str(sv.get("pin_cpus", "none")).lower()
+    allowed = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+
+    specs, names, outs = [], set(), set()
+    for i, s in enumerate(entries):
+        name = str(s.get("name") or f"cam{i}")
+        if name in names:
+            raise ValueError(f"streams: duplicate name '{name}'")
+        scfg = _deep_merge(copy.deepcopy(base), {k: v for k, v in s.items() if k not in _STREAM_KEYS})
+        inject_rtsp_credentials(scfg.get("input") or {})
+        ui = (scfg.get("input") or {}).get("rtsp_url")
+        uo = (scfg.get("output") or {}).get("rtsp_url")
+        if not ui or not uo:
+            raise ValueError(f"streams[{name}]: missing input/output rtsp_url")
+        if uo in outs:
+            raise ValueError(f"streams[{name}]: output {uo} used by more than one stream")
+        # gemeinsamer metrics.port → ein Port pro Stream (port + Index), außer explizit gesetzt
+        me = scfg.get("metrics") or {}
+        if int(me.get("port", 0) or 0) > 0 and "port" not in (s.get("metrics") or {}):
+            me["port"] = int(me["port"]) + i
+        cpus = _parse_cpus(s.get("cpus"))
+        if cpus is None and pin == "auto" and allowed:
+            cpus = [allowed[i % len(allowed)]]
+        names.add(name)
+        outs.add(uo)
+        specs.append({"name": name, "cfg": scfg, "cpus": cpus})
+    return specs
+
+
+# ---------------- Worker (läuft im Kindprozess) ----------------
+
+def _raise_interrupt(signum, frame):
+    # nur einmal: ein zweites Signal (Strg+C an die Gruppe + terminate) soll das Aufräumen nicht abbrechen
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise KeyboardInterrupt
+
+
+def _stream_cfg(cfg_path: str, env_path: str, name: str) -> Dict[str, Any]:
+    """Gemergte Config eines Streams frisch aus config.yml (für den Hot Reload im Worker)."""
+    for s in build_streams(load_config(cfg_path, env_path)):
+        if s["name"] == name:
+            return s["cfg"]
+    raise ValueError(f"stream '{name}' no longer in config")
+
+
+def _worker(spec: Dict[str, Any], stats_q, log_level: str):
+    # SIGTERM vom Supervisor → KeyboardInterrupt → run_highlight_loop räumt Writer/Grabber auf
+    signal.signal(signal.SIGINT, _raise_interrupt)
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    # SIGHUP vor dem Laden des Stores nicht als Abbruch werten (Default-Aktion beendet den Prozess)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    stats_q.cancel_join_thread()
+    name, cpus = spec["name"], spec["cpus"]
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+        import cv2
+        cv2.setNumThreads(len(cpus))  # OpenCV-Threads nicht über die gepinnten Kerne hinaus
+
+    from ..config.runtime import ParamStore
+    from ..config.schema import RuntimeParams
+    from ..main import _apply_env_from_cfg
+    from .highlight import run_highlight_loop
+
+    cfg = spec["cfg"]
+    fps, timeout = _apply_env_from_cfg(cfg)
+    os.environ["HL_STREAM"] = name  # Label stream="..." in /metrics
+    print(f"[INFO] [{name}] pid={os.getpid()} cpus={cpus or 'all'}")
+
+    def on_stats(st):
+        try:
+            stats_q.put_nowait((name, os.getpid(), st))
+        except queue.Full:
+            pass
+
+    load = None
+    if spec.get("cfg_path"):
+        load = lambda: _stream_cfg(spec["cfg_path"], spec.get("env_path") or "config/.env", name)  # noqa: E731
+    params = ParamStore(RuntimeParams.from_cfg(cfg), load=load, path=spec.get("cfg_path"),
+                        poll_sec=(cfg.get("runtime") or {}).get("reload_sec", 2), log_level=log_level)
+    params.install_sighup()
+    params.start()
+    try:
+        run_highlight_loop(cfg["input"]["rtsp_url"], cfg["output"]["rtsp_url"], log=log_level,
+                           fps_target=fps, open_timeout_ms=timeout, counting=cfg.get("counting"),
+                           on_stats=on_stats, params=params)
+    finally:
+        params.close()
+
+
+# ---------------- Supervisor (Elternprozess) ----------------
+
+class _Slot:
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self.name = spec["name"]
+        self.proc: Optional[mp.Process] = None
+        self.started = 0.0
+        self.next_start = 0.0
+        self.fails = 0
+        self.restarts = 0
+        self.last: Dict[str, Any] = {}
+        # Zähler früherer Prozesse dieses Streams (die Worker zählen je Prozess ab 0)
+        self.carry = {"frames": 0, "cap_dropped": 0, "out_dropped": 0}
+
+
+class Supervisor:
+    def __init__(self, streams: List[Dict[str, Any]], log_level: str = "INFO",
+                 backoff_max: float = 30.0, stable_sec: float = 60.0, stats_interval: float = 10.0):
+        if not streams:
+            raise ValueError("no streams configured")
+        self.log = setup_logger("supervisor", log_level)
+        self.log_level = log_level
+        self.backoff_max = max(1.0, float(backoff_max))
+        self.stable_sec = float(stable_sec)
+        self.stats_interval = max(1.0, float(stats_interval))
+        self._ctx = mp.get_context("spawn")
+        self._q = self._ctx.Queue(maxsize=1024)
+        self.slots = [_Slot(s) for s in streams]
+        self._stop = False
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any], log_level: str = "INFO", cfg_path: Optional[str] = None,
+                    env_path: Optional[str] = None) -> "Supervisor":
+        """cfg_path/env_path: Worker laden ihre Laufzeit-Parameter bei Änderung/SIGHUP daraus neu."""
+        sv = cfg.get("supervisor") or {}
+        streams = build_streams(cfg)
+        for s in streams:
+            s["cfg_path"], s["env_path"] = cfg_path, env_path
+        return cls(streams, log_level=log_level,
+                   backoff_max=sv.get("backoff_max_sec", 30), stable_sec=sv.get("stable_sec", 60),
+                   stats_interval=sv.get("stats_interval_sec", 10))
+
+    def _request_stop(self, signum, frame):
+        self._stop = True
+
+    def _forward_hup(self, signum, frame):
+        """SIGHUP an alle laufenden Worker weiterreichen (Hot Reload der Parameter)."""
+        for slot in self.slots:
+            if slot.proc is not None and slot.proc.is_alive():
+                try:
+                    os.kill(slot.proc.pid, signal.SIGHUP)
+                except OSError:
+                    pass
+
+    # ---------------- Prozesse ----------------
+
+    def _start(self, slot: _Slot):
+        p = self._ctx.Process(target=_worker, args=(slot.spec, self._q, self.log_level),
+                              name=f"hl-{slot.name}", daemon=False)
+        p.start()
+        slot.proc, slot.started = p, time.monotonic()
+        self.log.info("%s: started pid=%d cpus=%s", slot.name, p.pid, slot.spec["cpus"] or "all")
+
+    def _reap(self, slot: _Slot, now: float):
+        code = slot.proc.exitcode
+        slot.proc.join()
+        slot.proc = None
+        st = slot.last
+        slot.carry["frames"] += st.get("frames", 0)
+        slot.carry["cap_dropped"] += (st.get("capture") or {}).get("dropped", 0)
+        slot.carry["out_dropped"] += (st.get("writer") or {}).get("dropped", 0)
+        slot.last = {}
+        if now - slot.started >= self.stable_sec:
+            slot.fails = 0
+        slot.fails += 1
+        slot.restarts += 1
+        delay = min(self.backoff_max, 2.0 ** (slot.fails - 1))
+        slot.next_start = now + delay
+        self.log.warning("%s: worker exited (code %s), restart in %.0fs", slot.name, code, delay)
+
+    def _drain(self, timeout: float):
+        try:
+            name, pid, st = self._q.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            for slot in self.slots:
+                # verspätete Meldungen eines schon beendeten Prozesses ignorieren
+                if slot.name == name and slot.proc is not None and slot.proc.pid == pid:
+                    slot.last = st
+            try:
+                name, pid, st = self._q.get_nowait()
+            except queue.Empty:
+                return
+
+    def stop(self, timeout: float = 5.0):
+        for slot in self.slots:
+            if slot.proc is not None and slot.proc.is_alive():
+                slot.proc.terminate()
+        deadline = time.monotonic() + timeout
+        for slot in self.slots:
+            if slot.proc is None:
+                continue
+            slot.proc.join(max(0.1, deadline - time.monotonic()))
+            if slot.proc.is_alive():
+                self.log.warning("%s: worker did not stop, killing", slot.name)
+                slot.proc.kill()
+                slot.proc.join()
+            slot.proc = None
+
+    # ---------------- Stats ----------------
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Aktuelle Zähler je Stream (Drops/Frames kumuliert über Neustarts)."""
+        out = []
+        for s in self.slots:
+            st = s.last
+            cap, wr = st.get("capture") or {}, st.get("writer") or {}
+            out.append({
+                "name": s.name,
+                "pid": s.proc.pid if s.proc is not None else None,
+                "alive": s.proc is not None and s.proc.is_alive(),
+                "cpus": s.spec["cpus"],
+                "fps": st.get("fps", 0.0),
+                "frames": s.carry["frames"] + st.get("frames", 0),
+                "cap_dropped": s.carry["cap_dropped"] + cap.get("dropped", 0),
+                "out_dropped": s.carry["out_dropped"] + wr.get("dropped", 0),
+                "reconnects": cap.get("reconnects", 0),
+                "restarts": s.restarts,
+            })
+        return out
+
+    def _log_stats(self):
+        snap = self.snapshot()
+        for r in snap:
+            self.log.info("%-12s %s fps=%5.2f frames=%d cap_dropped=%d out_dropped=%d reconnects=%d restarts=%d",
+                          r["name"], "up  " if r["alive"] else "down", r["fps"], r["frames"],
+                          r["cap_dropped"], r["out_dropped"], r["reconnects"], r["restarts"])
+        self.log.info("total: %d/%d up, fps=%.2f", sum(r["alive"] for r in snap), len(snap),
+                      sum(r["fps"] for r in snap))
+
+    # ---------------- Hauptschleife ----------------
+
+    def run(self) -> int:
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._forward_hup)
+        self.log.info("starting %d stream(s)", len(self.slots))
+        t_log = time.monotonic()
+        try:
+            while not self._stop:
+                now = time.monotonic()
+                for slot in self.slots:
+                    if slot.proc is not None and not slot.proc.is_alive():
+                        self._reap(slot, now)
+                    if slot.proc is None and now >= slot.next_start:
+                        self._start(slot)
+                self._drain(timeout=0.5)
+                if time.monotonic() - t_log >= self.stats_interval:
+                    t_log = time.monotonic()
+                    self._log_stats()
+        finally:
+            self.log.info("stopping workers")
+            self.stop()
+        return 0
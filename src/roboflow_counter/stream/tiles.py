@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motion-Gating für die Inferenz: statt ganzer Frames nur Kacheln um die Bewegung an den Server
+- Blobs der bereinigten Bewegungsmaske: Bounding-Boxen der Außenkonturen (findContours, dieselben Boxen wie
+  Connected Components, aber ein Bruchteil der Zeit), Boxen kleiner als min_area Maskenpixel ignoriert
+- Bounding-Boxen in Eingangspixel umrechnen ((p / scale) + ROI-Offset), um pad Pixel erweitern,
+  mindestens min_side groß (Kontext für das Modell), an den Bildrand geklemmt
+- überlappende bzw. höchstens merge_gap Pixel entfernte Kacheln zusammenfassen; bleiben mehr als
+  max_tiles, wird jeweils das Paar mit dem kleinsten Flächenzuwachs vereinigt
+- decken die Kacheln mehr als full_ratio des Bildes ab, geht das ganze Frame (eine Kachel)
+- keine Bewegung → keine Kachel, das Frame wird übersprungen
+- Zähler: frames (geprüft), skipped (ohne Bewegung), tiles, Anteil gesendeter Pixel (sent_ratio)
+
+Die Detections der Kacheln rechnet stream/inference.py über den Kachel-Ursprung auf Vollbild-Koordinaten
+zurück (submit(..., tiles=...)) und liefert je Frame ein zusammengefasstes Ergebnis.
+
+config.yml:
+  inference:
+    tiles:
+      enabled: true
+      pad: 32            # Rand um jeden Blob (Eingangspixel)
+      min_side: 160      # Mindestgröße einer Kachel
+      min_area: 4        # Blobs mit kleinerer Box (Maskenpixel) ignorieren
+      merge_gap: 16      # Kacheln mit höchstens so viel Abstand zusammenfassen
+      max_tiles: 8
+      full_ratio: 0.6    # mehr Fläche → ganzes Frame senden
+"""
+
+from __future__ import annotations
+import os
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+Tile = Tuple[int, int, int, int]  # x, y, w, h in Eingangspixeln
+
+
+def _union(a: Tile, b: Tile) -> Tile:
+    x0, y0 = min(a[0], b[0]), min(a[1], b[1])
+    x1, y1 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def _near(a: Tile, b: Tile, gap: int) -> bool:
+    return (a[0] - gap < b[0] + b[2] and b[0] - gap < a[0] + a[2] and
+            a[1] - gap < b[1] + b[3] and b[1] - gap < a[1] + a[3])
+
+
+def merge_tiles(tiles: List[Tile], gap: int = 0, max_tiles: int = 0) -> List[Tile]:
+    """Überlappende/nahe Rechtecke vereinigen, danach höchstens max_tiles (0 = unbegrenzt)."""
+    out = list(tiles)
+    changed = True
+    while changed:  # Vereinigungen können neue Überlappungen erzeugen → bis stabil
+        changed = False
+        i = 0
+        while i < len(out):
+            j = i + 1
+            while j < len(out):
+                if _near(out[i], out[j], gap):
+                    out[i] = _union(out[i], out.pop(j))
+                    changed = True
+                else:
+                    j += 1
+            i += 1
+    while max_tiles > 0 and len(out) > max_tiles:
+        best = None
+        for i in range(len(out)):
+            for j in range(i + 1, len(out)):
+                u = _union(out[i], out[j])
+                cost = u[2] * u[3] - out[i][2] * out[i][3] - out[j][2] * out[j][3]
+                if best is None or cost < best[0]:
+                    best = (cost, i, j, u)
+        _, i, j, u = best
+        out.pop(j)
+        out[i] = u
+        out = merge_tiles(out, gap)  # die größere Kachel kann weitere berühren
+    return out
+
+
+class TileGate:
+    def __init__(self, width: int, height: int, scale: float = 1.0, offset: tuple = (0, 0), pad: int = 32,
+                 min_side: int = 160, min_area: int = 4, merge_gap: int = 16, max_tiles: int = 8,
+                 full_ratio: float = 0.6):
+        self.w, self.h = int(width), int(height)
+        self.scale = float(scale)
+        self.x0, self.y0 = int(offset[0]), int(offset[1])
+        self.pad = max(0, int(pad))
+        self.min_side = max(1, int(min_side))
+        self.min_area = max(1, int(min_area))
+        self.gap = max(0, int(merge_gap))
+        self.max_tiles = max(0, int(max_tiles))
+        self.full_ratio = float(full_ratio)
+
+        # Zähler
+        self.frames = 0
+        self.skipped = 0
+        self.tiles = 0
+        self.full = 0
+        self.px_total = 0
+        self.px_sent = 0
+
+    def _box(self, x: float, y: float, w: float, h: float) -> Tile:
+        """Masken-Box → Eingangspixel, gepolstert, Mindestgröße, am Bildrand geklemmt."""
+        s = self.scale
+        x0 = int(x / s) + self.x0 - self.pad
+        y0 = int(y / s) + self.y0 - self.pad
+        x1 = int(np.ceil((x + w) / s)) + self.x0 + self.pad
+        y1 = int(np.ceil((y + h) / s)) + self.y0 + self.pad
+        side_w, side_h = min(self.min_side, self.w), min(self.min_side, self.h)
+        if x1 - x0 < side_w:
+            x0 -= (side_w - (x1 - x0)) // 2
+            x1 = x0 + side_w
+        if y1 - y0 < side_h:
+            y0 -= (side_h - (y1 - y0)) // 2
+            y1 = y0 + side_h
+        # verschieben statt abschneiden, damit die Mindestgröße am Rand erhalten bleibt
+        dx = max(0, -x0) - max(0, x1 - self.w)
+        dy = max(0, -y0) - max(0, y1 - self.h)
+        x0, x1, y0, y1 = x0 + dx, x1 + dx, y0 + dy, y1 + dy
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.w, x1), min(self.h, y1)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def plan(self, mask: np.ndarray) -> List[Tile]:
+        """Kacheln für dieses Frame ([] = keine Bewegung, überspringen)."""
+        self.frames += 1
+        self.px_total += self.w * self.h
+        boxes = []
+        if cv2.countNonZero(mask):
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            for c in contours:
+                x, y, w, h = cv2.boundingRect(c)
+                if w * h >= self.min_area:
+                    boxes.append(self._box(x, y, w, h))
+        if not boxes:
+            self.skipped += 1
+            return []
+        tiles = merge_tiles(boxes, self.gap, self.max_tiles)
+        area = sum(t[2] * t[3] for t in tiles)
+        if area > self.full_ratio * self.w * self.h:
+            self.full += 1
+            tiles, area = [(0, 0, self.w, self.h)], self.w * self.h
+        self.tiles += len(tiles)
+        self.px_sent += area
+        return tiles
+
+    @property
+    def sent_ratio(self) -> float:
+        """Anteil der Pixel, die tatsächlich zur Inferenz gingen (1.0 = jedes geprüfte Frame komplett)."""
+        return self.px_sent / self.px_total if self.px_total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "gate_frames": self.frames,
+            "gate_skipped": self.skipped,
+            "gate_full": self.full,
+            "tiles": self.tiles,
+            "px_sent": self.px_sent,
+            "px_total": self.px_total,
+            "sent_ratio": round(self.sent_ratio, 4),
+        }
+
+
+def tiles_from_env(width: int, height: int, scale: float = 1.0, offset: tuple = (0, 0)) -> Optional[TileGate]:
+    """TileGate aus HL_INFER_TILE* (HL_INFER_TILES leer/0 = ganze Frames senden)."""
+    if os.environ.get("HL_INFER_TILES", "").strip() in ("", "0"):
+        return None
+    return TileGate(
+        width, height, scale, offset,
+        pad=int(os.environ.get("HL_INFER_TILE_PAD", "32")),
+        min_side=int(os.environ.get("HL_INFER_TILE_MIN_SIDE", "160")),
+        min_area=int(os.environ.get("HL_INFER_TILE_MIN_AREA", "4")),
+        merge_gap=int(os.environ.get("HL_INFER_TILE_GAP", "16")),
+        max_tiles=int(os.environ.get("HL_INFER_TILE_MAX", "8")),
+        full_ratio=float(os.environ.get("HL_INFER_TILE_FULL_RATIO", "0.6")),
+    )
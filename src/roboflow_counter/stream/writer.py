@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Writer-Stufe: FFmpeg-Pipe in eigenem Thread
+- kleiner Pool von Host-Puffern (h, w, 3) uint8; die Pipeline rendert direkt hinein
+  (acquire → render → submit), geschrieben wird als memoryview ohne Kopie
+- Policy, wenn der Encoder/RTSP-Server hinterherhängt:
+    drop_oldest = ältestes wartendes Frame verwerfen (Default, geringste Latenz)
+    drop_newest = neues Frame verwerfen (acquire() liefert None)
+    block       = Pipeline wartet, bis ein Puffer frei ist
+- stderr von ffmpeg wird in einem Thread gelesen und geloggt, stdout → DEVNULL
+  (ungelesene PIPEs können ffmpeg und damit den Prozess blockieren)
+- Zähler: written, dropped, pipe_errors, Schreiblatenz (EMA/max in ms); optional Stufen-Timer "write"
+"""
+
+from __future__ import annotations
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+
+from ..util.logging import setup_logger
+
+POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class FfmpegWriter:
+    def __init__(self, cmd: list[str], w: int, h: int, policy: str = "drop_oldest", depth: int = 2,
+                 alloc: Optional[Callable[[], np.ndarray]] = None, log_level: str = "INFO"):
+        policy = (policy or "drop_oldest").lower().strip()
+        if policy not in POLICIES:
+            raise ValueError(f"unknown writer policy '{policy}' (expected one of {', '.join(POLICIES)})")
+        self.cmd = cmd
+        self.w, self.h = w, h
+        self.frame_bytes = w * h * 3
+        self.policy = policy
+        self.log = setup_logger("ffmpeg", log_level)
+
+        # Pool: depth wartend + 1 in Arbeit beim Writer + 1 in Arbeit bei der Pipeline
+        alloc = alloc or (lambda: np.empty((h, w, 3), np.uint8))
+        self._free: list[np.ndarray] = [alloc() for _ in range(max(1, int(depth)) + 2)]
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._error: Optional[str] = None
+
+        # Zähler
+        self.written = 0
+        self.dropped = 0
+        self.write_ms_ema: Optional[float] = None
+        self.write_ms_max = 0.0
+        self.pipe_errors = 0
+        self.metrics = None  # optional stream.metrics.Metrics
+
+        self.proc: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._err_thread: Optional[threading.Thread] = None
+
+    # ---------------- Lifecycle ----------------
+
+    def start(self) -> "FfmpegWriter":
+        print("[FFMPEG]", " ".join(self.cmd))
+        self.proc = subprocess.Popen(self.cmd, stdin=subprocess.PIPE,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        self._err_thread = threading.Thread(target=self._drain_stderr, name="ffmpeg-stderr", daemon=True)
+        self._err_thread.start()
+        self._thread = threading.Thread(target=self._run, name="ffmpeg-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, timeout: float = 2.0, finish: bool = False):
+        """
+        Wartende Frames noch schreiben (max. timeout), dann Pipe schließen und ffmpeg beenden.
+        finish=True (Dateiausgabe): ffmpeg nach EOF selbst fertig kodieren lassen statt terminate().
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        if self.proc is not None:
+            try:
+                self.proc.stdin.close()
+            except Exception:
+                pass
+            if finish:
+                try:
+                    self.proc.wait(timeout=timeout)
+                except Exception:
+                    pass
+            try:
+                self.proc.terminate()
+            except Exception:
+                pass
+            try:
+                self.proc.wait(timeout=timeout)
+            except Exception:
+                self.proc.kill()
+        if self._err_thread is not None:
+            self._err_thread.join(timeout=0.5)
+
+    # ---------------- Pipeline-Seite ----------------
+
+    def acquire(self) -> Optional[np.ndarray]:
+        """Freien Puffer holen. None = Frame verwerfen (drop_newest bei vollem Pool)."""
+        with self._cond:
+            self._check()
+            if self._free:
+                return self._free.pop()
+            if self.policy == "drop_newest":
+                self.dropped += 1
+                return None
+            if self.policy == "drop_oldest" and self._queue:
+                self.dropped += 1
+                return self._queue.popleft()
+            # block (oder drop_oldest, während der Writer den einzigen Puffer schreibt)
+            while not self._free:
+                self._cond.wait(0.5)
+                self._check()
+            return self._free.pop()
+
+    def submit(self, buf: np.ndarray):
+        if buf.nbytes != self.frame_bytes or not buf.flags["C_CONTIGUOUS"]:
+            raise RuntimeError(f"bad frame buffer: {buf.shape} {buf.dtype}")
+        with self._cond:
+            self._check()
+            self._queue.append(buf)
+            self._cond.notify_all()
+
+    def _check(self):
+        if self._error:
+            raise RuntimeError(self._error)
+
+    # ---------------- Writer-Thread ----------------
+
+    def _run(self):
+        stdin = self.proc.stdin
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                buf = self._queue.popleft()
+            t0 = time.perf_counter()
+            try:
+                stdin.write(memoryview(buf).cast("B"))
+                stdin.flush()
+            except (BrokenPipeError, OSError, ValueError, AttributeError):
+                with self._cond:
+                    self.pipe_errors += 1
+                    self._error = "ffmpeg pipe closed"
+                    self._free.append(buf)
+                    self._cond.notify_all()
+                return
+            if self.metrics is not None:
+                self.metrics.lap("write", t0)
+            ms = (time.perf_counter() - t0) * 1000.0
+            with self._cond:
+                self.written += 1
+                self.write_ms_ema = ms if self.write_ms_ema is None else (0.9 * self.write_ms_ema + 0.1 * ms)
+                self.write_ms_max = max(self.write_ms_max, ms)
+                self._free.append(buf)
+                self._cond.notify_all()
+
+    def _drain_stderr(self):
+        for line in iter(self.proc.stderr.readline, b""):
+            msg = line.decode("utf-8", "replace").rstrip()
+            if msg:
+                self.log.warning("%s", msg)
+
+    def stats(self) -> dict:
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "pipe_errors": self.pipe_errors,
+            "queued": len(self._queue),
+            "write_ms": round(self.write_ms_ema or 0.0, 2),
+            "write_ms_max": round(self.write_ms_max, 2),
+        }
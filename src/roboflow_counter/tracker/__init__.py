@@ -0,0 +1 @@
+# tracker package
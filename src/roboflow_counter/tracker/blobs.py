@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Blob-Extraktion aus der Bewegungsmaske (uint8 0/255)
+- Connected Components (8er-Nachbarschaft) mit Stats, komplett in cv2/NumPy
+- Rückgabe als Arrays: boxes (N, 4) x, y, w, h und centroids (N, 2) x, y, float32
+"""
+
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+
+def extract_blobs(mask: np.ndarray, min_area: int = 0, max_area: int = 0):
+    """Blobs mit min_area <= Fläche (<= max_area, 0 = unbegrenzt) als (boxes, centroids, areas)."""
+    if not cv2.countNonZero(mask):
+        return (np.empty((0, 4), np.float32), np.empty((0, 2), np.float32), np.empty(0, np.int32))
+    try:
+        n, _, stats, cents = cv2.connectedComponentsWithStats(mask, connectivity=8, ltype=cv2.CV_16U)
+    except cv2.error:
+        n, _, stats, cents = cv2.connectedComponentsWithStats(mask, connectivity=8, ltype=cv2.CV_32S)
+    stats, cents = stats[1:], cents[1:]
+    areas = stats[:, cv2.CC_STAT_AREA]
+    keep = areas >= min_area
+    if max_area > 0:
+        keep &= areas <= max_area
+    boxes = stats[keep, :4].astype(np.float32)
+    return boxes, cents[keep].astype(np.float32), areas[keep].astype(np.int32)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Zählstufe: Blobs aus der Bewegungsmaske → Tracker → Zähllinien/-zonen → Intervall-Zähler
+
+config.yml (Koordinaten in Pixeln des Eingangsbildes):
+  counting:
+    enabled: true
+    interval_sec: 60          # Zählintervall für die Ausgabe
+    min_area: 60              # kleinere Blobs ignorieren (px)
+    max_area: 0               # 0 = unbegrenzt
+    max_dist: 40              # Gate/Zellgröße des Trackers (px pro Frame)
+    max_missed: 5             # Frames ohne Treffer, bis ein Track verworfen wird
+    iou_weight: 0.5
+    lines:
+      - name: auslauf
+        points: [[100, 600], [1800, 600]]
+    zones:
+      - name: sieb
+        polygon: [[200, 100], [1700, 100], [1700, 900], [200, 900]]
+
+Bei verkleinerter Analyse-Auflösung (analysis_scale) bzw. ROI-Fenster rechnet
+CountingEngine(cfg, scale, offset) Linien, Zonen, Flächen und max_dist auf die Maskenkoordinaten
+um ((p - offset) * scale); die Config bleibt in Eingangspixeln.
+
+Linie: Richtung "in" = Wechsel von links nach rechts bezogen auf p1 → p2 (Kreuzprodukt > 0),
+"out" = umgekehrt; ein Zentroid genau auf der Linie zählt zur "in"-Seite.
+Jeder Track wird pro Linie höchstens einmal gezählt.
+Zone: "in" = Zentroid betritt das Polygon, "out" = verlässt es (je Track höchstens ein "in" und ein "out").
+"""
+
+from __future__ import annotations
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .blobs import extract_blobs
+from .tracker import BlobTracker
+
+
+def _cross(o: np.ndarray, a: np.ndarray, p: np.ndarray) -> np.ndarray:
+    """Kreuzprodukt (a - o) x (p - o) für viele Punkte p."""
+    return (a[0] - o[0]) * (p[:, 1] - o[1]) - (a[1] - o[1]) * (p[:, 0] - o[0])
+
+
+def line_crossings(p1: np.ndarray, p2: np.ndarray, prev: np.ndarray, cur: np.ndarray) -> np.ndarray:
+    """+1 / -1 je Bewegung prev → cur, die das Segment p1-p2 schneidet (0 = kein Schnitt).
+    Punkte genau auf der Linie gehören zur "in"-Seite, sonst ginge ein Schritt auf die Linie
+    und der nächste davon weg als Schnitt verloren."""
+    s0 = _cross(p1, p2, prev) >= 0
+    s1 = _cross(p1, p2, cur) >= 0
+    # Linienendpunkte müssen auf verschiedenen Seiten der Bewegung liegen
+    d = cur - prev
+    e1 = d[:, 0] * (p1[1] - prev[:, 1]) - d[:, 1] * (p1[0] - prev[:, 0])
+    e2 = d[:, 0] * (p2[1] - prev[:, 1]) - d[:, 1] * (p2[0] - prev[:, 0])
+    hit = (s0 != s1) & (np.sign(e1) != np.sign(e2))
+    return np.where(hit, np.where(s1, 1, -1), 0).astype(np.int8)
+
+
+def points_in_polygon(pts: np.ndarray, poly: np.ndarray) -> np.ndarray:
+    """Even-odd-Test für viele Punkte gegen ein Polygon, vektorisiert (n Punkte × m Kanten)."""
+    if len(pts) == 0:
+        return np.zeros(0, bool)
+    x, y = pts[:, 0:1], pts[:, 1:2]
+    xa, ya = poly[:, 0], poly[:, 1]
+    xb, yb = np.roll(xa, -1), np.roll(ya, -1)
+    straddle = (ya > y) != (yb > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xi = xa + (y - ya) * (xb - xa) / (yb - ya)
+    return (straddle & (x < xi)).sum(axis=1) % 2 == 1
+
+
+class IntervalCounter:
+    """Summiert in/out je Name und liefert nach `interval` Sekunden das abgeschlossene Intervall."""
+
+    def __init__(self, names: List[str], interval: float = 60.0, now: Optional[float] = None):
+        self.names = list(names)
+        self.interval = max(1.0, float(interval))
+        self.t0 = time.time() if now is None else now
+        self.cur = {n: {"in": 0, "out": 0} for n in self.names}
+        self.total = {n: {"in": 0, "out": 0} for n in self.names}
+
+    def add(self, name: str, n_in: int, n_out: int):
+        c, t = self.cur[name], self.total[name]
+        c["in"] += n_in
+        c["out"] += n_out
+        t["in"] += n_in
+        t["out"] += n_out
+
+    def poll(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        now = time.time() if now is None else now
+        if now - self.t0 < self.interval:
+            return None
+        out = {"start": self.t0, "end": now, "counts": self.cur}
+        self.t0 = now
+        self.cur = {n: {"in": 0, "out": 0} for n in self.names}
+        return out
+
+
+class CountingEngine:
+    def __init__(self, cfg: Optional[Dict[str, Any]] = None, scale: float = 1.0,
+                 offset: tuple = (0, 0)):
+        cfg = cfg or {}
+        s = float(scale)
+        off = np.asarray(offset, np.float32)
+        self.min_area = int(round(int(cfg.get("min_area", 0)) * s * s))
+        self.max_area = int(round(int(cfg.get("max_area", 0)) * s * s))
+        self.tracker = BlobTracker(max_dist=max(1.0, float(cfg.get("max_dist", 40)) * s),
+                                   max_missed=int(cfg.get("max_missed", 5)),
+                                   iou_weight=float(cfg.get("iou_weight", 0.5)))
+        self.lines = [(str(ln.get("name", f"line{i}")), (np.asarray(ln["points"], np.float32) - off) * s)
+                      for i, ln in enumerate(cfg.get("lines") or [])]
+        self.zones = [(str(z.get("name", f"zone{i}")), (np.asarray(z["polygon"], np.float32) - off) * s)
+                      for i, z in enumerate(cfg.get("zones") or [])]
+        if len(self.lines) + 2 * len(self.zones) > 63:
+            raise ValueError("counting: too many lines/zones (lines + 2 * zones <= 63)")
+        names = [n for n, _ in self.lines] + [n for n, _ in self.zones]
+        self.counter = IntervalCounter(names, float(cfg.get("interval_sec", 60)))
+        self.blobs = 0
+
+    def update(self, mask: np.ndarray, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Maske eines Frames verarbeiten; liefert das Intervall-Ergebnis, sobald eines abgeschlossen ist."""
+        boxes, cents, _ = extract_blobs(mask, self.min_area, self.max_area)
+        return self.update_blobs(boxes, cents, now)
+
+    def update_blobs(self, boxes: np.ndarray, cents: np.ndarray,
+                     now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wie update(), aber mit fertigen Blobs (boxes x,y,w,h; cents x,y)."""
+        self.blobs = len(cents)
+        tr = self.tracker
+        idx = tr.update(boxes, cents)
+        if len(idx):
+            prev, cur = tr.prev[idx], tr.cent[idx]
+            for bit, (name, pts) in enumerate(self.lines):
+                sign = line_crossings(pts[0], pts[1], prev, cur)
+                self._count(name, idx, sign, bit, bit)
+            for j, (name, poly) in enumerate(self.zones):
+                was = points_in_polygon(prev, poly)
+                now_in = points_in_polygon(cur, poly)
+                sign = np.where(~was & now_in, 1, np.where(was & ~now_in, -1, 0)).astype(np.int8)
+                bit = len(self.lines) + 2 * j
+                self._count(name, idx, sign, bit, bit + 1)
+        return self.counter.poll(now)
+
+    def _count(self, name: str, idx: np.ndarray, sign: np.ndarray, bit_in: int, bit_out: int):
+        """Ereignisse zählen, je Track und Bit nur einmal (Bitmaske tracker.counted)."""
+        if not sign.any():
+            return
+        flag = np.where(sign > 0, np.int64(1) << np.int64(bit_in), np.int64(1) << np.int64(bit_out))
+        fresh = (sign != 0) & ((self.tracker.counted[idx] & flag) == 0)
+        self.tracker.counted[idx[fresh]] |= flag[fresh]
+        self.counter.add(name, int((sign[fresh] > 0).sum()), int((sign[fresh] < 0).sum()))
+
+    @property
+    def tracks(self) -> int:
+        return len(self.tracker)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leichter Blob-Tracker (IoU + Zentroid), vektorisiert
+- Kandidatenpaare Track ↔ Detektion nur aus benachbarten Zellen eines Grid-Spatial-Hash
+  (Zellgröße = max_dist), d.h. kein O(n²) über alle Paare
+- Kosten je Paar: iou_weight * (1 - IoU) + (1 - iou_weight) * dist / max_dist
+  (dünn besetzte Kostenmatrix, Paare mit dist > max_dist fallen raus)
+- Zuordnung: gegenseitig beste Paare in Runden (entspricht Greedy nach globalem Minimum)
+- Vorhersage: konstante Geschwindigkeit aus den letzten zwei Zentroiden
+- Track-Zustand als parallele NumPy-Arrays statt Objekten
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+_KEY = np.int64(1 << 21)  # Zell-Schlüssel = (cx + off) * _KEY + (cy + off)
+_OFF = np.int64(1 << 20)
+
+
+def _cell_keys(pts: np.ndarray, cell: float, dx: int = 0, dy: int = 0) -> np.ndarray:
+    c = np.floor(pts / cell).astype(np.int64)
+    return (c[:, 0] + dx + _OFF) * _KEY + (c[:, 1] + dy + _OFF)
+
+
+def candidate_pairs(track_pts: np.ndarray, det_pts: np.ndarray, cell: float):
+    """Alle (track_idx, det_idx) mit Track in der 3x3-Nachbarschaft der Detektionszelle."""
+    nt, nd = len(track_pts), len(det_pts)
+    if nt == 0 or nd == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    tkeys = _cell_keys(track_pts, cell)
+    order = np.argsort(tkeys, kind="stable")
+    skeys = tkeys[order]
+    ts, ds = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            q = _cell_keys(det_pts, cell, dx, dy)
+            lo = np.searchsorted(skeys, q, "left")
+            cnt = np.searchsorted(skeys, q, "right") - lo
+            total = int(cnt.sum())
+            if total == 0:
+                continue
+            # Bereiche [lo, lo+cnt) je Detektion zu Paaren aufklappen
+            starts = np.repeat(lo - (np.cumsum(cnt) - cnt), cnt)
+            ts.append(order[starts + np.arange(total)])
+            ds.append(np.repeat(np.arange(nd), cnt))
+    if not ts:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    return np.concatenate(ts), np.concatenate(ds)
+
+
+def pair_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU zeilenweise für Boxen (x, y, w, h)."""
+    x0 = np.maximum(a[:, 0], b[:, 0])
+    y0 = np.maximum(a[:, 1], b[:, 1])
+    x1 = np.minimum(a[:, 0] + a[:, 2], b[:, 0] + b[:, 2])
+    y1 = np.minimum(a[:, 1] + a[:, 3], b[:, 1] + b[:, 3])
+    inter = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    union = a[:, 2] * a[:, 3] + b[:, 2] * b[:, 3] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+def match_mutual_best(t: np.ndarray, d: np.ndarray, cost: np.ndarray):
+    """Greedy-Zuordnung über gegenseitig beste Paare; Rückgabe (track_idx, det_idx)."""
+    mt, md = [], []
+    while len(cost):
+        o = np.argsort(cost, kind="stable")
+        t, d, cost = t[o], d[o], cost[o]
+        # erstes Vorkommen = günstigstes Paar je Track bzw. je Detektion
+        first_t = np.zeros(len(t), bool)
+        first_t[np.unique(t, return_index=True)[1]] = True
+        first_d = np.zeros(len(d), bool)
+        first_d[np.unique(d, return_index=True)[1]] = True
+        mutual = first_t & first_d
+        mt.append(t[mutual])
+        md.append(d[mutual])
+        rest = ~(np.isin(t, t[mutual]) | np.isin(d, d[mutual]))
+        t, d, cost = t[rest], d[rest], cost[rest]
+    if not mt:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    return np.concatenate(mt), np.concatenate(md)
+
+
+class BlobTracker:
+    def __init__(self, max_dist: float = 40.0, max_missed: int = 5, iou_weight: float = 0.5):
+        self.max_dist = float(max_dist)
+        self.max_missed = int(max_missed)
+        self.iou_weight = float(iou_weight)
+        self._next_id = 1
+        # Track-Zustand (parallel indiziert)
+        self.ids = np.empty(0, np.int64)
+        self.boxes = np.empty((0, 4), np.float32)
+        self.cent = np.empty((0, 2), np.float32)
+        self.prev = np.empty((0, 2), np.float32)   # Zentroid im vorigen Frame (für Zähllinien)
+        self.vel = np.empty((0, 2), np.float32)
+        self.hits = np.empty(0, np.int32)
+        self.missed = np.empty(0, np.int32)
+        self.counted = np.empty(0, np.int64)       # Bitmaske: Linie/Zone i für diesen Track schon gezählt
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _keep(self, sel):
+        for k in ("ids", "boxes", "cent", "prev", "vel", "hits", "missed", "counted"):
+            setattr(self, k, getattr(self, k)[sel])
+
+    def update(self, boxes: np.ndarray, cents: np.ndarray) -> np.ndarray:
+        """
+        Detektionen (boxes x,y,w,h; cents x,y) zuordnen. Rückgabe: Indizes der in diesem Frame
+        bestätigten Tracks (prev → cent ist dann die Bewegung dieses Frames).
+        """
+        nt = len(self.ids)
+        # Vorhersage (konstante Geschwindigkeit)
+        pred_c = self.cent + self.vel
+        pred_b = self.boxes.copy()
+        pred_b[:, :2] += self.vel
+
+        t, d = candidate_pairs(pred_c, cents, self.max_dist)
+        if len(t):
+            dist = np.hypot(*(pred_c[t] - cents[d]).T)
+            ok = dist <= self.max_dist
+            t, d, dist = t[ok], d[ok], dist[ok]
+            iou = pair_iou(pred_b[t], boxes[d])
+            cost = self.iou_weight * (1.0 - iou) + (1.0 - self.iou_weight) * (dist / self.max_dist)
+            mt, md = match_mutual_best(t, d, cost)
+        else:
+            mt, md = np.empty(0, np.int64), np.empty(0, np.int64)
+
+        # bestätigte Tracks aktualisieren
+        self.prev[:] = self.cent
+        self.vel[mt] = cents[md] - self.cent[mt]
+        self.cent[mt] = cents[md]
+        self.boxes[mt] = boxes[md]
+        self.hits[mt] += 1
+        self.missed += 1
+        self.missed[mt] = 0
+        matched = np.zeros(nt, bool)
+        matched[mt] = True
+        self.vel[~matched] = 0.0
+
+        # verlorene Tracks entfernen, neue anlegen
+        alive = self.missed <= self.max_missed
+        confirmed = matched[alive]
+        self._keep(alive)
+        new = np.ones(len(cents), bool)
+        new[md] = False
+        k = int(new.sum())
+        if k:
+            self.ids = np.concatenate([self.ids, np.arange(self._next_id, self._next_id + k, dtype=np.int64)])
+            self._next_id += k
+            self.boxes = np.concatenate([self.boxes, boxes[new]])
+            self.cent = np.concatenate([self.cent, cents[new]])
+            self.prev = np.concatenate([self.prev, cents[new]])
+            self.vel = np.concatenate([self.vel, np.zeros((k, 2), np.float32)])
+            self.hits = np.concatenate([self.hits, np.ones(k, np.int32)])
+            self.missed = np.concatenate([self.missed, np.zeros(k, np.int32)])
+            self.counted = np.concatenate([self.counted, np.zeros(k, np.int64)])
+        return np.flatnonzero(confirmed)
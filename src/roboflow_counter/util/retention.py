@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Aufbewahrung + Speicherquote für das Export-Verzeichnis (app.data_dir, siehe stream/exporter.py)
+- Index aller Dateien (mtime, Größe), inkrementell über Verzeichnis-mtimes wie ImageIndex in
+  web/gallery_server.py: unveränderte Verzeichnisse werden nicht neu gelistet, nur neue Namen ge-stat-et
+- Löschmenge = älteste Dateien, bis beide Grenzen eingehalten sind:
+    max_age:   alles älter als now - max_age
+    max_bytes: älteste Dateien, bis die Gesamtgröße <= target_ratio * max_bytes (Hysterese,
+               sonst würde jeder Lauf knapp über der Grenze wieder ein paar Dateien löschen)
+- Verzeichnisse, deren Dateien komplett in der Löschmenge liegen (z.B. ein ganzer Tag
+  <stream>/YYYY-MM-DD), werden mit einem rmtree entfernt statt Datei für Datei;
+  nie im Ganzen, wenn im Unterbaum ein Verzeichnis jünger als grace_sec ist (der Exporter legt es
+  gerade an) oder Einträge liegen, die der Index nicht zählt (Symlinks, Sockets …).
+  Vor jedem rmtree werden die Verzeichnis-mtimes des Unterbaums erneut geprüft: hat sich seit dem
+  Index etwas geändert (z.B. neue Datei), werden nur die geplanten Dateien einzeln gelöscht
+- gelöscht wird in Batches (batch Einträge, danach pause Sekunden), damit die Platte frei bleibt
+- Ergebnis je Lauf: gelöschte Dateien/Bytes/Verzeichnisse, verbleibender Bestand, Dauer
+
+config.yml:
+  retention:
+    max_age_days: 14     # 0 = keine Altersgrenze
+    max_size_gb: 50      # 0 = keine Quote
+    target_ratio: 0.9
+    interval_sec: 0      # > 0 = Dienstbetrieb mit diesem Abstand (oder main.py cleanup --interval-sec)
+    batch: 500
+    pause_sec: 0.05
+"""
+
+from __future__ import annotations
+import os
+import shutil
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from .logging import setup_logger
+
+
+class RetentionIndex:
+    """Alle regulären Dateien unter root mit (mtime, Größe), inkrementell aktualisiert."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._dirs: Dict[str, Tuple[int, Dict[str, Tuple[float, int]], set, int]] = {}
+        # dir -> (st_mtime_ns, {Name: (mtime, Größe)}, {Unterverzeichnisse}, andere Einträge)
+
+    def _list(self, d, old):
+        known = old[1] if old is not None else {}
+        files, subdirs, other = {}, set(), 0
+        try:
+            it = os.scandir(d)
+        except OSError:
+            return files, subdirs, other
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        subdirs.add(e.path)
+                    elif e.name in known:
+                        files[e.name] = known[e.name]
+                    elif e.is_file(follow_symlinks=False):
+                        st = e.stat(follow_symlinks=False)
+                        files[e.name] = (st.st_mtime, st.st_size)
+                    else:  # Symlink/Socket/…: nicht gezählt, aber das Verzeichnis ist dann nicht "leer"
+                        other += 1
+                except OSError:
+                    continue
+        return files, subdirs, other
+
+    def refresh(self) -> dict:
+        """Verzeichnisbaum abgleichen; liefert {dir: (st_mtime_ns, {Name: (mtime, Größe)}, {Unterverzeichnisse},
+        andere Einträge)}."""
+        seen = {}
+        stack = [self.root]
+        while stack:
+            d = stack.pop()
+            try:
+                mt = os.stat(d).st_mtime_ns
+            except OSError:
+                continue
+            old = self._dirs.get(d)
+            if old is None or old[0] != mt:
+                old = self._dirs[d] = (mt,) + self._list(d, old)
+            seen[d] = old
+            stack.extend(old[2])
+        for d in [d for d in self._dirs if d not in seen]:
+            del self._dirs[d]
+        return seen
+
+    def forget(self, d: str):
+        """Verzeichnis (samt Unterbaum) nach rmtree aus dem Cache nehmen."""
+        pre = d + os.sep
+        for k in [k for k in self._dirs if k == d or k.startswith(pre)]:
+            del self._dirs[k]
+
+
+class Retention:
+    def __init__(self, root: str, max_age_sec: float = 0.0, max_bytes: int = 0, target_ratio: float = 0.9,
+                 batch: int = 500, pause_sec: float = 0.05, grace_sec: float = 60.0, log_level: str = "INFO"):
+        self.root = os.path.abspath(root)
+        self.max_age = max(0.0, float(max_age_sec))
+        self.max_bytes = max(0, int(max_bytes))
+        self.target_ratio = min(1.0, max(0.0, float(target_ratio)))
+        self.batch = max(1, int(batch))
+        self.pause = max(0.0, float(pause_sec))
+        self.grace = max(0.0, float(grace_sec))
+        self.index = RetentionIndex(self.root)
+        self.log = setup_logger("retention", log_level)
+
+    # ---------------- Planung ----------------
+
+    def plan(self, now: Optional[float] = None):
+        """
+        Löschplan: (ganze Verzeichnisse, einzelne Dateien [(path, Bytes)], Bestand).
+        Ganze Verzeichnisse: [(dir, [(path, Bytes)], {Unterverzeichnis: st_mtime_ns laut Index})],
+        die Dateiliste ist der Fallback, falls sich das Verzeichnis bis zum Löschen ändert.
+        Bestand = (Dateien, Bytes) vor dem Löschen.
+        """
+        now = time.time() if now is None else now
+        tree = self.index.refresh()
+        files: List[Tuple[float, int, str, str]] = []  # (mtime, Größe, Name, dir), nach mtime sortiert
+        for d, (_, names, _, _) in tree.items():
+            files.extend((m, s, n, d) for n, (m, s) in names.items())
+        files.sort()
+        total = sum(f[1] for f in files)
+
+        # k = Länge des ältesten Präfixes, das gelöscht wird
+        k = 0
+        if self.max_age > 0:
+            k = bisect_left(files, (now - self.max_age,))
+        if self.max_bytes > 0 and total > self.max_bytes:
+            excess = total - int(self.target_ratio * self.max_bytes)
+            freed, j = 0, 0
+            while j < len(files) and freed < excess:
+                freed += files[j][1]
+                j += 1
+            k = max(k, j)
+
+        # je Verzeichnis (rekursiv): Dateien gesamt / davon in der Löschmenge
+        root = self.root
+        count = {d: 0 for d in tree}
+        doomed = {d: 0 for d in tree}
+        for i, (_, _, _, d) in enumerate(files):
+            hit = i < k
+            while True:
+                count[d] = count.get(d, 0) + 1
+                if hit:
+                    doomed[d] = doomed.get(d, 0) + 1
+                if d == root:
+                    break
+                d = os.path.dirname(d)
+
+        # nie im Ganzen löschen: Verzeichnisse mit ungezählten Einträgen oder jünger als grace_sec
+        # (der Exporter legt sie gerade an) samt ihren Eltern
+        pinned = set()
+        for d, ent in tree.items():
+            hold = ent[3] or ent[0] / 1e9 >= now - self.grace
+            while hold and d not in pinned:
+                pinned.add(d)
+                if d == root:
+                    break
+                d = os.path.dirname(d)
+
+        def removable(d):
+            return d != root and d not in pinned and doomed.get(d, 0) == count.get(d, 0)
+
+        whole, whole_set = [], set()
+        for d in sorted(tree, key=len):  # Eltern vor Kindern → oberstes entfernbares Verzeichnis
+            if os.path.dirname(d) in whole_set:
+                whole_set.add(d)
+                continue
+            if removable(d):
+                whole_set.add(d)
+                whole.append(d)
+        content = {d: [] for d in whole}
+        single = []
+        for m, s, n, d in files[:k]:
+            top = self._top(d, whole_set, root)
+            (content[top] if top is not None else single).append((os.path.join(d, n), s))
+        mtimes = {d: {} for d in whole}
+        for d, ent in tree.items():
+            top = self._top(d, whole_set, root)
+            if top is not None:
+                mtimes[top][d] = ent[0]
+        return [(d, content[d], mtimes[d]) for d in whole], single, (len(files), total)
+
+    @staticmethod
+    def _top(d, whole_set, root):
+        """Oberstes ganz zu löschendes Verzeichnis, das d enthält (oder None)."""
+        top = None
+        while d in whole_set:
+            top = d
+            if d == root:
+                break
+            d = os.path.dirname(d)
+        return top
+
+    # ---------------- Löschen ----------------
+
+    @staticmethod
+    def _unchanged(mtimes: Dict[str, int]) -> bool:
+        """Alle Verzeichnisse des Unterbaums noch mit der mtime aus dem Index (kein Eintrag dazu/weg)?"""
+        for d, mt in mtimes.items():
+            try:
+                if os.stat(d).st_mtime_ns != mt:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def run(self, dry_run: bool = False, now: Optional[float] = None) -> dict:
+        t0 = time.perf_counter()
+        whole, single, (n_before, b_before) = self.plan(now)
+        t_plan = time.perf_counter()
+        res = {"files": 0, "bytes": 0, "dirs": 0, "errors": 0, "dry_run": dry_run}
+        ops = 0
+
+        def tick():
+            nonlocal ops
+            ops += 1
+            if ops % self.batch == 0 and self.pause > 0 and not dry_run:
+                time.sleep(self.pause)
+
+        for d, content, mtimes in whole:
+            if not dry_run and not self._unchanged(mtimes):
+                # seit dem Index geändert (neue Datei, Symlink …) → nur die geplanten Dateien
+                self.log.info("%s changed since indexing, deleting planned files one by one", d)
+                single.extend(content)
+                self.index.forget(d)
+                continue
+            nf, nb = len(content), sum(b for _, b in content)
+            if not dry_run:
+                try:
+                    shutil.rmtree(d)
+                except OSError as e:
+                    res["errors"] += 1
+                    self.log.warning("rmtree %s failed: %s", d, e)
+                    self.index.forget(d)
+                    continue
+                self.index.forget(d)
+            res["dirs"] += 1
+            res["files"] += nf
+            res["bytes"] += nb
+            tick()
+        for p, nb in single:
+            if not dry_run:
+                try:
+                    os.unlink(p)
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    res["errors"] += 1
+                    self.log.warning("unlink %s failed: %s", p, e)
+                    continue
+            res["files"] += 1
+            res["bytes"] += nb
+            tick()
+
+        res["kept_files"] = n_before - res["files"]
+        res["kept_bytes"] = b_before - res["bytes"]
+        res["plan_ms"] = round((t_plan - t0) * 1000.0, 1)
+        res["delete_ms"] = round((time.perf_counter() - t_plan) * 1000.0, 1)
+        return res
+
+    def serve(self, interval_sec: float, dry_run: bool = False, on_result=None):
+        """Dienstbetrieb: alle interval_sec einen Lauf (Ctrl-C/SIGTERM → KeyboardInterrupt beendet)."""
+        interval = max(1.0, float(interval_sec))
+        try:
+            while True:
+                t = time.monotonic()
+                res = self.run(dry_run=dry_run)
+                if on_result is not None:
+                    on_result(res)
+                time.sleep(max(0.0, interval - (time.monotonic() - t)))
+        except KeyboardInterrupt:
+            pass
+
+
+def retention_from_cfg(cfg: dict, root: Optional[str] = None, log_level: str = "INFO") -> Retention:
+    """Retention aus `retention:` der config.yml; root Default: export.dir bzw. app.data_dir."""
+    rc = cfg.get("retention") or {}
+    root = root or (cfg.get("export") or {}).get("dir") or (cfg.get("app") or {}).get("data_dir") \
+        or "/opt/larvacounter/export"
+    return Retention(
+        root,
+        max_age_sec=float(rc.get("max_age_days", 14) or 0) * 86400.0,
+        max_bytes=int(float(rc.get("max_size_gb", 0) or 0) * 1024 ** 3),
+        target_ratio=float(rc.get("target_ratio", 0.9)),
+        batch=int(rc.get("batch", 500)),
+        pause_sec=float(rc.get("pause_sec", 0.05)),
+        grace_sec=float(rc.get("grace_sec", 60)),
+        log_level=log_level,
+    )
@@ -6,6 +6,7 @@ Gallery Webserver (evenly spaced)
 - Slot-Breite = WINDOW_SEC / N (Standard: 300 / 20 = 15 s)
 - Fallback: falls Slot leer, bleibt Lücke; danach optional mit übrigen Bildern auffüllen
 - /zip liefert ein ZIP der aktuell selektierten Bilder
+- /thumb/<pfad> liefert verkleinerte Vorschaubilder fürs Grid (Klick öffnet /file/<pfad>)
 
 ENV:
   IMAGE_DIR   (default: /opt/larvacounter/export)
@@ -15,9 +16,49 @@ ENV:
   REFRESH_SEC (default: 10)
   TITLE       (default: 'Letzte Bilder (≤5min, gleichmäßig)')
   FILL_GAPS   (default: 1)         # 1: Lücken nachträglich mit neuesten füllen, 0: Lücken zulassen
+  INDEX_RESCAN_SEC (default: 2)    # Intervall der inkrementellen Index-Aktualisierung
+  ZIP_CACHE_DIR (default: '')      # gesetzt: letztes /zip-Archiv dort ablegen und bei gleicher Auswahl wiederverwenden
+  THUMB_WIDTH   (default: 320)     # Breite der Vorschaubilder (px)
+  THUMB_CACHE_DIR (default: <tmp>/gallery-thumbs)
+  THUMB_CACHE_MB  (default: 200)   # Obergrenze des Thumbnail-Caches auf Platte (LRU)
+  THUMB_WORKERS   (default: 2)     # Threads für die Thumbnail-Erzeugung
+  SERVER_MODE     (default: threaded)  # threaded = ThreadingHTTPServer, async = asyncio (AsyncGallery)
+  IO_WORKERS      (default: 8)     # async: Threads für blockierende Dateisystem-Aufrufe
+  KEEPALIVE_SEC   (default: 15)    # async: Leerlauf-Timeout einer Keep-Alive-Verbindung
+
+Bildindex (ImageIndex): statt bei jedem Request rekursiv zu scannen, hält ein Hintergrund-Thread
+einen mtime-sortierten Index im Speicher aktuell. Pro Durchlauf wird nur die mtime jedes
+Verzeichnisses geprüft; geänderte Verzeichnisse werden neu gelistet und nur neue Dateien ge-stat-et.
+Im Index bleiben nur Bilder im Fenster (+ die LIMIT neuesten davor fürs Auffüllen von Lücken),
+ein Request kostet damit O(Bilder im Fenster), unabhängig von der Archivgröße.
+Annahme: Bilder werden neu geschrieben (oder per rename eingestellt), nicht in-place überschrieben.
+
+/zip wird gestreamt (HTTP/1.1 chunked), während das Archiv entsteht: konstanter Speicher und
+erstes Byte sofort, unabhängig von LIMIT. JPEG/PNG/WebP werden ohne Kompression abgelegt (STORED),
+nur unkomprimierte Formate (BMP) mit Deflate.
+
+/file/ sendet per sendfile (ohne Kopie durch Python), mit ETag/Last-Modified (304 bei
+If-None-Match/If-Modified-Since) und Range-Anfragen (206, ein Bereich; 416 wenn außerhalb).
+
+Thumbnails (ThumbCache): einmal pro (Pfad, mtime, Breite) in einem Thread-Pool erzeugt
+(OpenCV, JPEG-Decode direkt verkleinert über IMREAD_REDUCED_*), als JPEG in einem
+größenbegrenzten Platten-Cache abgelegt (LRU). Die Index-Seite stößt die Erzeugung für die
+ausgewählten Bilder schon beim Rendern an. Ohne OpenCV liefert /thumb/ das Originalbild.
+
+SERVER_MODE=async: ein Event-Loop statt eines Threads pro Verbindung; HTTP/1.1 Keep-Alive,
+Dateien per loop.sendfile, blockierende Aufrufe (stat/open, Index, ZIP) in einem festen
+Thread-Pool (IO_WORKERS). Gleiche Routen und Header wie der Thread-Server.
 """
 
-import os, io, time, urllib.parse, mimetypes, html, zipfile
+import os, stat, time, urllib.parse, mimetypes, html, zipfile, threading, tempfile, hashlib, asyncio, io
+from http import HTTPStatus
+from http.client import parse_headers
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from operator import le
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
@@ -28,27 +69,151 @@ WINDOW_SEC  = int(os.environ.get("WINDOW_SEC", "300"))
 REFRESH_SEC = int(os.environ.get("REFRESH_SEC", "10"))
 TITLE       = os.environ.get("TITLE", "Letzte Bilder (≤5min, gleichmäßig)")
 FILL_GAPS   = int(os.environ.get("FILL_GAPS", "1"))
+INDEX_RESCAN_SEC = float(os.environ.get("INDEX_RESCAN_SEC", "2"))
+ZIP_CACHE_DIR = os.environ.get("ZIP_CACHE_DIR", "")
+THUMB_WIDTH = int(os.environ.get("THUMB_WIDTH", "320"))
+THUMB_CACHE_DIR = os.environ.get("THUMB_CACHE_DIR", os.path.join(tempfile.gettempdir(), "gallery-thumbs"))
+THUMB_CACHE_MB = float(os.environ.get("THUMB_CACHE_MB", "200"))
+THUMB_WORKERS = int(os.environ.get("THUMB_WORKERS", "2"))
+SERVER_MODE = os.environ.get("SERVER_MODE", "threaded").lower().strip()
+IO_WORKERS = int(os.environ.get("IO_WORKERS", "8"))
+KEEPALIVE_SEC = float(os.environ.get("KEEPALIVE_SEC", "15"))
 
 IMG_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+# bereits komprimierte Formate: Deflate spart hier fast nichts, kostet aber CPU
+STORED_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+ZIP_CHUNK = 64 * 1024
 
-def _scan(dirpath: Path):
-    """Scant rekursiv Bilddateien (mtime, path)."""
-    items = []
-    if not dirpath.exists():
-        return items
-    for p in dirpath.rglob("*"):
-        if p.is_file() and p.suffix.lower() in IMG_EXTS:
+class ImageIndex:
+    """
+    Inkrementeller, mtime-sortierter Index der Bilddateien unter root.
+    window:     Fensterbreite (s), ältere Bilder fallen aus dem Index
+    keep_older: so viele der neuesten Bilder vor dem Fenster bleiben zusätzlich (FILL_GAPS)
+    """
+
+    def __init__(self, root: Path, window: float, keep_older: int = 0):
+        self.root = str(root)
+        self.window = float(window)
+        self.keep_older = max(0, int(keep_older))
+        self._dirs = {}      # dir -> (st_mtime_ns, {Dateinamen}, {Unterverzeichnisse})
+        self._mtime = {}     # path -> mtime (nur indexierte Dateien)
+        self._sorted = []    # [(mtime, path)] aufsteigend
+        self._lock = threading.Lock()          # _mtime/_sorted (kurz, auch für items())
+        self._refresh_lock = threading.Lock()  # _dirs + Verzeichnis-Scan: immer nur ein refresh()
+        self._thread = None
+        self.last_refresh = 0.0
+        self.refresh_ms = 0.0
+
+    def _list(self, d, old, added, removed):
+        """Verzeichnis neu listen; nur neue Namen werden ge-stat-et."""
+        known = old[1] if old is not None else set()
+        names, subdirs = set(), set()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            return names, subdirs
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        subdirs.add(e.path)
+                        continue
+                    if os.path.splitext(e.name)[1].lower() not in IMG_EXTS:
+                        continue
+                    if e.name in known:
+                        names.add(e.name)
+                    elif e.is_file():
+                        added.append((e.stat().st_mtime, e.path))
+                        names.add(e.name)
+                except OSError:
+                    continue
+        removed.extend(os.path.join(d, n) for n in known - names)
+        return names, subdirs
+
+    def refresh(self, now=None):
+        """Verzeichnisbaum abgleichen (O(Verzeichnisse) + neue Dateien) und den Index stutzen."""
+        with self._refresh_lock:
+            self._refresh(now)
+
+    def _refresh(self, now):
+        t0 = time.perf_counter()
+        added, removed, seen = [], [], set()
+        stack = [self.root]
+        while stack:
+            d = stack.pop()
             try:
-                items.append((p.stat().st_mtime, p))
+                mt = os.stat(d).st_mtime_ns
             except OSError:
                 continue
-    return items
+            seen.add(d)
+            old = self._dirs.get(d)
+            if old is None or old[0] != mt:
+                names, subdirs = self._list(d, old, added, removed)
+                old = self._dirs[d] = (mt, names, subdirs)
+            stack.extend(old[2])
+        for d in [d for d in self._dirs if d not in seen]:
+            removed.extend(os.path.join(d, n) for n in self._dirs.pop(d)[1])
+
+        now = time.time() if now is None else now
+        with self._lock:
+            for p in removed:
+                m = self._mtime.pop(p, None)
+                if m is not None:
+                    i = bisect_left(self._sorted, (m, p))
+                    if i < len(self._sorted) and self._sorted[i] == (m, p):
+                        del self._sorted[i]
+            if added:
+                self._sorted.extend(added)
+                self._sorted.sort()
+                self._mtime.update((p, m) for m, p in added)
+            cut = max(0, bisect_left(self._sorted, (now - self.window,)) - self.keep_older)
+            if cut:
+                for _, p in self._sorted[:cut]:
+                    del self._mtime[p]
+                del self._sorted[:cut]
+        self.last_refresh = now
+        self.refresh_ms = (time.perf_counter() - t0) * 1000.0
+
+    def items(self, now=None):
+        """[(mtime, Path)] im Fenster [now-window, ∞) plus keep_older ältere, aufsteigend nach mtime."""
+        now = time.time() if now is None else now
+        if self._thread is None and now - self.last_refresh >= INDEX_RESCAN_SEC:
+            # ohne Hintergrund-Thread: bei Bedarf im Request aktualisieren; parallele Requests warten
+            # auf denselben Lauf statt den Baum gleichzeitig zu scannen
+            with self._refresh_lock:
+                if now - self.last_refresh >= INDEX_RESCAN_SEC:
+                    self._refresh(now)
+        with self._lock:
+            i = max(0, bisect_left(self._sorted, (now - self.window,)) - self.keep_older)
+            return [(m, Path(p)) for m, p in self._sorted[i:]]
+
+    def __len__(self):
+        return len(self._sorted)
+
+    def start(self, interval=INDEX_RESCAN_SEC):
+        """Hintergrund-Thread: refresh() alle `interval` Sekunden."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception as e:  # Index darf den Server nicht beenden
+                    print(f"[gallery] index refresh failed: {e}")
+        self._thread = threading.Thread(target=loop, name="gallery-index", daemon=True)
+        self._thread.start()
+        return self
+
+INDEX = ImageIndex(IMAGE_DIR, WINDOW_SEC, keep_older=LIMIT if FILL_GAPS else 0)
 
 def select_evenly_spaced(items, now=None, window=300, count=20):
     """
     items: List[(mtime, Path)] beliebig alt
     Auswahl: gleichmäßig über [now-window, now], 'count' Slots
     Für jeden Slot wird das Bild mit minimaler |mtime - slot_center| gewählt (ohne Duplikate).
+
+    Umsetzung: Kandidaten einmal stabil nach mtime sortiert (bei gleicher mtime gewinnt der
+    frühere Eintrag in `items`), pro Slot bisect auf das Center und nächster freier Nachbar links/rechts
+    über "nächster unbenutzter Index"-Zeiger (Union-Find mit Pfadkompression) → O(N + count · log N).
     """
     if now is None:
         now = time.time()
@@ -60,38 +225,68 @@ def select_evenly_spaced(items, now=None, window=300, count=20):
     # Slot-Center (damit früh & spät halbgewichtet werden)
     centers = [start + (i + 0.5) * slot for i in range(count)]
 
-    # Nur Kandidaten im Fenster betrachten
-    in_window = [(m, p) for (m, p) in items if start <= m <= now]
-    # Für Lücken-Fallback ggf. alle sortiert parat halten
-    all_sorted = sorted(items, key=lambda x: x[0], reverse=True)
-    used = set()
-    selection = [None] * count
+    # stabil nach mtime sortieren; die Index-Ausgabe ist schon sortiert → nur prüfen
+    ms = [x[0] for x in items]
+    if all(map(le, ms, islice(ms, 1, None))):
+        order = range(len(items))
+    else:
+        order = sorted(range(len(items)), key=ms.__getitem__)
+        ms = [ms[k] for k in order]
+    lo, hi = bisect_left(ms, start), bisect_right(ms, now)
+    wm = ms[lo:hi]                  # Kandidaten im Fenster
+    n = len(wm)
+    right = list(range(n + 1))      # right[j]: Kandidat für "erster freier Index >= j" (n = keiner)
+    left = list(range(n + 1))       # left[j + 1]: Kandidat für "letzter freier Index <= j" (0 = keiner)
+
+    def free_right(j):
+        root = j
+        while right[root] != root:
+            root = right[root]
+        while right[j] != root:
+            right[j], j = root, right[j]
+        return root
 
-    # Für jede Center-Zeit das nächstliegende Bild wählen
+    def free_left(j):
+        j += 1
+        root = j
+        while left[root] != root:
+            root = left[root]
+        while left[j] != root:
+            left[j], j = root, left[j]
+        return root - 1
+
+    selection = [None] * count
     for i, c in enumerate(centers):
-        best = None
-        best_dt = None
-        for (m, p) in in_window:
-            if p in used:
-                continue
-            dt = abs(m - c)
-            # bevorzugt innerhalb ± slot/2; wenn keines da, nehmen wir trotzdem das minimal dt im Fenster
-            if best_dt is None or dt < best_dt:
-                best_dt = dt
-                best = (m, p)
-        if best is not None:
-            selection[i] = best
-            used.add(best[1])
+        pos = bisect_left(wm, c)
+        r = free_right(pos)
+        l = free_left(pos - 1)
+        if l >= 0:
+            # bei gleicher mtime den frühesten freien Eintrag der Gruppe nehmen (wie die lineare Suche)
+            l = free_right(bisect_left(wm, wm[l], 0, l))
+        if r >= n and l < 0:
+            continue
+        if r >= n:
+            j = l
+        elif l < 0:
+            j = r
+        else:
+            dl, dr = c - wm[l], wm[r] - c
+            j = l if dl < dr or (dl == dr and order[lo + l] < order[lo + r]) else r
+        selection[i] = items[order[lo + j]]
+        right[j] = j + 1
+        left[j + 1] = j
 
     # Optional: Lücken mit übrigen neueren Bildern auffüllen (damit man immer bis zu N sieht)
-    if FILL_GAPS:
+    gaps = selection.count(None)
+    if FILL_GAPS and gaps:
+        # Lücken gibt es nur, wenn alle Bilder im Fenster vergeben sind → Rest = außerhalb des Fensters,
+        # neueste zuerst: alles nach `now`, dann die letzten vor `start` (Gruppen gleicher mtime ganz)
+        cut = bisect_left(ms, ms[lo - gaps]) if lo >= gaps else 0
+        rest = [items[k] for k in order[hi:]] + [items[k] for k in order[cut:lo]]
+        fill = iter(sorted(rest, key=lambda x: x[0], reverse=True))
         for i in range(count):
             if selection[i] is None:
-                for (m, p) in all_sorted:
-                    if p not in used:
-                        selection[i] = (m, p)
-                        used.add(p)
-                        break
+                selection[i] = next(fill, None)
 
     # Sortierung: neueste zuerst (UI zeigt Grid; du kannst hier auch nach Zeit auf-/absteigend sortieren)
     out = [x for x in selection if x is not None]
@@ -100,7 +295,7 @@ def select_evenly_spaced(items, now=None, window=300, count=20):
 
 def find_images_even():
     now = time.time()
-    items = _scan(IMAGE_DIR)
+    items = INDEX.items(now)
     return select_evenly_spaced(items, now=now, window=WINDOW_SEC, count=LIMIT)
 
 def safe_under(base: Path, candidate: Path) -> bool:
@@ -110,38 +305,257 @@ def safe_under(base: Path, candidate: Path) -> bool:
     except ValueError:
         return False
 
-class Handler(BaseHTTPRequestHandler):
-    def log_message(self, *_):  # silence
-        return
+def etag_for(st) -> str:
+    """Starker Validator aus mtime (ns) und Größe – ändert sich bei jedem Neuschreiben der Datei."""
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
 
-    def do_GET(self):
-        if self.path in ("/", "/index"):
-            return self.serve_index()
-        if self.path.startswith("/file/"):
-            return self.serve_file()
-        if self.path == "/zip":
-            return self.serve_zip()
-        if self.path == "/health":
-            return self.respond(200, b"ok", "text/plain; charset=utf-8")
-        return self.respond(404, b"Not found", "text/plain; charset=utf-8")
+def not_modified(headers, etag: str, mtime: float) -> bool:
+    """Bedingte Anfrage: If-None-Match hat Vorrang vor If-Modified-Since (RFC 9110)."""
+    inm = headers.get("If-None-Match")
+    if inm is not None:
+        tags = [t.strip() for t in inm.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    ims = headers.get("If-Modified-Since")
+    if ims:
+        try:
+            return int(mtime) <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+    return False
 
-    def serve_index(self):
-        items = find_images_even()
-        rows = []
-        for mtime, p in items:
-            rel = p.relative_to(IMAGE_DIR)
-            url = "/file/" + urllib.parse.quote(str(rel).replace("\\", "/"))
-            ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mtime))
-            rows.append(f"""
-              <div class="card">
-                <div class="meta">{html.escape(str(rel))} · {ts}</div>
-                <a href="{url}" target="_blank" rel="noopener">
-                  <img loading="lazy" src="{url}" />
-                </a>
-              </div>
-            """)
-        count = len(items)
-        body = f"""<!doctype html>
+def parse_range(value, size: int, etag: str = "", if_range=None):
+    """
+    Range-Header → (start, length) für genau einen Bereich, None = ganze Datei senden,
+    False = nicht erfüllbar (416). Mehrere Bereiche oder fremde Einheiten → ganze Datei.
+    """
+    if not value or (if_range is not None and if_range.strip() != etag):
+        return None
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            n = int(last)  # Suffix: die letzten n Bytes
+            if n <= 0:
+                return False
+            start = max(0, size - n)
+            end = size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or start >= size or end < start:
+        return False
+    return start, min(end, size - 1) - start + 1
+
+class ChunkedWriter:
+    """
+    Dateiähnliches Ziel für zipfile: puffert bis ZIP_CHUNK Bytes und schreibt sie als HTTP/1.1-Chunk.
+    Ohne seek/tell → zipfile schreibt im Streaming-Modus (Data Descriptor nach jedem Eintrag).
+    tee: optional zweite Datei, die denselben Bytestrom bekommt (ZIP-Cache).
+    """
+
+    def __init__(self, wfile, tee=None, chunk=ZIP_CHUNK):
+        self.wfile = wfile
+        self.tee = tee
+        self.chunk = chunk
+        self._buf = bytearray()
+        self.size = 0
+
+    def write(self, b):
+        self._buf += b
+        if len(self._buf) >= self.chunk:
+            self._emit()
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def _emit(self):
+        if not self._buf:
+            return
+        self.wfile.write(b"%X\r\n" % len(self._buf))
+        self.wfile.write(self._buf)
+        self.wfile.write(b"\r\n")
+        if self.tee is not None:
+            self.tee.write(self._buf)
+        self.size += len(self._buf)
+        self._buf.clear()
+
+    def close(self):
+        self._emit()
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+class ZipCache:
+    """Hält genau ein Archiv (das der zuletzt gezippten Auswahl) auf Platte, Schlüssel = [(Pfad, mtime)]."""
+
+    def __init__(self, dirpath: str):
+        self.dir = Path(dirpath)
+        self.path = self.dir / "selection.zip"
+        self.key = None
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self.path if key == self.key and self.path.exists() else None
+
+    def open_tmp(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self.dir, prefix=".zip-", delete=False)
+
+    def commit(self, key, tmp_name: str):
+        with self._lock:
+            os.replace(tmp_name, self.path)
+            self.key = key
+
+ZIP_CACHE = ZipCache(ZIP_CACHE_DIR) if ZIP_CACHE_DIR else None
+
+class ThumbCache:
+    """
+    Vorschaubilder auf Platte, Schlüssel sha1(Pfad, mtime_ns, Breite), LRU bis max_bytes.
+    Erzeugung im Thread-Pool (cv2 gibt das GIL beim Dekodieren/Skalieren frei), gleichzeitige
+    Anfragen für dasselbe Bild teilen sich einen Job.
+    """
+
+    REDUCE = ((8, "IMREAD_REDUCED_COLOR_8"), (4, "IMREAD_REDUCED_COLOR_4"), (2, "IMREAD_REDUCED_COLOR_2"))
+
+    def __init__(self, dirpath: str, width: int, max_bytes: float, workers: int = 2, quality: int = 80):
+        self.dir = Path(dirpath)
+        self.width = max(16, int(width))
+        self.max_bytes = max(0, int(max_bytes))
+        self.quality = int(quality)
+        self._lru = OrderedDict()   # key -> Größe (Bytes), älteste zuerst
+        self._jobs = {}             # key -> Future
+        self._total = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="thumb")
+        self._reduce = 8            # zuletzt passender IMREAD_REDUCED-Faktor (Frames einer Kamera sind gleich groß)
+        self.hits = self.misses = 0
+        self._load()
+
+    def _load(self):
+        """Vorhandene Thumbnails übernehmen, älteste (mtime) zuerst in der LRU-Reihenfolge."""
+        if not self.dir.exists():
+            return
+        found = []
+        for p in self.dir.glob("*/*.jpg"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            found.append((st.st_mtime, p.stem, st.st_size))
+        for _, key, size in sorted(found):
+            self._lru[key] = size
+            self._total += size
+        self._evict()
+
+    def _path(self, key: str) -> Path:
+        return self.dir / key[:2] / f"{key}.jpg"
+
+    def key(self, rel: str, st) -> str:
+        return hashlib.sha1(f"{rel}|{st.st_mtime_ns}|{self.width}".encode("utf-8")).hexdigest()
+
+    def submit(self, src: Path, rel: str, st):
+        """Path, falls vorhanden, sonst Future des (ggf. schon laufenden) Erzeugungsjobs."""
+        key = self.key(rel, st)
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return self._path(key)
+            fut = self._jobs.get(key)
+            if fut is None or fut.done():  # abgebrochener (nie gelaufener) Job → neu einreihen
+                self.misses += 1
+                fut = self._jobs[key] = self._pool.submit(self._make, src, key)
+            return fut
+
+    def get(self, src: Path, rel: str, st, timeout: float = 10.0) -> Path:
+        r = self.submit(src, rel, st)
+        return r if isinstance(r, Path) else r.result(timeout)
+
+    def prefetch(self, items):
+        """Thumbnails für [(mtime, Path)] im Hintergrund anstoßen (z.B. beim Rendern der Index-Seite)."""
+        for _, p in items:
+            try:
+                self.submit(p, str(p.relative_to(IMAGE_DIR)), p.stat())
+            except OSError:
+                continue
+
+    def _read(self, src: Path):
+        import cv2
+        for f, flag in self.REDUCE:
+            if f > self._reduce:
+                continue
+            img = cv2.imread(str(src), getattr(cv2, flag))
+            if img is None:
+                return None
+            if img.shape[1] >= self.width:
+                self._reduce = f
+                return img
+        self._reduce = 1
+        return cv2.imread(str(src), cv2.IMREAD_COLOR)
+
+    def _make(self, src: Path, key: str) -> Path:
+        import cv2
+        try:
+            img = self._read(src)
+            if img is None:
+                raise OSError(f"cannot decode {src}")
+            h, w = img.shape[:2]
+            if w > self.width:
+                img = cv2.resize(img, (self.width, max(1, round(h * self.width / w))), interpolation=cv2.INTER_AREA)
+            ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                raise OSError(f"cannot encode thumbnail for {src}")
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(buf.tobytes())
+            os.replace(tmp, path)
+            with self._lock:
+                self._lru[key] = len(buf)
+                self._total += len(buf)
+                self._evict()
+            return path
+        finally:
+            with self._lock:
+                self._jobs.pop(key, None)
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._lru) > 1:
+            key, size = self._lru.popitem(last=False)
+            self._total -= size
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        return {"entries": len(self._lru), "bytes": self._total, "hits": self.hits, "misses": self.misses}
+
+THUMBS = ThumbCache(THUMB_CACHE_DIR, THUMB_WIDTH, THUMB_CACHE_MB * 1024 * 1024, THUMB_WORKERS)
+
+def render_index(items) -> bytes:
+    """Index-Seite (HTML) für die ausgewählten Bilder."""
+    rows = []
+    for mtime, p in items:
+        rel = p.relative_to(IMAGE_DIR)
+        q = urllib.parse.quote(str(rel).replace("\\", "/"))
+        url, thumb = "/file/" + q, "/thumb/" + q
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mtime))
+        rows.append(f"""
+          <div class="card">
+            <div class="meta">{html.escape(str(rel))} · {ts}</div>
+            <a href="{url}" target="_blank" rel="noopener">
+              <img loading="lazy" src="{thumb}" width="{THUMB_WIDTH}" />
+            </a>
+          </div>
+        """)
+    count = len(items)
+    body = f"""<!doctype html>
 <html lang="de">
 <head>
   <meta charset="utf-8" />
@@ -179,64 +593,383 @@ class Handler(BaseHTTPRequestHandler):
   <footer>Aktualisiert: {time.strftime("%Y-%m-%d %H:%M:%S")}</footer>
 </body>
 </html>"""
+    return body.encode("utf-8")
+
+def stream_zip(items, wfile, key=None):
+    """ZIP der Auswahl als HTTP/1.1-chunked Body nach wfile schreiben (und ggf. in den ZIP-Cache)."""
+    tee = ZIP_CACHE.open_tmp() if ZIP_CACHE is not None and key is not None else None
+    out = ChunkedWriter(wfile, tee)
+    complete = False
+    try:
+        with zipfile.ZipFile(out, mode="w") as z:
+            for mtime, p in items:
+                ct = zipfile.ZIP_STORED if p.suffix.lower() in STORED_EXTS else zipfile.ZIP_DEFLATED
+                try:
+                    z.write(p, arcname=str(p.relative_to(IMAGE_DIR)), compress_type=ct)
+                except (FileNotFoundError, PermissionError):
+                    continue  # zwischen Auswahl und Zippen gelöscht
+        out.close()
+        complete = True
+    finally:
+        if tee is not None:
+            tee.close()
+            if complete:
+                ZIP_CACHE.commit(key, tee.name)
+            else:
+                os.unlink(tee.name)
+
+class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 für chunked /zip (und Keep-Alive); alle anderen Antworten senden Content-Length
+    protocol_version = "HTTP/1.1"
+    # Header und Body gehen als getrennte Writes raus; mit Nagle + Delayed ACK hinge jede
+    # Keep-Alive-Antwort ~40 ms auf dem zweiten Write
+    disable_nagle_algorithm = True
+
+    def log_message(self, *_):  # silence
+        return
+
+    def do_HEAD(self):
+        if self.path.startswith("/file/"):
+            return self.serve_file()
+        if self.path.startswith("/thumb/"):
+            return self.serve_thumb()
+        return self.respond(405, b"Method not allowed", "text/plain; charset=utf-8")
+
+    def do_GET(self):
+        if self.path in ("/", "/index"):
+            return self.serve_index()
+        if self.path.startswith("/file/"):
+            return self.serve_file()
+        if self.path.startswith("/thumb/"):
+            return self.serve_thumb()
+        if self.path == "/zip":
+            return self.serve_zip()
+        if self.path == "/health":
+            return self.respond(200, b"ok", "text/plain; charset=utf-8")
+        return self.respond(404, b"Not found", "text/plain; charset=utf-8")
+
+    def serve_index(self):
+        items = find_images_even()
+        THUMBS.prefetch(items)
+        data = render_index(items)
         self.send_response(200)
         self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
         self.send_header("Cache-Control", "no-store, must-revalidate")
         self.send_header("Pragma", "no-cache")
         self.send_header("Expires", "0")
         self.end_headers()
-        self.wfile.write(body.encode("utf-8"))
+        self.wfile.write(data)
 
     def serve_file(self):
         rel = urllib.parse.unquote(self.path[len("/file/"):])
         target = (IMAGE_DIR / rel).resolve()
-        if not safe_under(IMAGE_DIR, target) or not target.exists() or not target.is_file():
+        if not safe_under(IMAGE_DIR, target):
             return self.respond(404, b"Not found", "text/plain; charset=utf-8")
         ctype = mimetypes.guess_type(str(target))[0] or "application/octet-stream"
+        self.send_static(target, ctype, "max-age=60, public")
+
+    def serve_thumb(self):
+        rel = urllib.parse.unquote(self.path[len("/thumb/"):])
+        target = (IMAGE_DIR / rel).resolve()
+        if not safe_under(IMAGE_DIR, target) or target.suffix.lower() not in IMG_EXTS:
+            return self.respond(404, b"Not found", "text/plain; charset=utf-8")
+        try:
+            st = target.stat()
+            thumb = THUMBS.get(target, str(target.relative_to(IMAGE_DIR)), st)
+        except FileNotFoundError:
+            return self.respond(404, b"Not found", "text/plain; charset=utf-8")
+        except Exception:
+            # kein OpenCV / Bild nicht lesbar / Zeitüberschreitung → Original ausliefern
+            ctype = mimetypes.guess_type(str(target))[0] or "application/octet-stream"
+            return self.send_static(target, ctype, "max-age=60, public")
+        # Schlüssel enthält die mtime der Quelle → Inhalt ändert sich nie
+        self.send_static(thumb, "image/jpeg", "max-age=86400, public")
+
+    def send_static(self, target: Path, ctype: str, cache_control: str, extra_headers=()):
+        """Datei per sendfile senden; 304 bei passendem Validator, 206/416 bei Range."""
         try:
-            with open(target, "rb") as f:
-                data = f.read()
+            f = open(target, "rb")
         except OSError:
             return self.respond(404, b"Not found", "text/plain; charset=utf-8")
-        self.send_response(200)
-        self.send_header("Content-Type", ctype)
-        self.send_header("Content-Length", str(len(data)))
-        self.send_header("Cache-Control", "max-age=60, public")
-        self.end_headers()
-        self.wfile.write(data)
+        with f:
+            st = os.fstat(f.fileno())
+            if not stat.S_ISREG(st.st_mode):
+                return self.respond(404, b"Not found", "text/plain; charset=utf-8")
+            etag = etag_for(st)
+            common = [("ETag", etag), ("Last-Modified", formatdate(st.st_mtime, usegmt=True)),
+                      ("Cache-Control", cache_control), ("Accept-Ranges", "bytes"), *extra_headers]
+            if not_modified(self.headers, etag, st.st_mtime):
+                self.send_response(304)
+                for k, v in common:
+                    self.send_header(k, v)
+                self.end_headers()
+                return
+            size = st.st_size
+            rng = parse_range(self.headers.get("Range"), size, etag, self.headers.get("If-Range"))
+            if rng is False:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            start, length = rng if rng else (0, size)
+            self.send_response(206 if rng else 200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(length))
+            if rng:
+                self.send_header("Content-Range", f"bytes {start}-{start + length - 1}/{size}")
+            for k, v in common:
+                self.send_header(k, v)
+            self.end_headers()
+            if self.command == "HEAD" or not length:
+                return
+            try:
+                self.wfile.flush()
+                self.connection.sendfile(f, offset=start, count=length)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
 
     def serve_zip(self):
         items = find_images_even()
         if not items:
             return self.respond(404, b"No images", "text/plain; charset=utf-8")
-        buf = io.BytesIO()
-        ts = time.strftime("%Y%m%d_%H%M%S")
-        with zipfile.ZipFile(buf, mode="w", compression=zipfile.ZIP_DEFLATED) as z:
-            for mtime, p in items:
-                rel = p.relative_to(IMAGE_DIR)
-                z.write(p, arcname=str(rel))
-        data = buf.getvalue()
-        fname = f"gallery_{ts}.zip"
+        fname = f"gallery_{time.strftime('%Y%m%d_%H%M%S')}.zip"
+        key = tuple((str(p), m) for m, p in items)
+        cached = ZIP_CACHE.get(key) if ZIP_CACHE is not None else None
+        if cached is not None:
+            return self.send_static(cached, "application/zip", "no-store",
+                                    [("Content-Disposition", f'attachment; filename="{fname}"')])
+
         self.send_response(200)
         self.send_header("Content-Type", "application/zip")
-        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Transfer-Encoding", "chunked")
         self.send_header("Content-Disposition", f'attachment; filename="{fname}"')
         self.end_headers()
-        self.wfile.write(data)
+        try:
+            stream_zip(items, self.wfile, key)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
 
     def respond(self, code, data: bytes, ctype: str):
         self.send_response(code)
         self.send_header("Content-Type", ctype)
         self.send_header("Content-Length", str(len(data)))
         self.end_headers()
-        self.wfile.write(data)
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+class _LoopSink:
+    """wfile-Ersatz für stream_zip im Worker-Thread: schreibt über den Event-Loop, mit Backpressure (drain)."""
+
+    def __init__(self, loop, writer):
+        self.loop = loop
+        self.writer = writer
+
+    async def _write(self, data):
+        self.writer.write(data)
+        await self.writer.drain()
+
+    def write(self, b):
+        asyncio.run_coroutine_threadsafe(self._write(bytes(b)), self.loop).result()
+        return len(b)
+
+    def flush(self):
+        pass
+
+class AsyncGallery:
+    """
+    asyncio-Variante des Handlers: eine Coroutine pro Verbindung, Requests nacheinander (Keep-Alive),
+    alles Blockierende über self.pool (fest begrenzte Thread-Anzahl statt eines Threads pro Verbindung).
+    """
+
+    MAX_HEADER = 16 * 1024
+
+    def __init__(self, io_workers=IO_WORKERS, keepalive=KEEPALIVE_SEC):
+        self.pool = ThreadPoolExecutor(max_workers=max(1, int(io_workers)), thread_name_prefix="gallery-io")
+        self.keepalive = float(keepalive)
+
+    async def _io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    return
+                if not await self._request(head, reader, writer):
+                    return
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    async def _request(self, head: bytes, reader, writer) -> bool:
+        """Einen Request beantworten; True = Verbindung offen halten."""
+        line, _, rest = head.partition(b"\r\n")
+        try:
+            method, target, version = line.decode("latin-1").split(" ", 2)
+            headers = parse_headers(io.BytesIO(rest))
+        except Exception:
+            await self._send(writer, 400, [("Content-Type", "text/plain; charset=utf-8")], b"Bad request", False)
+            return False
+        conn = (headers.get("Connection") or "").lower()
+        keep = conn != "close" if version.strip() == "HTTP/1.1" else conn == "keep-alive"
+        n = int(headers.get("Content-Length") or 0)
+        if n:
+            await reader.readexactly(n)  # Body wird nicht gebraucht
+        head_only = method == "HEAD"
+        if method not in ("GET", "HEAD"):
+            await self._text(writer, 405, b"Method not allowed", keep)
+            return keep
+        path = target
+
+        if path in ("/", "/index") and not head_only:
+            items = await self._io(find_images_even)
+            data = await self._io(self._index, items)
+            await self._send(writer, 200, [("Content-Type", "text/html; charset=utf-8"),
+                                           ("Cache-Control", "no-store, must-revalidate"),
+                                           ("Pragma", "no-cache"), ("Expires", "0")], data, keep)
+        elif path.startswith("/file/"):
+            target = self._target(path, "/file/")
+            if target is None:
+                await self._text(writer, 404, b"Not found", keep)
+            else:
+                ctype = mimetypes.guess_type(str(target))[0] or "application/octet-stream"
+                await self._static(writer, headers, target, ctype, "max-age=60, public", keep, head_only)
+        elif path.startswith("/thumb/"):
+            target = self._target(path, "/thumb/")
+            if target is None or target.suffix.lower() not in IMG_EXTS:
+                await self._text(writer, 404, b"Not found", keep)
+            else:
+                await self._thumb(writer, headers, target, keep, head_only)
+        elif path == "/zip" and not head_only:
+            keep = await self._zip(writer, headers, keep)
+        elif path == "/health" and not head_only:
+            await self._text(writer, 200, b"ok", keep)
+        elif head_only:
+            await self._text(writer, 405, b"Method not allowed", keep)
+        else:
+            await self._text(writer, 404, b"Not found", keep)
+        return keep
+
+    # ---------------- Routen ----------------
+
+    @staticmethod
+    def _index(items):
+        THUMBS.prefetch(items)
+        return render_index(items)
+
+    @staticmethod
+    def _open(target: Path):
+        f = open(target, "rb")
+        return f, os.fstat(f.fileno())
+
+    @staticmethod
+    def _target(path: str, prefix: str):
+        target = (IMAGE_DIR / urllib.parse.unquote(path[len(prefix):])).resolve()
+        return target if safe_under(IMAGE_DIR, target) else None
+
+    @staticmethod
+    def _thumb_lookup(target: Path):
+        """Im Pool: Quelle stat-en, Thumbnail nachschlagen; vorhanden → gleich öffnen (ein Thread-Wechsel)."""
+        st = target.stat()
+        r = THUMBS.submit(target, str(target.relative_to(IMAGE_DIR)), st)
+        return AsyncGallery._open(r) if isinstance(r, Path) else r
+
+    async def _thumb(self, writer, headers, target: Path, keep: bool, head_only: bool):
+        try:
+            r = await self._io(self._thumb_lookup, target)
+            if not isinstance(r, tuple):
+                # shield: der Job ist mit anderen Anfragen geteilt, ein Timeout hier darf ihn nicht abbrechen
+                r = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(r)), 10.0)
+        except FileNotFoundError:
+            return await self._text(writer, 404, b"Not found", keep)
+        except Exception:
+            ctype = mimetypes.guess_type(str(target))[0] or "application/octet-stream"
+            return await self._static(writer, headers, target, ctype, "max-age=60, public", keep, head_only)
+        await self._static(writer, headers, r, "image/jpeg", "max-age=86400, public", keep, head_only)
+
+    async def _static(self, writer, headers, target, ctype: str, cache_control: str, keep: bool,
+                      head_only: bool = False, extra_headers=()):
+        """Wie Handler.send_static: 304 / 206 / 416, Body per loop.sendfile. target: Path oder (Datei, stat)."""
+        try:
+            f, st = target if isinstance(target, tuple) else await self._io(self._open, target)
+        except OSError:
+            return await self._text(writer, 404, b"Not found", keep)
+        try:
+            if not stat.S_ISREG(st.st_mode):
+                return await self._text(writer, 404, b"Not found", keep)
+            etag = etag_for(st)
+            common = [("ETag", etag), ("Last-Modified", formatdate(st.st_mtime, usegmt=True)),
+                      ("Cache-Control", cache_control), ("Accept-Ranges", "bytes"), *extra_headers]
+            if not_modified(headers, etag, st.st_mtime):
+                return await self._send(writer, 304, common, b"", keep, length=False)
+            size = st.st_size
+            rng = parse_range(headers.get("Range"), size, etag, headers.get("If-Range"))
+            if rng is False:
+                return await self._send(writer, 416, [("Content-Range", f"bytes */{size}")], b"", keep)
+            start, length = rng if rng else (0, size)
+            hdrs = [("Content-Type", ctype), ("Content-Length", str(length))]
+            if rng:
+                hdrs.append(("Content-Range", f"bytes {start}-{start + length - 1}/{size}"))
+            await self._send(writer, 206 if rng else 200, hdrs + common, b"", keep, length=False)
+            if length and not head_only:
+                await asyncio.get_running_loop().sendfile(writer.transport, f, start, length)
+        finally:
+            f.close()
+
+    async def _zip(self, writer, headers, keep: bool) -> bool:
+        items = await self._io(find_images_even)
+        if not items:
+            await self._text(writer, 404, b"No images", keep)
+            return keep
+        fname = f"gallery_{time.strftime('%Y%m%d_%H%M%S')}.zip"
+        disp = ("Content-Disposition", f'attachment; filename="{fname}"')
+        key = tuple((str(p), m) for m, p in items)
+        cached = ZIP_CACHE.get(key) if ZIP_CACHE is not None else None
+        if cached is not None:
+            await self._static(writer, headers, cached, "application/zip", "no-store", keep, extra_headers=[disp])
+            return keep
+        await self._send(writer, 200, [("Content-Type", "application/zip"), ("Transfer-Encoding", "chunked"), disp],
+                         b"", keep, length=False)
+        await self._io(stream_zip, items, _LoopSink(asyncio.get_running_loop(), writer), key)
+        return keep
+
+    # ---------------- Antworten ----------------
+
+    async def _text(self, writer, code: int, data: bytes, keep: bool):
+        await self._send(writer, code, [("Content-Type", "text/plain; charset=utf-8")], data, keep)
+
+    async def _send(self, writer, code: int, headers, body: bytes, keep: bool, length: bool = True):
+        out = [f"HTTP/1.1 {code} {HTTPStatus(code).phrase}", f"Date: {formatdate(usegmt=True)}"]
+        out += [f"{k}: {v}" for k, v in headers]
+        if length:
+            out.append(f"Content-Length: {len(body)}")
+        if not keep:
+            out.append("Connection: close")
+        writer.write(("\r\n".join(out) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host: str, port: int):
+        srv = await asyncio.start_server(self.handle, host, port, limit=self.MAX_HEADER, backlog=256)
+        async with srv:
+            await srv.serve_forever()
 
 def run():
     IMAGE_DIR.mkdir(parents=True, exist_ok=True)
-    srv = ThreadingHTTPServer(("0.0.0.0", PORT), Handler)
-    print(f"[gallery] serving {IMAGE_DIR} on :{PORT} (limit={LIMIT}, window={WINDOW_SEC}s, slot≈{WINDOW_SEC/max(LIMIT,1):.1f}s)")
+    INDEX.refresh()
+    INDEX.start()
+    print(f"[gallery] index: {len(INDEX)} image(s) in {INDEX.refresh_ms:.0f} ms, rescan every {INDEX_RESCAN_SEC:g}s")
+    print(f"[gallery] serving {IMAGE_DIR} on :{PORT} (limit={LIMIT}, window={WINDOW_SEC}s, slot≈{WINDOW_SEC/max(LIMIT,1):.1f}s, "
+          f"mode={SERVER_MODE})")
     try:
-        srv.serve_forever()
+        if SERVER_MODE == "async":
+            asyncio.run(AsyncGallery().serve("0.0.0.0", PORT))
+        else:
+            ThreadingHTTPServer(("0.0.0.0", PORT), Handler).serve_forever()
     except KeyboardInterrupt:
         pass
 
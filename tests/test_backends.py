@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from roboflow_counter.stream.backends import Backend, create_backend
+from synth import SynthScene
+
+W, H = 320, 240
+
+
+@pytest.mark.parametrize("scale", [1.0, 0.5])
+def test_cpu_backend_allocs_flat_after_first_frame(scale):
+    scene = SynthScene(W, H, larvae=5, seed=3)
+    be = create_backend("cpu", W, H, scale=scale)
+    be.reset(scene.frame(0)[0])
+    out = be.host_buffer()
+    be.process(scene.frame(1)[0], 0.05, 12, 0.6, 0.3, out=out)
+    first = be.allocs
+    for i in range(2, 40):
+        res = be.process(scene.frame(i)[0], 0.05, 12, 0.6, 0.3, out=out)
+        be.mask()
+    assert be.allocs == first
+    assert res is out and res.shape == (H, W, 3)
+
+
+def test_cpu_backend_owned_output_is_reused():
+    scene = SynthScene(W, H, larvae=5, seed=3)
+    be = create_backend("cpu", W, H)
+    be.reset(scene.frame(0)[0])
+    first_out = be.process(scene.frame(1)[0], 0.05, 12, 0.6, 0.0)
+    first = be.allocs
+    for i in range(2, 20):
+        assert be.process(scene.frame(i)[0], 0.05, 12, 0.6, 0.0) is first_out
+    assert be.allocs == first
+    assert np.count_nonzero(be.mask()) > 0
+
+
+def test_incomplete_backend_fails_at_construction():
+    class Partial(Backend):
+        def _allocate(self):
+            pass
+
+    with pytest.raises(TypeError, match="abstract"):
+        Partial(W, H)
+    assert isinstance(create_backend("cpu", W, H), Backend)
+
+
+def test_cpu_download_fills_out_like_cuda():
+    scene = SynthScene(W, H, larvae=5, seed=3)
+    be = create_backend("cpu", W, H)
+    be.reset(scene.frame(0)[0])
+    be.analyze(scene.frame(1)[0], 0.05, 12)
+    be.composite(0.6, 0.3)  # ins eigene Ausgabebild
+    own = be.download()
+    buf = be.host_buffer()
+    first = be.allocs
+    res = be.download(out=buf)
+    assert res is buf and res is not own
+    np.testing.assert_array_equal(res, own)
+    assert be.allocs == first
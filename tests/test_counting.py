@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from roboflow_counter.tracker.counting import CountingEngine, line_crossings, points_in_polygon
+
+W, H, SIDE = 640, 480, 21  # ungerade Kante → ganzzahliger Zentroid
+
+
+def _run(engine, centers, shape=(H, W), side=SIDE):
+    """Ein Blob (side x side) pro Frame mit Mittelpunkt centers[i]; liefert die Summen je Name."""
+    for cx, cy in centers:
+        mask = np.zeros(shape, np.uint8)
+        x0, y0 = int(cx) - side // 2, int(cy) - side // 2
+        mask[y0:y0 + side, x0:x0 + side] = 255
+        engine.update(mask, now=0.0)
+    return {k: dict(v) for k, v in engine.counter.total.items()}
+
+
+LINE = {"lines": [{"name": "l", "points": [[0, 300], [640, 300]]}], "max_dist": 40}
+
+
+@pytest.mark.parametrize("step", [5, 6, 7, 10])
+def test_line_down_counts_in_once(step):
+    ys = [300 - 8 * step + k * step for k in range(17)]  # trifft bei step 5/6/10 genau y=300
+    assert _run(CountingEngine(LINE), [(320, y) for y in ys]) == {"l": {"in": 1, "out": 0}}
+
+
+@pytest.mark.parametrize("step", [5, 6, 7])
+def test_line_up_counts_out_once(step):
+    ys = [300 + 8 * step - k * step for k in range(17)]
+    assert _run(CountingEngine(LINE), [(320, y) for y in ys]) == {"l": {"in": 0, "out": 1}}
+
+
+def test_line_crossings_on_the_line():
+    p1, p2 = np.array([0.0, 300.0]), np.array([640.0, 300.0])
+    prev = np.array([[320, 295], [320, 300], [320, 305], [320, 300], [700, 290]], np.float32)
+    cur = np.array([[320, 300], [320, 305], [320, 300], [320, 295], [700, 310]], np.float32)
+    # auf die Linie = "in"-Seite erreicht; von der Linie nach oben = "out"; außerhalb des Segments = nichts
+    assert line_crossings(p1, p2, prev, cur).tolist() == [1, 0, 0, -1, 0]
+
+
+def test_jitter_on_line_counts_once():
+    ys = [280, 290, 300, 295, 300, 305, 300, 310, 320]
+    assert _run(CountingEngine(LINE), [(320, y) for y in ys]) == {"l": {"in": 1, "out": 0}}
+
+
+ZONE = {"zones": [{"name": "z", "polygon": [[200, 100], [440, 100], [440, 380], [200, 380]]}], "max_dist": 40}
+
+
+def test_zone_enter_and_leave():
+    xs = list(range(120, 530, 10))
+    assert _run(CountingEngine(ZONE), [(x, 240) for x in xs]) == {"z": {"in": 1, "out": 1}}
+
+
+def test_zone_stays_inside():
+    assert _run(CountingEngine(ZONE), [(x, 240) for x in range(250, 400, 10)]) == {"z": {"in": 0, "out": 0}}
+
+
+def test_points_in_polygon():
+    poly = np.array(ZONE["zones"][0]["polygon"], np.float32)
+    pts = np.array([[300, 200], [100, 200], [439, 379], [500, 500]], np.float32)
+    assert points_in_polygon(pts, poly).tolist() == [True, False, True, False]
+
+
+def test_scale_and_offset_map_config_to_mask_coordinates():
+    # Config in Eingangspixeln, Maske in Analyse-Auflösung 1/2 eines ROI-Fensters ab (100, 50)
+    cfg = {"lines": [{"name": "l", "points": [[100, 350], [740, 350]]}],
+           "zones": [{"name": "z", "polygon": [[300, 250], [500, 250], [500, 450], [300, 450]]}],
+           "max_dist": 40, "min_area": 40}
+    eng = CountingEngine(cfg, scale=0.5, offset=(100, 50))
+    np.testing.assert_allclose(eng.lines[0][1], [[0, 150], [320, 150]])
+    np.testing.assert_allclose(eng.zones[0][1][0], [100, 100])
+    assert eng.min_area == 10 and eng.tracker.max_dist == 20
+    # Maske 320x240: Blob (11x11) läuft bei x=150 von oben nach unten durch Linie und Zone
+    got = _run(eng, [(150, y) for y in range(60, 230, 5)], shape=(240, 320), side=11)
+    assert got == {"l": {"in": 1, "out": 0}, "z": {"in": 1, "out": 1}}
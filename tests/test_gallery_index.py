@@ -0,0 +1,39 @@
+import os
+import threading
+import time
+
+from roboflow_counter.web import gallery_server as gs
+
+
+def test_lazy_refresh_from_concurrent_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(gs, "INDEX_RESCAN_SEC", 0.0)  # jeder items()-Aufruf will aktualisieren
+    now = time.time()
+    dirs = [tmp_path / f"cam{i}" for i in range(4)]
+    for d in dirs:
+        d.mkdir()
+    idx = gs.ImageIndex(tmp_path, window=3600)
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            try:
+                idx.items()
+            except Exception as e:  # z.B. "dictionary changed size during iteration"
+                errors.append(e)
+                return
+
+    ts = [threading.Thread(target=reader) for _ in range(6)]
+    for t in ts:
+        t.start()
+    for i in range(400):
+        p = dirs[i % 4] / f"f{i:04d}.jpg"
+        p.touch()
+        os.utime(p, (now - i, now - i))
+    stop.set()
+    for t in ts:
+        t.join()
+    assert not errors
+    items = idx.items()
+    assert len(items) == 400
+    assert [m for m, _ in items] == sorted(m for m, _ in items)
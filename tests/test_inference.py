@@ -0,0 +1,82 @@
+import pytest
+
+from bench_inference import BOX, Stub, make_frame, marker_x
+from roboflow_counter.stream.inference import InferenceClient
+
+
+@pytest.fixture
+def stub(free_port):
+    s = Stub(free_port, latency_ms=5, per_image_ms=1).start()
+    yield s
+    s.stop()
+
+
+def _client(port: int, **kw) -> InferenceClient:
+    return InferenceClient(f"http://127.0.0.1:{port}", model_id="larvae/1", **kw).start()
+
+
+def test_results_match_frame_ids(stub):
+    client = _client(stub.port, batch_size=4, max_delay_ms=20, max_inflight=2, max_pending=64)
+    assert client.endpoint == f"http://127.0.0.1:{stub.port}"
+    for i in range(40):
+        assert client.submit(i, make_frame(i))
+    # Kacheln: Ergebnis in Vollbild-Koordinaten, ein Ergebnis je Frame
+    x = marker_x(7)
+    assert client.submit("tiled", make_frame(7), tiles=[(x - 50, 100, 160, 160), (0, 0, 10, 10)])
+    client.close(timeout=30)
+
+    res = dict(client.poll())
+    assert sorted(k for k in res if k != "tiled") == list(range(40))
+    for fid, det in res.items():
+        if fid == "tiled":
+            continue
+        assert len(det) == 1
+        assert abs(det.boxes[0][0] - marker_x(fid)) <= 2 and abs(det.boxes[0][1] - 150) <= 2
+    tiled = res["tiled"]
+    big = tiled.boxes[tiled.boxes[:, 2] > BOX / 2]  # die 10x10-Kachel ohne Marker liefert eine leere Box
+    assert len(big) == 1 and abs(big[0][0] - x) <= 2 and abs(big[0][1] - 150) <= 2
+    st = client.stats()
+    assert st["done"] == 41 and st["errors"] == 0 and st["pending"] == 0 and st["batches"] < st["images"]
+
+
+def test_max_pending_drops_frames(free_port):
+    slow = Stub(free_port, latency_ms=300, per_image_ms=0).start()
+    try:
+        client = _client(slow.port, batch_size=1, max_delay_ms=0, max_inflight=1, max_pending=2)
+        accepted = [client.submit(i, make_frame(i)) for i in range(10)]
+        assert accepted == [True, True] + [False] * 8
+        client.close(timeout=30)
+        assert sorted(fid for fid, _ in client.poll()) == [0, 1]
+        st = client.stats()
+        assert st["submitted"] == 2 and st["dropped"] == 8 and st["pending"] == 0
+    finally:
+        slow.stop()
+
+
+@pytest.mark.parametrize("server", ["http500", "down"])
+def test_failed_requests_release_frames(free_port, server):
+    srv = Stub(free_port, latency_ms=0, per_image_ms=0, status=500).start() if server == "http500" else None
+    try:
+        client = _client(free_port, batch_size=2, max_delay_ms=10, max_inflight=1, max_pending=4, timeout=2)
+        for i in range(3):
+            assert client.submit(i, make_frame(i))
+        client.close(timeout=30)
+        assert client.poll() == []
+        st = client.stats()
+        assert st["errors"] == 3 and st["done"] == 0 and st["pending"] == 0
+        assert client.submit(99, make_frame(0)) is False  # nach close() nimmt der Client nichts mehr an
+    finally:
+        if srv is not None:
+            srv.stop()
+
+
+def test_frame_with_failed_tile_is_dropped(stub):
+    client = _client(stub.port, batch_size=1, max_delay_ms=0, max_inflight=1, max_pending=8)
+    x = marker_x(3)
+    # zweite Kachel leer → imencode scheitert → nur diese Kachel fehlt
+    assert client.submit("partial", make_frame(3), tiles=[(x - 50, 100, 160, 160), (0, 0, 0, 10)])
+    assert client.submit("ok", make_frame(3), tiles=[(x - 50, 100, 160, 160)])
+    client.close(timeout=30)
+    assert [fid for fid, _ in client.poll()] == ["ok"]
+    st = client.stats()
+    assert st["errors"] == 1 and st["done"] == 1 and st["pending"] == 0
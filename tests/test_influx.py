@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from bench_influx import StandIn
+from roboflow_counter.stream.influx import InfluxSink
+
+
+def wait_for(pred, timeout: float = 10.0) -> bool:
+    t = time.time() + timeout
+    while time.time() < t:
+        if pred():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def sink_factory(free_port, tmp_path):
+    sinks = []
+
+    def make(**kw) -> InfluxSink:
+        s = InfluxSink(f"http://127.0.0.1:{free_port}", org="o", bucket="b", token="t", tags={"stream": "test"},
+                       flush_sec=0.1, batch_kb=4, spool_dir=str(tmp_path / "spool"), **kw).start()
+        sinks.append(s)
+        return s
+
+    yield make
+    for s in sinks:
+        s.close(timeout=2.0)
+
+
+def _points(sink, start: int, n: int):
+    """Wie ein Frame-Loop, der nichts verlieren will: bei vollen Puffern kurz warten und erneut versuchen."""
+    for i in range(start, start + n):
+        assert wait_for(lambda: sink.point("hl_counts", {"in": i, "out": 0}, {"name": "auslauf"}, ts_ms=1_000_000 + i))
+
+
+def test_delivery_over_one_connection(free_port, sink_factory):
+    srv = StandIn(free_port).start()
+    try:
+        sink = sink_factory()
+        _points(sink, 0, 500)  # mehrere 4-KiB-Batches
+        assert wait_for(lambda: len(srv.lines) == 500)
+        assert srv.lines[0] == "hl_counts,name=auslauf,stream=test in=0i,out=0i 1000000"
+        assert srv.requests > 1 and len(srv.connections) == 1
+        assert sink.errors == 0 and len(set(srv.lines)) == 500
+    finally:
+        srv.stop()
+
+
+def test_outage_spools_and_replays_without_duplicates(free_port, sink_factory):
+    srv = StandIn(free_port).start()
+    sink = sink_factory()
+    _points(sink, 0, 100)
+    assert wait_for(lambda: len(srv.lines) == 100)
+    srv.stop()
+
+    _points(sink, 100, 300)
+    assert wait_for(lambda: sink.stats()["spool_files"] > 0)
+    assert sink.spooled > 0 and len(srv.lines) == 100
+
+    srv2 = StandIn(free_port)
+    srv2.lines = srv.lines  # gemeinsame Liste, schon bevor der erste Request ankommt
+    srv2.start()
+    try:
+        _points(sink, 400, 1)  # nächster erfolgreicher Write liefert den Spool nach
+        assert wait_for(lambda: len(srv2.lines) >= 401)
+        time.sleep(0.3)
+        assert len(srv2.lines) == 401 == len(set(srv2.lines))
+        assert sink.stats()["spool_files"] == 0
+    finally:
+        srv2.stop()
+
+
+def test_rejected_batch_is_dropped_not_spooled(free_port, sink_factory):
+    srv = StandIn(free_port, status=400).start()
+    try:
+        sink = sink_factory()
+        _points(sink, 0, 10)
+        assert wait_for(lambda: len(srv.rejected) == 10)
+        assert wait_for(lambda: sink.errors == 1)
+        assert sink.stats()["spool_files"] == 0 and sink.spooled == 0
+
+        srv.status = 204  # 4xx-Batch wird danach nicht nachgeliefert
+        _points(sink, 10, 5)
+        assert wait_for(lambda: len(srv.lines) == 5)
+        time.sleep(0.3)
+        assert [ln.split()[1] for ln in srv.lines] == [f"in={i}i,out=0i" for i in range(10, 15)]
+    finally:
+        srv.stop()
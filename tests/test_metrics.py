@@ -0,0 +1,53 @@
+import threading
+
+from roboflow_counter.stream.metrics import Metrics
+
+THREADS, N = 8, 5000
+
+
+def test_observe_from_many_threads_loses_nothing():
+    m = Metrics({"stream": "t"})
+    start = threading.Barrier(THREADS)
+
+    def work(i):
+        start.wait()
+        for k in range(N):
+            m.observe("export" if i % 2 else f"stage{k % 3}", 0.001 * (k % 7))
+
+    ts = [threading.Thread(target=work, args=(i,)) for i in range(THREADS)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    total = 0
+    for h in m.stages.values():
+        counts, _, n = h.snapshot()
+        assert sum(counts) == n
+        total += n
+    assert total == THREADS * N
+    assert f'hl_stage_seconds_count{{stream="t",stage="export"}} {THREADS // 2 * N}' in m.render()
+
+
+def test_render_while_new_counters_appear():
+    m = Metrics()
+    stop = threading.Event()
+    errors = []
+
+    def scrape():
+        while not stop.is_set():
+            try:
+                m.render()
+            except RuntimeError as e:  # "dictionary changed size during iteration"
+                errors.append(e)
+                return
+
+    t = threading.Thread(target=scrape)
+    t.start()
+    for k in range(20000):
+        m.inc("hl_frames_total", stream=f"s{k}")
+        m.set("hl_fps", 25.0, stream=f"s{k}")
+    stop.set()
+    t.join()
+    assert not errors
+    out = m.render()
+    assert 'hl_frames_total{stream="s19999"} 1' in out and 'hl_fps{stream="s0"} 25' in out
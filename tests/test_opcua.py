@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("asyncua")
+
+from bench_opcua import STREAM, LocalServer, values_at, wait_for  # noqa: E402
+from roboflow_counter.stream.opcua import OpcuaPublisher  # noqa: E402
+
+
+@pytest.fixture
+def server(free_port):
+    srv = LocalServer(free_port).start()
+    yield srv
+    srv.stop()
+
+
+def _publisher(srv) -> OpcuaPublisher:
+    return OpcuaPublisher(srv.endpoint, stream=STREAM, node_template=f"ns={srv.ns};s=larvacounter.{{stream}}.{{key}}",
+                          publish_sec=0.1, backoff_max_sec=2).start()
+
+
+def test_unknown_key_does_not_block_other_keys(server):
+    pub = _publisher(server)
+    try:
+        want = values_at(1234, 25)
+        pub.update({**want, "gibtsnicht.In": 7})
+        assert wait_for(lambda: server.read() == want, 10)
+        assert pub.connected and pub.errors == 0 and pub.reconnects == 0
+    finally:
+        pub.close()
+
+
+def test_rejected_write_is_per_node(server):
+    asyncio.run_coroutine_threadsafe(server.vars["Fps"].set_read_only(), server.loop).result(5)
+    pub = _publisher(server)
+    try:
+        want = values_at(99, 25)
+        pub.update(want)
+        assert wait_for(lambda: server.read()["Blobs"] == want["Blobs"] and pub.rejected > 0, 10)
+        got = server.read()
+        assert got["Fps"] == 0.0
+        assert {k: v for k, v in got.items() if k != "Fps"} == {k: v for k, v in want.items() if k != "Fps"}
+        assert pub.errors == 0 and pub.reconnects == 0
+    finally:
+        pub.close()
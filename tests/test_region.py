@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from roboflow_counter.stream.region import RegionFilter
+
+H, W = 600, 600
+
+
+def _noisy_mask():
+    """~90000 Einzelpixel-Cluster (Raster mit Abstand 2, 8er-Nachbarschaft getrennt) + zwei Larven."""
+    mask = np.zeros((H, W), np.uint8)
+    mask[::2, ::2] = 255
+    mask[100:120, 100:140] = 255
+    mask[400:430, 300:320] = 255
+    gray = np.full((H, W), 40, np.uint8)
+    gray[95:125, 95:145] = 200  # Larvenkörper, in den die Maske wachsen darf
+    return mask, gray
+
+
+def test_blob_filter_and_growth():
+    mask = np.zeros((H, W), np.uint8)
+    mask[100:120, 100:140] = 255
+    mask[300, 300] = 255
+    gray = np.full((H, W), 40, np.uint8)
+    gray[95:125, 95:145] = 200
+    rf = RegionFilter(min_pixels=50, grow_iters=3, edge_threshold=20, gray_delta=10)
+    out = rf.apply(mask, gray)
+    assert out[300, 300] == 0
+    assert out[97:123, 97:143].all() and out[93, 100] == 0
+
+
+@pytest.mark.parametrize("min_pixels", [50, 1])
+def test_label_overflow_with_gray_delta(min_pixels):
+    mask, gray = _noisy_mask()
+    rf = RegionFilter(min_pixels=min_pixels, grow_iters=2, edge_threshold=20, gray_delta=10)
+    out = rf.apply(mask, gray)
+    assert out[100:120, 100:140].all()
+    if min_pixels > 1:
+        # Rauschen raus, danach wieder 16-bit-Labels und Wachstum mit gray_delta
+        assert out[2, 2] == 0 and out[98, 98] == 255
+    assert rf.labels.dtype == np.uint16 and rf.labels is rf._labels16
+
+    # nächstes Frame läuft wieder über den vorab angelegten Puffer
+    mask2 = np.zeros((H, W), np.uint8)
+    mask2[100:120, 100:140] = 255
+    rf.apply(mask2, gray)
+    assert rf.labels is rf._labels16
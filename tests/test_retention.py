@@ -0,0 +1,112 @@
+import os
+import time
+
+from roboflow_counter.util.retention import Retention
+
+NOW = time.time()
+DAY = 86400.0
+
+
+def _file(root, rel, age_sec, size=100):
+    p = root / rel
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_bytes(b"x" * size)
+    t = NOW - age_sec
+    os.utime(p, (t, t))
+    return p
+
+
+def _age_dirs(root, age_sec):
+    """Verzeichnis-mtimes zurückdatieren (sonst gelten frisch angelegte leere Verzeichnisse als in Arbeit)."""
+    t = NOW - age_sec
+    for d, _, _ in os.walk(root):
+        os.utime(d, (t, t))
+
+
+def _names(root):
+    return sorted(str(p.relative_to(root)) for p in root.rglob("*") if p.is_file() or p.is_symlink())
+
+
+def test_age_cutoff_removes_whole_old_days_and_single_files(tmp_path):
+    for h in ("00", "01"):
+        _file(tmp_path, f"cam/2027-01-01/{h}/a.jpg", 20 * DAY)
+        _file(tmp_path, f"cam/2027-01-01/{h}/b.jpg", 20 * DAY)
+    _file(tmp_path, "cam/2027-01-10/00/old.jpg", 15 * DAY)
+    _file(tmp_path, "cam/2027-01-10/00/new.jpg", 1 * DAY)
+    _age_dirs(tmp_path, 1 * DAY)
+    r = Retention(str(tmp_path), max_age_sec=14 * DAY, pause_sec=0)
+    whole, single, (n, total) = r.plan(now=NOW)
+    assert [d for d, _, _ in whole] == [str(tmp_path / "cam/2027-01-01")]
+    assert single == [(str(tmp_path / "cam/2027-01-10/00/old.jpg"), 100)]
+    assert (n, total) == (6, 600)
+
+    res = r.run(now=NOW)
+    assert (res["dirs"], res["files"], res["bytes"], res["errors"]) == (1, 5, 500, 0)
+    assert (res["kept_files"], res["kept_bytes"]) == (1, 100)
+    assert _names(tmp_path) == ["cam/2027-01-10/00/new.jpg"]
+    assert not (tmp_path / "cam/2027-01-01").exists() and tmp_path.exists()
+
+
+def test_quota_deletes_oldest_down_to_target_ratio(tmp_path):
+    for i in range(10):
+        _file(tmp_path, f"cam/d/f{i}.jpg", 100 - i, size=1000)  # f0 am ältesten
+    r = Retention(str(tmp_path), max_bytes=5000, target_ratio=0.8, pause_sec=0)
+    res = r.run(now=NOW)
+    assert res["files"] == 6 and res["kept_bytes"] == 4000
+    assert _names(tmp_path) == [f"cam/d/f{i}.jpg" for i in range(6, 10)]
+    # Hysterese: wieder knapp an der Grenze (5000 = nicht darüber) → nichts zu tun
+    _file(tmp_path, "cam/d/f10.jpg", 0, size=1000)
+    assert r.run(now=NOW)["files"] == 0
+
+
+def test_empty_dirs_only_after_grace(tmp_path):
+    (tmp_path / "cam/old/00").mkdir(parents=True)
+    _age_dirs(tmp_path, 3600)
+    (tmp_path / "cam/fresh").mkdir()
+    os.utime(tmp_path / "cam/fresh", (NOW - 5, NOW - 5))  # gerade vom Exporter angelegt
+    r = Retention(str(tmp_path), max_age_sec=DAY, grace_sec=60, pause_sec=0)
+    res = r.run(now=NOW)
+    assert res["dirs"] == 1 and res["files"] == 0
+    assert not (tmp_path / "cam/old").exists() and (tmp_path / "cam/fresh").is_dir()
+
+
+def test_dry_run_deletes_nothing(tmp_path):
+    _file(tmp_path, "cam/2027-01-01/00/a.jpg", 20 * DAY)
+    _file(tmp_path, "cam/2027-01-02/00/b.jpg", 20 * DAY)
+    _file(tmp_path, "cam/2027-01-02/00/c.jpg", 0)
+    _age_dirs(tmp_path, 1 * DAY)
+    before = _names(tmp_path)
+    r = Retention(str(tmp_path), max_age_sec=14 * DAY, pause_sec=0)
+    res = r.run(dry_run=True, now=NOW)
+    assert res["dry_run"] and (res["dirs"], res["files"], res["bytes"]) == (1, 2, 200)
+    assert _names(tmp_path) == before
+    assert r.run(now=NOW)["files"] == 2
+
+
+def test_file_written_after_indexing_survives(tmp_path, monkeypatch):
+    _file(tmp_path, "cam/2027-01-01/00/a.jpg", 20 * DAY)
+    _file(tmp_path, "cam/2027-01-01/00/b.jpg", 20 * DAY)
+    _age_dirs(tmp_path, 20 * DAY)
+    r = Retention(str(tmp_path), max_age_sec=14 * DAY, pause_sec=0)
+    plan = r.plan
+
+    def plan_then_write(now=None):
+        res = plan(now)
+        (tmp_path / "cam/2027-01-01/00/late.jpg").write_bytes(b"new")  # Exporter schreibt nach dem Index
+        return res
+
+    monkeypatch.setattr(r, "plan", plan_then_write)
+    res = r.run(now=NOW)
+    assert res["dirs"] == 0 and res["files"] == 2
+    assert _names(tmp_path) == ["cam/2027-01-01/00/late.jpg"]
+
+
+def test_symlinks_keep_their_directory(tmp_path):
+    keep = _file(tmp_path, "elsewhere/keep.jpg", 0)
+    _file(tmp_path, "cam/2027-01-01/00/a.jpg", 20 * DAY)
+    (tmp_path / "cam/2027-01-01/00/link.jpg").symlink_to(keep)
+    _age_dirs(tmp_path, 20 * DAY)
+    r = Retention(str(tmp_path / "cam"), max_age_sec=14 * DAY, pause_sec=0)
+    res = r.run(now=NOW)
+    assert res["dirs"] == 0 and res["files"] == 1
+    assert (tmp_path / "cam/2027-01-01/00/link.jpg").is_symlink() and keep.exists()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Galerie-Auswahl select_evenly_spaced (web/gallery_server.py)
+- vergleicht die bisect-Variante mit der früheren linearen Suche (O(count · N), hier als Referenz)
+- prüft dabei, dass beide für dieselbe Eingabe exakt dieselbe Auswahl liefern
+  (auch mit vielen gleichen mtimes, Bildern außerhalb des Fensters und Lücken-Auffüllung)
+- misst optional den Index-Refresh (ImageIndex) auf einem synthetischen Verzeichnisbaum
+
+Aufruf:
+  PYTHONPATH=src python tools/bench/bench_gallery.py [--n 1000 10000 100000] [--limit 20 200 2000]
+        [--index-files 200000] [--json out.json]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from roboflow_counter.web import gallery_server as gs  # noqa: E402
+
+WINDOW = 300.0
+
+
+def rglob_scan(dirpath: Path):
+    """Frühere Implementierung (voller rglob + stat je Datei) als Referenz für ImageIndex."""
+    items = []
+    if not dirpath.exists():
+        return items
+    for p in dirpath.rglob("*"):
+        if p.is_file() and p.suffix.lower() in gs.IMG_EXTS:
+            try:
+                items.append((p.stat().st_mtime, p))
+            except OSError:
+                continue
+    return items
+
+
+def select_reference(items, now, window, count, fill_gaps=True):
+    """Frühere Implementierung (lineare Suche je Slot), nur als Referenz für Ergebnis und Laufzeit."""
+    start = now - window
+    slot = float(window) / float(count)
+    centers = [start + (i + 0.5) * slot for i in range(count)]
+    in_window = [(m, p) for (m, p) in items if start <= m <= now]
+    all_sorted = sorted(items, key=lambda x: x[0], reverse=True)
+    used = set()
+    selection = [None] * count
+    for i, c in enumerate(centers):
+        best = None
+        best_dt = None
+        for (m, p) in in_window:
+            if p in used:
+                continue
+            dt = abs(m - c)
+            if best_dt is None or dt < best_dt:
+                best_dt = dt
+                best = (m, p)
+        if best is not None:
+            selection[i] = best
+            used.add(best[1])
+    if fill_gaps:
+        for i in range(count):
+            if selection[i] is None:
+                for (m, p) in all_sorted:
+                    if p not in used:
+                        selection[i] = (m, p)
+                        used.add(p)
+                        break
+    out = [x for x in selection if x is not None]
+    out.sort(key=lambda x: x[0], reverse=True)
+    return out[:count]
+
+
+def make_items(n: int, now: float, seed: int, ties: bool = False, outside: float = 0.3, shuffle: bool = False):
+    """n Bilder: Anteil `outside` vor dem Fenster (bis 1 h alt), ein paar mit mtime > now."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        u = rng.random()
+        if u < outside:
+            m = now - WINDOW - rng.uniform(0, 3600)
+        elif u < outside + 0.01:
+            m = now + rng.uniform(0, 5)
+        else:
+            m = now - rng.uniform(0, WINDOW)
+        if ties:
+            m = float(round(m))
+        items.append((m, Path(f"/export/cam{i % 8}/frame_{i:07d}.jpg")))
+    if not shuffle:
+        items.sort(key=lambda x: x[0])  # wie ImageIndex.items()
+    return items
+
+
+def check(rounds: int) -> int:
+    """Zufällige Eingaben (klein, viele Gleichstände) gegen die Referenz prüfen; liefert Anzahl Abweichungen."""
+    bad = 0
+    rng = random.Random(0)
+    for k in range(rounds):
+        now = 1_700_000_000.0 + rng.random()
+        n = rng.choice([0, 1, 3, 10, 50, 300])
+        items = make_items(n, now, seed=k, ties=rng.random() < 0.5, outside=rng.random(), shuffle=rng.random() < 0.5)
+        count = rng.choice([1, 5, 20, 60])
+        window = rng.choice([WINDOW, 60.0, 7.0])
+        for fill in (0, 1):
+            gs.FILL_GAPS = fill
+            if gs.select_evenly_spaced(items, now, window, count) != select_reference(items, now, window, count, fill):
+                bad += 1
+    gs.FILL_GAPS = 1
+    return bad
+
+
+def timeit(fn, min_time: float = 0.2):
+    n, t0 = 0, time.perf_counter()
+    while True:
+        fn()
+        n += 1
+        dt = time.perf_counter() - t0
+        if dt >= min_time:
+            return dt / n * 1000.0
+
+
+def bench_select(ns, limits, ref_max: float) -> list:
+    out = []
+    now = 1_700_000_000.0
+    for n in ns:
+        items = make_items(n, now, seed=n)
+        for count in limits:
+            r = {"case": f"select/n{n}/limit{count}", "n": n, "limit": count}
+            r["bisect_ms"] = round(timeit(lambda: gs.select_evenly_spaced(items, now, WINDOW, count)), 3)
+            if n * count <= ref_max:
+                r["linear_ms"] = round(timeit(lambda: select_reference(items, now, WINDOW, count)), 3)
+                r["speedup"] = round(r["linear_ms"] / r["bisect_ms"], 1)
+                r["same"] = gs.select_evenly_spaced(items, now, WINDOW, count) == select_reference(items, now, WINDOW, count)
+            out.append(r)
+    return out
+
+
+def bench_index(files: int, dirs: int) -> dict:
+    """ImageIndex: Erst-Scan, Refresh ohne Änderung, Refresh nach 50 neuen Dateien; Vergleich mit rglob_scan()."""
+    now = time.time()
+    with tempfile.TemporaryDirectory(prefix="gallery-bench-") as tmp:
+        root = Path(tmp)
+        subs = [root / f"cam{i % 8}" / f"d{i:04d}" for i in range(dirs)]
+        for d in subs:
+            d.mkdir(parents=True, exist_ok=True)
+        rng = random.Random(1)
+        for i in range(files):
+            p = subs[i % dirs] / f"f{i:07d}.jpg"
+            p.touch()
+            age = rng.uniform(0, 86400)
+            os.utime(p, (now - age, now - age))
+        idx = gs.ImageIndex(root, WINDOW, keep_older=20)
+        t0 = time.perf_counter()
+        idx.refresh()
+        first = (time.perf_counter() - t0) * 1000.0
+        noop = timeit(idx.refresh)
+        for i in range(50):
+            (subs[-1] / f"new{i}.jpg").touch()
+        t0 = time.perf_counter()
+        idx.refresh()
+        incr = (time.perf_counter() - t0) * 1000.0
+        items_ms = timeit(idx.items)
+        scan_ms = timeit(lambda: rglob_scan(root), min_time=0.5)
+        return {"case": f"index/files{files}/dirs{dirs}", "files": files, "dirs": dirs, "indexed": len(idx),
+                "first_ms": round(first, 1), "refresh_noop_ms": round(noop, 2), "refresh_50_new_ms": round(incr, 2),
+                "items_ms": round(items_ms, 3), "rglob_scan_ms": round(scan_ms, 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--limit", type=int, nargs="+", default=[20, 200, 2000])
+    ap.add_argument("--ref-max", type=float, default=2e7, help="Referenz nur bis n · limit <= ref-max messen")
+    ap.add_argument("--check", type=int, default=300, help="Zufallsrunden für den Ergebnisvergleich")
+    ap.add_argument("--index-files", type=int, default=0, help="> 0: ImageIndex mit so vielen Dateien messen")
+    ap.add_argument("--index-dirs", type=int, default=200)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+
+    bad = check(args.check)
+    print(f"check: {args.check} random inputs x 2 (FILL_GAPS 0/1), mismatches: {bad}")
+    results = bench_select(args.n, args.limit, args.ref_max)
+    for r in results:
+        ref = f"linear {r['linear_ms']:10.3f} ms  x{r['speedup']:<7} same={r['same']}" if "linear_ms" in r else ""
+        print(f"{r['case']:<28} bisect {r['bisect_ms']:9.3f} ms  {ref}")
+    if args.index_files > 0:
+        r = bench_index(args.index_files, args.index_dirs)
+        results.append(r)
+        print(f"{r['case']:<28} first {r['first_ms']} ms, refresh {r['refresh_noop_ms']} ms (no change) / "
+              f"{r['refresh_50_new_ms']} ms (50 new), items {r['items_ms']} ms, rglob {r['rglob_scan_ms']} ms")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps({"bench": "gallery", "check_mismatches": bad,
+                                                   "results": results}, indent=2))
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lasttest: Galerie-Server im Thread-Modus (ThreadingHTTPServer) gegen SERVER_MODE=async
+- legt ein temporäres Bildverzeichnis mit synthetischen JPEG-Frames an (tools/bench/synth.py)
+- startet beide Server als eigene Prozesse, wärmt Index und Thumbnails auf
+- simuliert Dashboards: jeder Client lädt "/" und danach alle /thumb/-Bilder der Seite, in Schleife
+  (--keepalive: eine Verbindung pro Client; sonst neue Verbindung pro Request)
+- gemessen: Requests/s, Latenz p50/p99 je Request, Fehler, max. Threads des Serverprozesses
+
+Aufruf:
+  PYTHONPATH=src python tools/bench/bench_gallery_load.py [--clients 50] [--duration 10]
+        [--images 40] [--no-keepalive] [--modes threaded async] [--json out.json]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synth import SynthScene  # noqa: E402
+
+SRC = str(Path(__file__).resolve().parents[2] / "src")
+
+
+def make_images(root: Path, n: int, w: int = 1280, h: int = 720):
+    scene = SynthScene(w, h, larvae=30, seed=3)
+    now = time.time()
+    for i in range(n):
+        frame, _ = scene.frame(i)
+        p = root / f"cam{i % 2}" / f"frame_{i:05d}.jpg"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(p), frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        t = now - (n - i) * 5.0
+        os.utime(p, (t, t))
+
+
+def start_server(mode: str, port: int, images: Path, thumbs: Path) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=SRC, SERVER_MODE=mode, PORT=str(port), IMAGE_DIR=str(images),
+               THUMB_CACHE_DIR=str(thumbs), LIMIT="20", WINDOW_SEC="300")
+    proc = subprocess.Popen([sys.executable, "-m", "roboflow_counter.web.gallery_server"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def page_urls(port: int) -> list:
+    html = urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=10).read().decode("utf-8")
+    thumbs = re.findall(r'src="(/thumb/[^"]+)"', html)
+    for u in thumbs:  # Thumbnails einmal erzeugen lassen (Cache warm)
+        urllib.request.urlopen(f"http://127.0.0.1:{port}{u}", timeout=30).read()
+    return ["/"] + thumbs
+
+
+def threads_of(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class Conn:
+    """Minimaler HTTP/1.1-Client (nur Content-Length-Antworten) über asyncio-Streams."""
+
+    def __init__(self, port: int, keepalive: bool):
+        self.port = port
+        self.keepalive = keepalive
+        self.reader = self.writer = None
+
+    async def get(self, path: str) -> int:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        conn = "keep-alive" if self.keepalive else "close"
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\nConnection: {conn}\r\n\r\n".encode())
+        await self.writer.drain()
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        m = re.search(rb"(?i)\r\ncontent-length:\s*(\d+)", head)
+        if m:
+            await self.reader.readexactly(int(m.group(1)))
+        if not self.keepalive or re.search(rb"(?i)\r\nconnection:\s*close", head):
+            await self.close()
+        return status
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+async def load(port: int, urls: list, clients: int, duration: float, keepalive: bool, pid: int) -> dict:
+    lat, errors = [], 0
+    stop = time.perf_counter() + duration
+    threads_max = 0
+
+    async def client():
+        nonlocal errors
+        c = Conn(port, keepalive)
+        while time.perf_counter() < stop:
+            for u in urls:
+                t0 = time.perf_counter()
+                try:
+                    ok = await c.get(u) == 200
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    ok = False
+                    await c.close()
+                if ok:
+                    lat.append(time.perf_counter() - t0)
+                else:
+                    errors += 1
+        await c.close()
+
+    async def sampler():
+        nonlocal threads_max
+        while time.perf_counter() < stop:
+            threads_max = max(threads_max, threads_of(pid))
+            await asyncio.sleep(0.05)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(sampler(), *(client() for _ in range(clients)))
+    wall = time.perf_counter() - t0
+    a = np.asarray(lat) * 1000.0
+    return {
+        "requests": int(a.size), "errors": errors, "seconds": round(wall, 2),
+        "rps": round(a.size / wall, 1),
+        "p50_ms": round(float(np.percentile(a, 50)), 2) if a.size else 0.0,
+        "p99_ms": round(float(np.percentile(a, 99)), 2) if a.size else 0.0,
+        "threads_max": threads_max,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=50)
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--images", type=int, default=40)
+    ap.add_argument("--modes", nargs="+", default=["threaded", "async"], choices=["threaded", "async"])
+    ap.add_argument("--no-keepalive", action="store_true")
+    ap.add_argument("--port", type=int, default=18190)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+    keepalive = not args.no_keepalive
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="gallery-load-") as tmp:
+        images = Path(tmp) / "export"
+        make_images(images, args.images)
+        for k, mode in enumerate(args.modes):
+            port = args.port + k
+            proc = start_server(mode, port, images, Path(tmp) / f"thumbs-{mode}")
+            try:
+                urls = page_urls(port)
+                r = asyncio.run(load(port, urls, args.clients, args.duration, keepalive, proc.pid))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=5)
+            r.update({"case": f"gallery/{mode}/c{args.clients}/{'keepalive' if keepalive else 'close'}",
+                      "mode": mode, "clients": args.clients, "keepalive": keepalive, "page_requests": len(urls)})
+            results.append(r)
+            print(f"{r['case']:<36} {r['rps']:8.1f} req/s  p50 {r['p50_ms']:7.2f} ms  p99 {r['p99_ms']:8.2f} ms  "
+                  f"errors {r['errors']}  threads≤{r['threads_max']}")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps({"bench": "gallery_load", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
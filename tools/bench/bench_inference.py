@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Inferenz-Client (stream/inference.py) gegen einen lokalen Stub des Roboflow Inference Servers
+- Stub: POST /infer/object_detection (HTTP/1.1 Keep-Alive), dekodiert jedes Bild und meldet das helle
+  Marker-Rechteck als Detection; Rechenzeit simuliert mit --latency-ms je Request + --per-image-ms je Bild
+  (wie eine GPU, die Batches günstiger rechnet als Einzelbilder)
+- Frames: 640x360 mit Marker an einer von der Frame-ID abhängigen Position → prüft, dass jedes Ergebnis
+  dem richtigen Frame zugeordnet wird
+- Vergleich: Einzelrequests (batch 1, inflight 1) gegen Micro-Batching + parallele Requests
+- gemessen: Durchsatz (Frames/s, Requests/s), Latenz Ende-zu-Ende p50/p99, verworfene Frames, Verbindungen
+
+Aufruf:
+  PYTHONPATH=src python tools/bench/bench_inference.py [--fps 60] [--duration 5] [--latency-ms 30]
+        [--per-image-ms 5] [--configs 1x1 4x2 8x2] [--json out.json]
+"""
+
+from __future__ import annotations
+import argparse
+import base64
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from roboflow_counter.stream.inference import InferenceClient  # noqa: E402
+
+W, H, BOX = 640, 360, 40
+
+
+def marker_x(i: int) -> int:
+    return 20 + (i * 13) % (W - 2 * BOX)
+
+
+def make_frame(i: int) -> np.ndarray:
+    f = np.full((H, W, 3), 30, np.uint8)
+    x = marker_x(i)
+    f[150:150 + BOX, x:x + BOX] = 255
+    return f
+
+
+class Stub:
+    def __init__(self, port: int, latency_ms: float, per_image_ms: float, status: int = 200):
+        self.port = port
+        self.status = status  # != 200 → Fehlerantwort ohne Ergebnisse
+        self.latency = latency_ms / 1000.0
+        self.per_image = per_image_ms / 1000.0
+        self.requests = 0
+        self.images = 0
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.gpu = threading.Lock()  # ein "GPU"-Slot: Requests rechnen nacheinander
+
+    def start(self) -> "Stub":
+        outer = self
+
+        class H(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))))
+                if outer.status != 200:
+                    body = b'{"message":"model not loaded"}'
+                    self.send_response(outer.status)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                out = []
+                for im in req["image"]:
+                    buf = np.frombuffer(base64.b64decode(im["value"]), np.uint8)
+                    g = cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE)
+                    x, y, w, h = cv2.boundingRect(cv2.threshold(g, 128, 255, cv2.THRESH_BINARY)[1])
+                    out.append({"predictions": [{"x": x + w / 2, "y": y + h / 2, "width": w, "height": h,
+                                                 "confidence": 0.9, "class": "larva", "class_id": 0}],
+                                "image": {"width": g.shape[1], "height": g.shape[0]}})
+                with outer.gpu:
+                    time.sleep(outer.latency + outer.per_image * len(out))
+                with outer.lock:
+                    outer.requests += 1
+                    outer.images += len(out)
+                    outer.connections.add(self.client_address)
+                body = json.dumps(out).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *a):
+                pass
+
+        self.srv = ThreadingHTTPServer(("127.0.0.1", self.port), H)
+        self.srv.daemon_threads = True
+        threading.Thread(target=self.srv.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.srv.shutdown()
+        self.srv.server_close()
+
+
+def run(cfg: str, fps: float, duration: float, latency_ms: float, per_image_ms: float, port: int) -> dict:
+    batch, inflight = (int(x) for x in cfg.split("x"))
+    stub = Stub(port, latency_ms, per_image_ms).start()
+    frames = [make_frame(i) for i in range(64)]
+    client = InferenceClient(f"http://127.0.0.1:{port}", model_id="larvae/1", batch_size=batch,
+                             max_delay_ms=max(5.0, 1000.0 / fps * 0.5 * batch), max_inflight=inflight).start()
+    mismatches = 0
+    n = int(fps * duration)
+    t_start = time.perf_counter()
+    for i in range(n):
+        client.submit(i, frames[i % 64])
+        for fid, det in client.poll():
+            if len(det) != 1 or abs(det.boxes[0][0] - marker_x(fid % 64)) > 2:
+                mismatches += 1
+        dt = t_start + (i + 1) / fps - time.perf_counter()
+        if dt > 0:
+            time.sleep(dt)
+    client.close(timeout=30)
+    wall = time.perf_counter() - t_start
+    for fid, det in client.poll():
+        if len(det) != 1 or abs(det.boxes[0][0] - marker_x(fid % 64)) > 2:
+            mismatches += 1
+    stub.stop()
+    e2e = np.asarray(client._lat_e2e) if client._lat_e2e else np.zeros(1)
+    return {"case": f"infer/b{batch}xi{inflight}/fps{fps:g}", "batch": batch, "inflight": inflight,
+            "submitted": client.submitted, "dropped": client.dropped, "done": client.done, "errors": client.errors,
+            "frames_per_s": round(client.done / wall, 1), "requests": stub.requests,
+            "requests_per_s": round(stub.requests / wall, 1), "mean_batch": round(stub.images / max(1, stub.requests), 2),
+            "connections": len(stub.connections), "mismatches": mismatches,
+            "e2e_p50_ms": round(float(np.percentile(e2e, 50)), 1), "e2e_p99_ms": round(float(np.percentile(e2e, 99)), 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fps", type=float, default=60.0, help="Frames pro Sekunde an den Client")
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--latency-ms", type=float, default=30.0, help="Stub: feste Zeit je Request")
+    ap.add_argument("--per-image-ms", type=float, default=5.0, help="Stub: Zeit je Bild im Batch")
+    ap.add_argument("--configs", nargs="+", default=["1x1", "4x2", "8x2"], help="batch x inflight")
+    ap.add_argument("--port", type=int, default=19001)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+    results = []
+    for k, cfg in enumerate(args.configs):
+        r = run(cfg, args.fps, args.duration, args.latency_ms, args.per_image_ms, args.port + k)
+        results.append(r)
+        print(f"{r['case']:<24} {r['frames_per_s']:7.1f} frames/s {r['requests_per_s']:6.1f} req/s "
+              f"(batch ~{r['mean_batch']}, {r['connections']} conn)  e2e p50 {r['e2e_p50_ms']:7.1f} ms "
+              f"p99 {r['e2e_p99_ms']:7.1f} ms  dropped {r['dropped']}/{r['submitted'] + r['dropped']}  "
+              f"errors {r['errors']}  mismatches {r['mismatches']}")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps({"bench": "inference", "results": results}, indent=2))
+    sys.exit(1 if any(r["mismatches"] or r["errors"] for r in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark + Funktionsprobe: InfluxDB-Sink (stream/influx.py) gegen einen lokalen Stand-in-Server
+- Stand-in: ThreadingHTTPServer mit POST /api/v2/write, zählt Zeilen und Verbindungen, optional
+  künstliche Latenz (--latency-ms), lässt sich für den Ausfall-Test ab- und wieder anschalten
+- misst die Kosten von point() im aufrufenden Thread (mean/p99 in µs) – das ist alles, was der Frame-Loop zahlt
+- Ausfall: Server weg → Batches gehen in den Spool; Server wieder da → Spool wird nachgeliefert
+- prüft, dass jede Zeile genau einmal ankommt und die Verbindung wiederverwendet wird
+
+Aufruf:
+  PYTHONPATH=src python tools/bench/bench_influx.py [--points 20000] [--pace 20] [--latency-ms 20] [--json out.json]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from roboflow_counter.stream.influx import InfluxSink  # noqa: E402
+
+
+class StandIn:
+    """Minimaler Influx-Ersatz: nimmt Line Protocol an und merkt sich die Zeilen (status != 2xx → abgelehnt)."""
+
+    def __init__(self, port: int, latency_ms: float = 0.0, status: int = 204):
+        self.port = port
+        self.latency = latency_ms / 1000.0
+        self.status = status
+        self.lines = []
+        self.rejected = []
+        self.requests = 0
+        self.connections = set()
+        self.socks = []
+        self.lock = threading.Lock()
+        self.srv = None
+
+    def start(self):
+        outer = self
+
+        class H(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with outer.lock:
+                    outer.socks.append(self.connection)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+                if outer.latency:
+                    time.sleep(outer.latency)
+                status = outer.status
+                with outer.lock:
+                    outer.requests += 1
+                    outer.connections.add(self.client_address)
+                    (outer.lines if status < 300 else outer.rejected).extend(body.decode("utf-8").splitlines())
+                msg = b"" if status < 300 else b'{"code":"invalid","message":"unable to parse"}'
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(msg)))
+                self.end_headers()
+                self.wfile.write(msg)
+
+            def log_message(self, *a):
+                pass
+
+        self.srv = ThreadingHTTPServer(("127.0.0.1", self.port), H)
+        self.srv.daemon_threads = True
+        threading.Thread(target=self.srv.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Server weg, auch offene Keep-Alive-Verbindungen (wie ein Influx-Neustart)."""
+        self.srv.shutdown()
+        self.srv.server_close()
+        with self.lock:
+            for s in self.socks:
+                try:
+                    s.shutdown(2)
+                except OSError:
+                    pass
+
+
+def run(points: int, latency_ms: float, port: int, pace: int = 20) -> dict:
+    with tempfile.TemporaryDirectory(prefix="influx-bench-") as tmp:
+        srv = StandIn(port, latency_ms).start()
+        sink = InfluxSink(f"http://127.0.0.1:{port}", org="o", bucket="b", token="t", tags={"stream": "bench"},
+                          flush_sec=0.2, batch_kb=64, spool_dir=tmp, spool_mb=16).start()
+
+        # 1) Durchsatz / Kosten pro point() im Aufrufer
+        lat = np.empty(points)
+        for i in range(points):
+            t0 = time.perf_counter()
+            sink.point("hl_pipeline", {"fps": 25.0, "frames": i, "capture_dropped": i // 10}, ts_ms=i)
+            lat[i] = time.perf_counter() - t0
+            if i % pace == pace - 1:
+                time.sleep(0.001)  # Frame-Loop-ähnlich: zwischen den Frames bekommt der Flush-Thread CPU
+        t_wait = time.time() + 10
+        while sink.points > len(srv.lines) and time.time() < t_wait:
+            time.sleep(0.05)
+        phase1 = {"points": points, "delivered": len(srv.lines), "dropped": sink.dropped,
+                  "requests": srv.requests, "connections": len(srv.connections),
+                  "point_us_mean": round(float(lat.mean()) * 1e6, 2),
+                  "point_us_p99": round(float(np.percentile(lat, 99)) * 1e6, 2)}
+
+        # 2) Ausfall → Spool → Nachlieferung
+        srv.stop()
+        base = len(srv.lines)
+        for i in range(1000):
+            sink.point("hl_counts", {"in": i, "out": 0}, {"name": "auslauf"}, ts_ms=10_000_000 + i)
+        time.sleep(1.0)
+        spool_files = sink.stats()["spool_files"]
+        srv2 = StandIn(port, latency_ms)
+        srv2.lines = srv.lines  # gemeinsame Liste für die Prüfung (vor dem ersten Request)
+        srv2.start()
+        sink.point("hl_counts", {"in": 1, "out": 0}, {"name": "auslauf"}, ts_ms=20_000_000)
+        t_wait = time.time() + 10
+        while len(srv2.lines) < base + 1001 and time.time() < t_wait:
+            time.sleep(0.05)
+        sink.close()
+        srv2.stop()
+        outage = {"spool_files_during_outage": spool_files, "delivered_after": len(srv2.lines) - base,
+                  "expected_after": 1001, "errors": sink.errors, "spool_left": sink.stats()["spool_files"]}
+        dup = len(srv2.lines) - len(set(srv2.lines))
+        return {"case": f"influx/points{points}/lat{latency_ms:g}ms", **phase1, **outage, "duplicates": dup}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--points", type=int, default=20000)
+    ap.add_argument("--pace", type=int, default=20, help="nach so vielen Punkten 1 ms Pause (0 = Dauerfeuer)")
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="künstliche Antwortzeit des Stand-in-Servers")
+    ap.add_argument("--port", type=int, default=18086)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+    r = run(args.points, args.latency_ms, args.port, args.pace or args.points + 1)
+    print(f"{r['case']}: point() mean {r['point_us_mean']} µs, p99 {r['point_us_p99']} µs; "
+          f"delivered {r['delivered']}/{r['points']} (dropped {r['dropped']}) in {r['requests']} requests "
+          f"over {r['connections']} connection(s)")
+    print(f"outage: {r['spool_files_during_outage']} spool file(s), delivered afterwards "
+          f"{r['delivered_after']}/{r['expected_after']}, spool left {r['spool_left']}, duplicates {r['duplicates']}")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps({"bench": "influx", "results": [r]}, indent=2))
+    ok = r["delivered"] + r["dropped"] == r["points"] and r["delivered_after"] == r["expected_after"] and r["duplicates"] == 0 and r["spool_left"] == 0
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
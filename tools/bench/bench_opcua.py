@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark + Funktionsprobe: OPC-UA-Publisher (stream/opcua.py) gegen einen lokalen asyncua-Server
+- Server in eigenem Thread/Loop mit den Knoten wie in der SPS (Int32 für Zähler/Blobs, Double für Motion/Fps)
+- Pipeline-Ersatz: --rate update()-Aufrufe pro Sekunde über --duration Sekunden (Zählerstände steigen)
+- gemessen: Kosten von update() im Aufrufer (mean/p99 µs), Anzahl WriteRequests vs. Updates (Coalescing),
+  Endwerte auf dem Server == letzte Werte der Pipeline
+- Ausfall: Server stoppen, neu starten (Werte wieder 0) → Publisher verbindet neu und schreibt alles
+
+Benötigt `pip install asyncua`.
+
+Aufruf:
+  PYTHONPATH=src python tools/bench/bench_opcua.py [--rate 1000] [--duration 5] [--publish-sec 0.5] [--json out.json]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from roboflow_counter.stream.opcua import OpcuaPublisher  # noqa: E402
+
+STREAM = "bench"
+INT_KEYS = ("Blobs", "auslauf.In", "auslauf.Out", "sieb.In", "sieb.Out")
+FLOAT_KEYS = ("Motion", "Fps")
+
+
+class LocalServer:
+    """asyncua-Server in eigenem Thread; read() liest die aktuellen Knotenwerte."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.endpoint = f"opc.tcp://127.0.0.1:{port}/larvacounter/"
+        self.loop = asyncio.new_event_loop()
+        self.vars = {}
+        self.ns = 2
+        self._ready = threading.Event()
+        self._stop = None
+        self._thread = threading.Thread(target=self.loop.run_until_complete, args=(self._main(),), daemon=True)
+
+    async def _main(self):
+        from asyncua import Server, ua
+        srv = Server()
+        await srv.init()
+        srv.set_endpoint(self.endpoint)
+        self.ns = await srv.register_namespace("urn:larvacounter")
+        folder = await srv.nodes.objects.add_object(self.ns, "larvacounter")
+        for key in INT_KEYS + FLOAT_KEYS:
+            vt = ua.VariantType.Int32 if key in INT_KEYS else ua.VariantType.Double
+            v = await folder.add_variable(ua.NodeId(f"larvacounter.{STREAM}.{key}", self.ns), key,
+                                          ua.Variant(0 if key in INT_KEYS else 0.0, vt))
+            await v.set_writable()
+            self.vars[key] = v
+        self._stop = asyncio.Event()
+        async with srv:
+            self._ready.set()
+            await self._stop.wait()
+
+    def start(self) -> "LocalServer":
+        self._thread.start()
+        if not self._ready.wait(15):
+            raise RuntimeError("asyncua server did not start")
+        return self
+
+    def read(self) -> dict:
+        async def _read():
+            return {k: await v.read_value() for k, v in self.vars.items()}
+        return asyncio.run_coroutine_threadsafe(_read(), self.loop).result(5)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(10)
+
+
+def values_at(i: int, rate: int) -> dict:
+    return {"Blobs": i % 50, "auslauf.In": i // 10, "auslauf.Out": i // 100, "sieb.In": i // 20,
+            "sieb.Out": i // 40, "Motion": (i % 1000) / 1000.0, "Fps": float(rate % 1000) / 40.0}
+
+
+def wait_for(pred, timeout: float) -> bool:
+    t = time.time() + timeout
+    while time.time() < t:
+        if pred():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run(rate: int, duration: float, publish_sec: float, port: int) -> dict:
+    srv = LocalServer(port).start()
+    pub = OpcuaPublisher(srv.endpoint, stream=STREAM, node_template=f"ns={srv.ns};s=larvacounter.{{stream}}.{{key}}",
+                         publish_sec=publish_sec, backoff_max_sec=4).start()
+    wait_for(lambda: pub.connected, 15)
+
+    n = int(rate * duration)
+    lat = np.empty(n)
+    t_start = time.perf_counter()
+    last = {}
+    for i in range(n):
+        last = values_at(i, rate)
+        t0 = time.perf_counter()
+        pub.update(last)
+        lat[i] = time.perf_counter() - t0
+        # gleichmäßig takten wie ein Frame-Loop
+        dt = t_start + (i + 1) / rate - time.perf_counter()
+        if dt > 0:
+            time.sleep(dt)
+    ok_final = wait_for(lambda: srv.read() == {k: last[k] for k in srv.read()}, 5 * publish_sec + 5)
+    res = {"case": f"opcua/rate{rate}/publish{publish_sec:g}s", "updates": pub.updates, "writes": pub.writes,
+           "values": pub.values, "update_us_mean": round(float(lat.mean()) * 1e6, 2),
+           "update_us_p99": round(float(np.percentile(lat, 99)) * 1e6, 2), "final_ok": ok_final}
+
+    # Ausfall + Neustart: neuer Server mit Werten 0 → Publisher muss alles erneut schreiben
+    srv.stop()
+    t_down = time.time()
+    wait_for(lambda: not pub.connected, 10)
+    time.sleep(1.0)
+    srv = LocalServer(port).start()
+    ok_restore = wait_for(lambda: pub.connected and srv.read() == {k: last[k] for k in srv.read()}, 30)
+    res.update({"reconnects": pub.reconnects, "errors": pub.errors, "restore_ok": ok_restore,
+                "restore_s": round(time.time() - t_down, 1)})
+    pub.close()
+    srv.stop()
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=int, default=1000, help="update()-Aufrufe pro Sekunde")
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--publish-sec", type=float, default=0.5)
+    ap.add_argument("--port", type=int, default=14840)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+    r = run(args.rate, args.duration, args.publish_sec, args.port)
+    print(f"{r['case']}: update() mean {r['update_us_mean']} µs, p99 {r['update_us_p99']} µs; "
+          f"{r['updates']} updates → {r['writes']} write requests ({r['values']} node values), final ok={r['final_ok']}")
+    print(f"restart: reconnects {r['reconnects']}, errors {r['errors']}, restored ok={r['restore_ok']} "
+          f"after {r['restore_s']} s")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps({"bench": "opcua", "results": [r]}, indent=2))
+    sys.exit(0 if r["final_ok"] and r["restore_ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark-Suite: Highlight-Pipeline Stufe für Stufe und Ende-zu-Ende
+- deterministische synthetische Frames (tools/bench/synth.py): Textur + Siebgitter, bewegte
+  längliche Blobs, Lichtflackern, Rauschen – 720p / 1080p / 4K
+- pipeline: alle Stufen einzeln über Backend.metrics (upload, gray, gauss, ema, threshold, morph,
+  region, composite, download) + Übergabe an den Writer (acquire/submit, Pipe-Write in einen
+  Null-Sink) + Ende-zu-Ende pro Frame
+- gauss: Gauss-Stufe allein für jede ksize (Default 3 7 15 27 31)
+- Ausgabe als JSON (--json), Vergleich zweier Läufe mit tools/bench/compare.py
+
+Aufruf:
+  PYTHONPATH=src python tools/bench/bench_pipeline.py [--res 720p 1080p 4k] [--frames 60]
+        [--backend cpu] [--scale 1.0] [--ksize 27] [--gauss-sizes 3 7 15 27 31] [--json out.json]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from roboflow_counter.stream.backends import create_backend  # noqa: E402
+from roboflow_counter.stream.region import region_from_env  # noqa: E402
+from roboflow_counter.stream.writer import FfmpegWriter  # noqa: E402
+from synth import RESOLUTIONS, SynthScene  # noqa: E402
+
+WARMUP = 10
+ALPHA, THR, GAIN, DARKEN = 0.05, 25, 0.5, 0.3
+
+# Null-Sink für die Writer-Pipe: misst die Übergabe, nicht den Encoder
+NULL_SINK = [sys.executable, "-c",
+             "import sys, shutil, os; shutil.copyfileobj(sys.stdin.buffer, open(os.devnull, 'wb'), 1 << 22)"]
+
+
+class Recorder:
+    """Wie stream.metrics.Metrics (lap/observe), hält aber alle Einzelwerte für Perzentile."""
+
+    def __init__(self):
+        self.times: dict[str, list[float]] = {}
+        self.enabled = False
+
+    def observe(self, stage: str, seconds: float):
+        if self.enabled:
+            self.times.setdefault(stage, []).append(seconds)
+
+    def lap(self, stage: str, t0: float) -> float:
+        t = time.perf_counter()
+        self.observe(stage, t - t0)
+        return t
+
+
+def summarize(values) -> dict:
+    a = np.asarray(values, np.float64) * 1000.0
+    if a.size == 0:
+        return {"n": 0}
+    return {
+        "n": int(a.size),
+        "mean_ms": round(float(a.mean()), 4),
+        "p50_ms": round(float(np.percentile(a, 50)), 4),
+        "p95_ms": round(float(np.percentile(a, 95)), 4),
+        "p99_ms": round(float(np.percentile(a, 99)), 4),
+    }
+
+
+def bench_pipeline(res: str, frames: int, backend: str, scale: float, ksize: int, region: bool) -> dict:
+    w, h = RESOLUTIONS[res]
+    os.environ["HL_GAUSS"] = str(ksize)
+    scene = SynthScene(w, h, larvae=40, seed=1, flicker=0.03)
+    frame, _ = scene.frame(0)
+    be = create_backend(backend, w, h, scale=scale)
+    if region:
+        be.set_region_filter(region_from_env())
+    rec = Recorder()
+    be.metrics = rec
+    be.reset(frame)
+    writer = FfmpegWriter(NULL_SINK, w, h, policy="block", depth=2, alloc=be.host_buffer, log_level="WARNING")
+    writer.metrics = rec
+    writer.start()
+    e2e = []
+    try:
+        for i in range(1, frames + WARMUP):
+            frame, _ = scene.frame(i)
+            rec.enabled = i >= WARMUP
+            t0 = time.perf_counter()
+            be.analyze(frame, ALPHA, THR)
+            t1 = time.perf_counter()
+            buf = writer.acquire()
+            rec.lap("acquire", t1)
+            out = be.render(GAIN, DARKEN, out=buf)
+            t2 = time.perf_counter()
+            writer.submit(out)
+            t3 = rec.lap("submit", t2)
+            if rec.enabled:
+                e2e.append(t3 - t0)
+    finally:
+        rec.enabled = False
+        writer.close()
+    stages = {k: summarize(v) for k, v in rec.times.items()}
+    total = summarize(e2e)
+    total["fps"] = round(1000.0 / total["mean_ms"], 1) if total.get("mean_ms") else 0.0
+    return {
+        "case": f"pipeline/{res}/{be.name}/s{be.scale:g}/k{ksize}",
+        "kind": "pipeline", "res": res, "backend": be.name, "scale": be.scale, "ksize": ksize,
+        "region": region, "frames": frames, "stages": stages, "e2e": total, "allocs": be.allocs,
+    }
+
+
+def bench_gauss(res: str, frames: int, backend: str, scale: float, ksizes) -> list:
+    w, h = RESOLUTIONS[res]
+    scene = SynthScene(w, h, larvae=40, seed=1, flicker=0.03)
+    frames_in = [scene.frame(i)[0].copy() for i in range(min(frames, 8))]  # kleiner Vorrat reicht
+    out = []
+    for k in ksizes:
+        os.environ["HL_GAUSS"] = str(k)
+        be = create_backend(backend, w, h, scale=scale)
+        be.reset(frames_in[0])
+        times = []
+        for i in range(frames + WARMUP):
+            be.upload(frames_in[i % len(frames_in)])
+            be.gray()
+            t0 = time.perf_counter()
+            be.gauss()
+            if i >= WARMUP:
+                times.append(time.perf_counter() - t0)
+        k_eff = getattr(be, "ksize", k)
+        out.append({"case": f"gauss/{res}/{be.name}/s{be.scale:g}/k{k}", "kind": "gauss", "res": res,
+                    "backend": be.name, "scale": be.scale, "ksize": k, "ksize_effective": k_eff,
+                    "stages": {"gauss": summarize(times)}})
+    return out
+
+
+def meta() -> dict:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent, timeout=5).stdout.strip()
+    except Exception:
+        rev = ""
+    return {
+        "git": rev, "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "host": platform.node(),
+        "python": platform.python_version(), "numpy": np.__version__, "opencv": cv2.__version__,
+        "cpus": os.cpu_count(), "cv2_threads": cv2.getNumThreads(),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--res", nargs="+", choices=sorted(RESOLUTIONS), default=["720p", "1080p", "4k"])
+    ap.add_argument("--frames", type=int, default=60)
+    ap.add_argument("--backend", default="cpu")
+    ap.add_argument("--scale", type=float, default=1.0)
+    ap.add_argument("--ksize", type=int, default=27, help="Gauss-Kernel der Pipeline-Messung")
+    ap.add_argument("--gauss-sizes", type=int, nargs="*", default=[3, 7, 15, 27, 31])
+    ap.add_argument("--no-region", action="store_true")
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+
+    results = []
+    for res in args.res:
+        r = bench_pipeline(res, args.frames, args.backend, args.scale, args.ksize, not args.no_region)
+        results.append(r)
+        st = "  ".join(f"{k}={v['mean_ms']:.2f}" for k, v in r["stages"].items() if v.get("n"))
+        print(f"{r['case']:<32} e2e {r['e2e']['mean_ms']:8.2f} ms (p95 {r['e2e']['p95_ms']:.2f})  "
+              f"{r['e2e']['fps']:7.1f} fps | {st}")
+        if args.gauss_sizes:
+            for g in bench_gauss(res, args.frames, args.backend, args.scale, args.gauss_sizes):
+                results.append(g)
+                s = g["stages"]["gauss"]
+                print(f"{g['case']:<32} gauss {s['mean_ms']:8.3f} ms (p95 {s['p95_ms']:.3f})")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps({"bench": "pipeline", "meta": meta(), "results": results},
+                                                  indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Analyse-Auflösung (analysis_scale) – Durchsatz vs. Maskenqualität
+- alle Skalierungen laufen im Gleichschritt auf denselben synthetischen Frames (tools/bench/synth.py)
+- gemessen je Skalierung: analyze (gray/resize/gauss/motion/morph/region) und render (Upscale + Composite)
+- Qualität der hochskalierten Maske:
+    iou_ref   = IoU gegen die Maske bei scale 1.0
+    recall_gt = Anteil Ground-Truth-Larvenpixel in der Maske, precision_gt = Anteil Maskenpixel auf Larven
+
+- --roi x0 y0 x1 y1: Motion-Stufen nur im Rechteck (stream/roi.py), Kosten ~ Flächenanteil
+
+Aufruf:
+  PYTHONPATH=src python tools/bench/bench_scale.py [--res 1080p] [--scales 1 0.5 0.33 0.25]
+                                                    [--frames 200] [--backend cpu] [--roi 400 200 1500 900]
+                                                    [--json out.json]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from roboflow_counter.stream.backends import create_backend  # noqa: E402
+from roboflow_counter.stream.region import region_from_env  # noqa: E402
+from roboflow_counter.stream.roi import Roi  # noqa: E402
+from synth import RESOLUTIONS, SynthScene  # noqa: E402
+
+WARMUP = 20
+
+
+def _full_mask(be) -> np.ndarray:
+    m = be.upscale_mask()
+    if hasattr(m, "download"):  # CUDA: schon Vollbild
+        return m.download()
+    full = np.zeros((be.h, be.w), np.uint8)  # CPU: Fenstergröße (Zuschnitt auf Vielfaches von n)
+    full[be._crop] = m
+    return full
+
+
+def _full_roi(be) -> np.ndarray:
+    return be.roi.mask((be.w, be.h)) > 0
+
+
+def run(res: str, scales, frames: int, backend: str, region: bool, alpha: float, thr: int,
+        roi: Roi | None = None) -> list:
+    w, h = RESOLUTIONS[res]
+    scene = SynthScene(w, h)
+    frame, _ = scene.frame(0)
+    bes = []
+    for s in scales:
+        be = create_backend(backend, w, h, scale=s, roi=roi)
+        if region:
+            be.set_region_filter(region_from_env())
+        be.reset(frame)
+        bes.append(be)
+    t_an = [[] for _ in bes]
+    t_re = [[] for _ in bes]
+    q = [{"iou": [], "rec": [], "prec": []} for _ in bes]
+
+    for i in range(1, frames + WARMUP):
+        frame, gt = scene.frame(i)
+        ref = None
+        for k, be in enumerate(bes):
+            t0 = time.perf_counter()
+            be.analyze(frame, alpha, thr)
+            t1 = time.perf_counter()
+            be.render(0.5, 0.3)
+            t2 = time.perf_counter()
+            if i < WARMUP:
+                continue
+            t_an[k].append(t1 - t0)
+            t_re[k].append(t2 - t1)
+            if i % 5:
+                continue
+            m = _full_mask(be) > 0
+            if ref is None:
+                ref = m.copy()
+            g = gt > 0
+            if be.roi is not None:
+                g &= _full_roi(be)
+            inter_ref = np.count_nonzero(m & ref)
+            union_ref = np.count_nonzero(m | ref)
+            inter_gt = np.count_nonzero(m & g)
+            q[k]["iou"].append(inter_ref / union_ref if union_ref else 1.0)
+            q[k]["rec"].append(inter_gt / max(1, np.count_nonzero(g)))
+            q[k]["prec"].append(inter_gt / max(1, np.count_nonzero(m)))
+
+    out = []
+    base = None
+    for k, (s, be) in enumerate(zip(scales, bes)):
+        an = np.asarray(t_an[k]) * 1000.0
+        re = np.asarray(t_re[k]) * 1000.0
+        tot = float((an + re).mean())
+        base = base or tot
+        out.append({
+            "res": res, "scale": s, "window": f"{be.cw}x{be.ch}", "analysis": f"{be.aw}x{be.ah}", "backend": be.name,
+            "analyze_ms": round(float(an.mean()), 3), "render_ms": round(float(re.mean()), 3),
+            "total_ms": round(tot, 3), "fps": round(1000.0 / tot, 1), "speedup": round(base / tot, 2),
+            "iou_ref": round(float(np.mean(q[k]["iou"])), 4),
+            "recall_gt": round(float(np.mean(q[k]["rec"])), 4),
+            "precision_gt": round(float(np.mean(q[k]["prec"])), 4),
+            "allocs": be.allocs,
+        })
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--res", choices=sorted(RESOLUTIONS), default="1080p")
+    ap.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.5, 0.33, 0.25])
+    ap.add_argument("--frames", type=int, default=200)
+    ap.add_argument("--backend", default="cpu")
+    ap.add_argument("--gauss", type=int, default=27, help="HL_GAUSS bei scale 1.0")
+    ap.add_argument("--alpha", type=float, default=0.05)
+    ap.add_argument("--thr", type=int, default=25)
+    ap.add_argument("--no-region", action="store_true")
+    ap.add_argument("--roi", type=int, nargs=4, metavar=("X0", "Y0", "X1", "Y1"), default=None)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+    os.environ["HL_GAUSS"] = str(args.gauss)
+    scales = sorted(set(args.scales), reverse=True)
+    if scales[0] != 1.0:
+        scales.insert(0, 1.0)  # Referenz für iou_ref
+    roi = None
+    if args.roi:
+        x0, y0, x1, y1 = args.roi
+        roi = Roi([[[x0, y0], [x1, y0], [x1, y1], [x0, y1]]])
+    res = run(args.res, scales, args.frames, args.backend, not args.no_region, args.alpha, args.thr, roi)
+    for r in res:
+        print(f"{r['res']} scale={r['scale']:<5} {r['analysis']:>10}  analyze {r['analyze_ms']:7.2f} ms  "
+              f"render {r['render_ms']:6.2f} ms  {r['fps']:7.1f} fps  x{r['speedup']:<5}  "
+              f"iou_ref={r['iou_ref']:.3f} recall={r['recall_gt']:.3f} precision={r['precision_gt']:.3f}")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps({"bench": "scale", "results": res}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
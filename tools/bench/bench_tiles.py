@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Motion-Gating der Inferenz (stream/tiles.py) auf synthetischen Sieb-Frames (synth.py)
+- Pipeline-Ersatz: CPU-Backend (Gray → Gauss → EMA → Threshold → Morph) liefert die Bewegungsmaske,
+  TileGate plant daraus die Kacheln
+- Szenen mit unterschiedlich vielen Larven (0 = ruhiges Sieb, alle Frames sollten übersprungen werden)
+- gemessen: Anteil gesendeter Pixel (sent_ratio), übersprungene Frames, Kacheln je Frame, Kosten von plan()
+  (mean/p99 ms) und Abdeckung: Anteil der Ground-Truth-Larvenpixel, die in einer Kachel liegen
+
+Aufruf:
+  PYTHONPATH=src python tools/bench/bench_tiles.py [--res 1080p] [--larvae 0 3 10 40] [--frames 200]
+        [--scale 1.0] [--json out.json]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from roboflow_counter.stream.backends import create_backend  # noqa: E402
+from roboflow_counter.stream.tiles import TileGate  # noqa: E402
+from synth import RESOLUTIONS, SynthScene  # noqa: E402
+
+ALPHA, THR = 0.05, 12
+WARMUP = 30
+
+
+def run(res: str, larvae: int, frames: int, scale: float, max_tiles: int) -> dict:
+    w, h = RESOLUTIONS[res]
+    scene = SynthScene(w, h, larvae=larvae, seed=1)
+    frame, _ = scene.frame(0)
+    be = create_backend("cpu", w, h, scale=scale)
+    be.reset(frame)
+    gate = None
+    lat, covered, gt_px, n_tiles = [], 0, 0, []
+    for i in range(1, frames + WARMUP):
+        frame, gt = scene.frame(i)
+        be.analyze(frame, ALPHA, THR)
+        if i < WARMUP:
+            continue
+        if gate is None:  # Zähler erst nach dem Einlaufen des EMA-Hintergrunds
+            gate = TileGate(w, h, scale=be.scale, offset=(be.x0, be.y0), max_tiles=max_tiles)
+        mask = be.mask()
+        t0 = time.perf_counter()
+        tiles = gate.plan(mask)
+        lat.append(time.perf_counter() - t0)
+        n_tiles.append(len(tiles))
+        inside = np.zeros((h, w), np.uint8)
+        for x, y, tw, th in tiles:
+            inside[y:y + th, x:x + tw] = 255
+        gt_px += cv2.countNonZero(gt)
+        covered += cv2.countNonZero(cv2.bitwise_and(gt, inside))
+    a = np.asarray(lat) * 1000.0
+    st = gate.stats()
+    return {"case": f"tiles/{res}/larvae{larvae}/s{be.scale:g}", "res": res, "larvae": larvae, "scale": be.scale,
+            "frames": st["gate_frames"], "skipped": st["gate_skipped"], "full": st["gate_full"],
+            "tiles_per_frame": round(float(np.mean(n_tiles)), 2), "sent_ratio": st["sent_ratio"],
+            "gt_coverage": round(covered / gt_px, 4) if gt_px else 1.0,
+            "plan_ms_mean": round(float(a.mean()), 3), "plan_ms_p99": round(float(np.percentile(a, 99)), 3)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--res", default="1080p", choices=list(RESOLUTIONS))
+    ap.add_argument("--larvae", type=int, nargs="+", default=[0, 3, 10, 40])
+    ap.add_argument("--frames", type=int, default=200)
+    ap.add_argument("--scale", type=float, default=1.0, help="Analyse-Auflösung (wie HL_SCALE)")
+    ap.add_argument("--max-tiles", type=int, default=8)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+    results = []
+    for n in args.larvae:
+        r = run(args.res, n, args.frames, args.scale, args.max_tiles)
+        results.append(r)
+        print(f"{r['case']:<28} sent {100 * r['sent_ratio']:5.1f}% of pixels  skipped {r['skipped']}/{r['frames']}  "
+              f"full {r['full']}  tiles/frame {r['tiles_per_frame']:4.2f}  coverage {100 * r['gt_coverage']:5.1f}%  "
+              f"plan() {r['plan_ms_mean']:.3f} ms (p99 {r['plan_ms_p99']:.3f})")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps({"bench": "tiles", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Blob-Tracker + Zähllinie mit synthetischen Blobs
+- N gleichzeitige Larven (Default 10, 100, 1000) bewegen sich mit zufälliger
+  Geschwindigkeit über ein 1920x1080-Bild, verlassen es und tauchen neu auf
+- gemessen wird CountingEngine.update_blobs (Tracker + Zähllinie) pro Frame, ohne Masken-Extraktion
+- id_consistency = Anteil der Blobs, die im Folgeframe dieselbe Track-ID behalten
+
+Aufruf:
+  PYTHONPATH=src python tools/bench/bench_tracker.py [--tracks 10 100 1000] [--frames 300] [--json out.json]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from roboflow_counter.tracker.counting import CountingEngine  # noqa: E402
+
+W, H = 1920, 1080
+
+
+def run(n: int, frames: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform((0, 0), (W, H), (n, 2)).astype(np.float32)
+    vel = rng.uniform(-6, 6, (n, 2)).astype(np.float32)
+    size = rng.uniform((20, 6), (40, 14), (n, 2)).astype(np.float32)
+    eng = CountingEngine({
+        "max_dist": 20, "max_missed": 2, "interval_sec": 3600,
+        "lines": [{"name": "mid", "points": [[0, H / 2], [W, H / 2]]}],
+    })
+    tr = eng.tracker
+    times = []
+    same = total = 0
+    prev_ids = None
+    for _ in range(frames):
+        pos += vel + rng.normal(0, 0.5, pos.shape).astype(np.float32)
+        out = (pos[:, 0] < 0) | (pos[:, 0] >= W) | (pos[:, 1] < 0) | (pos[:, 1] >= H)
+        if out.any():  # verlassen → neu an zufälliger Position
+            pos[out] = rng.uniform((0, 0), (W, H), (int(out.sum()), 2))
+        boxes = np.concatenate([pos - size / 2, size], axis=1).astype(np.float32)
+
+        t0 = time.perf_counter()
+        eng.update_blobs(boxes, pos.copy())
+        times.append(time.perf_counter() - t0)
+
+        # ID-Konsistenz: Track-ID je Blob über Position zurückfinden
+        order = np.lexsort((tr.cent[:, 1], tr.cent[:, 0]))
+        key_t = tr.cent[order]
+        ids_now = np.full(n, -1, np.int64)
+        j = np.searchsorted(key_t[:, 0], pos[:, 0])
+        j = np.clip(j, 0, len(key_t) - 1)
+        hit = np.all(np.isclose(key_t[j], pos), axis=1)
+        ids_now[hit] = tr.ids[order][j[hit]]
+        if prev_ids is not None:
+            valid = ~out & (ids_now >= 0) & (prev_ids >= 0)
+            same += int((ids_now[valid] == prev_ids[valid]).sum())
+            total += int(valid.sum())
+        prev_ids = ids_now
+
+    t = np.asarray(times[10:]) * 1000.0  # Warm-up ignorieren
+    return {
+        "tracks": n,
+        "frames": frames,
+        "ms_mean": round(float(t.mean()), 3),
+        "ms_p99": round(float(np.percentile(t, 99)), 3),
+        "fps": round(1000.0 / float(t.mean()), 1),
+        "track_updates_per_s": round(n * 1000.0 / float(t.mean())),
+        "id_consistency": round(same / max(total, 1), 4),
+        "counted": eng.counter.total["mid"],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tracks", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+    res = [run(n, args.frames) for n in args.tracks]
+    for r in res:
+        print(f"tracks={r['tracks']:>5}  {r['ms_mean']:7.3f} ms/frame (p99 {r['ms_p99']:.3f})  "
+              f"{r['fps']:>8.1f} fps  {r['track_updates_per_s']:>9} upd/s  id={r['id_consistency']:.3f}")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps({"bench": "tracker", "results": res}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Zwei Benchmark-JSONs vergleichen (bench_pipeline.py) und Regressionen melden
+- Zuordnung über "case", verglichen werden mean_ms je Stufe und Ende-zu-Ende (e2e)
+- Regression = neuer Wert > alter Wert * (1 + threshold) und Differenz > min_ms
+  (winzige Stufen schwanken relativ stark, daher die absolute Untergrenze)
+- Exit-Code 1 bei mindestens einer Regression (für CI / vor dem Deployment)
+
+Aufruf:
+  python tools/bench/compare.py base.json new.json [--threshold 0.10] [--min-ms 0.05]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _metrics(r: dict) -> dict:
+    out = {f"stage.{k}": v["mean_ms"] for k, v in (r.get("stages") or {}).items() if v.get("n")}
+    if (r.get("e2e") or {}).get("n"):
+        out["e2e"] = r["e2e"]["mean_ms"]
+    return out
+
+
+def compare(base: dict, new: dict, threshold: float, min_ms: float):
+    b = {r["case"]: r for r in base.get("results", []) if "case" in r}
+    rows, regressions = [], 0
+    for r in new.get("results", []):
+        case = r.get("case")
+        if case not in b:
+            rows.append((case, "-", None, None, "new"))
+            continue
+        old_m, new_m = _metrics(b[case]), _metrics(r)
+        for key in sorted(new_m):
+            if key not in old_m:
+                continue
+            o, n = old_m[key], new_m[key]
+            delta = (n - o) / o if o > 0 else 0.0
+            if delta > threshold and n - o > min_ms:
+                status = "REGRESSION"
+                regressions += 1
+            elif delta < -threshold and o - n > min_ms:
+                status = "faster"
+            else:
+                status = "ok"
+            rows.append((case, key, o, n, status))
+    return rows, regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("base")
+    ap.add_argument("new")
+    ap.add_argument("--threshold", type=float, default=0.10, help="relative Toleranz (0.10 = +10 %%)")
+    ap.add_argument("--min-ms", type=float, default=0.05, help="absolute Untergrenze in ms")
+    ap.add_argument("--all", action="store_true", help="auch unveränderte Werte ausgeben")
+    args = ap.parse_args()
+    base = json.loads(Path(args.base).read_text())
+    new = json.loads(Path(args.new).read_text())
+    rows, regressions = compare(base, new, args.threshold, args.min_ms)
+    print(f"base: {base.get('meta', {}).get('git', '?')}  new: {new.get('meta', {}).get('git', '?')}")
+    for case, key, o, n, status in rows:
+        if status == "ok" and not args.all:
+            continue
+        if o is None:
+            print(f"{case:<34} {'':<18} {'':>10}   {'':>10}  {status}")
+            continue
+        print(f"{case:<34} {key:<18} {o:10.3f} → {n:10.3f} ms  {100.0 * (n - o) / o:+6.1f}%  {status}")
+    print(f"{regressions} regression(s) (threshold {args.threshold:.0%}, min {args.min_ms} ms)")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
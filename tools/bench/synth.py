@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetische Sieb-Szene für Benchmarks (kein Kamera-/RTSP-Zugriff nötig)
+- Hintergrund: Rauschtextur + Siebgitter, leichtes Rütteln (globaler Versatz ±jitter px)
+- Larven: helle Ellipsen mit zufälliger Größe/Richtung, die sich bewegen und am Rand neu auftauchen
+- Sensorrauschen aus einem kleinen Vorrat vorberechneter Rauschbilder
+- optional Lichtflackern: globale Helligkeit 1 + flicker * sin(2π i / flicker_period)
+- deterministisch: gleicher seed → gleiche Frame-Folge
+- frame(i) liefert (BGR-Frame, Ground-Truth-Maske der Larven)
+
+Koordinaten/Größen sind auf 1080p bezogen und skalieren mit der Bildhöhe.
+"""
+
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "4k": (3840, 2160)}
+
+
+class SynthScene:
+    def __init__(self, w: int = 1920, h: int = 1080, larvae: int = 40, seed: int = 0,
+                 jitter: int = 1, noise: float = 3.0, contrast: int = 90,
+                 flicker: float = 0.0, flicker_period: float = 7.3):
+        self.w, self.h = w, h
+        self.jitter = int(jitter)
+        self.contrast = int(contrast)
+        self.flicker = float(flicker)
+        self.flicker_period = float(flicker_period)
+        rng = np.random.default_rng(seed)
+        self.rng = rng
+        f = h / 1080.0
+
+        # Hintergrund mit Rand für den Versatz
+        pad = self.jitter
+        bh, bw = h + 2 * pad, w + 2 * pad
+        tex = rng.normal(70, 12, (bh // 4 + 1, bw // 4 + 1)).astype(np.float32)
+        tex = cv2.resize(cv2.GaussianBlur(tex, (5, 5), 0), (bw, bh), interpolation=cv2.INTER_CUBIC)
+        step = max(6, int(round(24 * f)))
+        tex[::step, :] -= 25
+        tex[:, ::step] -= 25
+        bg = np.clip(tex, 0, 255).astype(np.uint8)
+        self.bg = cv2.merge([bg, (bg * 0.95).astype(np.uint8), (bg * 0.9).astype(np.uint8)])
+
+        self.noise = [rng.normal(0, noise, (h, w, 1)).astype(np.int16) for _ in range(4)] if noise > 0 else []
+
+        n = int(larvae)
+        self.pos = rng.uniform((0, 0), (w, h), (n, 2)).astype(np.float32)
+        self.vel = (rng.uniform(-4, 4, (n, 2)) * f).astype(np.float32)
+        self.axes = (rng.uniform((14, 5), (26, 9), (n, 2)) * f).astype(np.float32)
+        self.angle = rng.uniform(0, 180, n).astype(np.float32)
+
+        self.frame_buf = np.empty((h, w, 3), np.uint8)
+        self.gt = np.empty((h, w), np.uint8)
+        self._i16 = np.empty((h, w, 3), np.int16)
+
+    def step(self):
+        self.pos += self.vel
+        out = (self.pos[:, 0] < 0) | (self.pos[:, 0] >= self.w) | (self.pos[:, 1] < 0) | (self.pos[:, 1] >= self.h)
+        if out.any():
+            self.pos[out] = self.rng.uniform((0, 0), (self.w, self.h), (int(out.sum()), 2))
+
+    def frame(self, i: int):
+        """Frame i erzeugen (bewegt die Larven um einen Schritt). Puffer werden wiederverwendet."""
+        self.step()
+        j = self.jitter
+        dx, dy = (int(self.rng.integers(-j, j + 1)), int(self.rng.integers(-j, j + 1))) if j else (0, 0)
+        np.copyto(self.frame_buf, self.bg[j + dy:j + dy + self.h, j + dx:j + dx + self.w])
+        self.gt[:] = 0
+        c = min(255, 70 + self.contrast)
+        for (x, y), (a, b), ang in zip(self.pos, self.axes, self.angle):
+            center, axes = (int(x), int(y)), (int(a), int(b))
+            cv2.ellipse(self.frame_buf, center, axes, float(ang), 0, 360, (c, c, c), -1, cv2.LINE_AA)
+            cv2.ellipse(self.gt, center, axes, float(ang), 0, 360, 255, -1)
+        if self.noise:
+            np.add(self.frame_buf, self.noise[i % len(self.noise)], out=self._i16, casting="unsafe")
+            np.clip(self._i16, 0, 255, out=self._i16)
+            self.frame_buf[:] = self._i16
+        if self.flicker:
+            g = 1.0 + self.flicker * np.sin(2.0 * np.pi * i / self.flicker_period)
+            cv2.convertScaleAbs(self.frame_buf, dst=self.frame_buf, alpha=g)
+        return self.frame_buf, self.gt